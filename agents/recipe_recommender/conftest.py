@@ -0,0 +1,32 @@
+import sqlite3
+
+import pytest
+
+from recipe_store import RECIPE_COLUMNS
+
+# (id, name, ingredients, steps, tags)
+RECIPES = [
+    (10, "Tomato soup", "tomatoes, onion, garlic", "Simmer into a soup.", "vegetarian"),
+    (20, "Chicken curry", "chicken, coconut milk, lime", "Cook the curry for 20 minutes.", "spicy"),
+    (30, "Lime cake", "flour, sugar, lime", "Bake the cake.", "dessert"),
+    (40, "Coconut rice", "rice, coconut milk", "Steam the rice.", "side"),
+    (50, "Chicken soup", "chicken, carrot, onion", "Simmer into a soup.", "comfort"),
+]
+
+
+def make_db(path: str, recipes=RECIPES) -> str:
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE recipes (id INTEGER PRIMARY KEY, {', '.join(c + ' TEXT' for c in RECIPE_COLUMNS[1:])})")
+    conn.executemany(
+        f"INSERT INTO recipes ({', '.join(RECIPE_COLUMNS)}) VALUES ({', '.join('?' * len(RECIPE_COLUMNS))})",
+        [(rid, name, f"{name} description", ingredients, steps, tags, "1 bowl", "2", name.lower())
+         for rid, name, ingredients, steps, tags in recipes],
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def recipe_db(tmp_path):
+    return make_db(str(tmp_path / "recipes.sqlite"))
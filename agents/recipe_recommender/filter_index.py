@@ -0,0 +1,146 @@
+"""
+Dish-type and ingredient filters applied inside the FAISS search.
+
+search used to over-fetch 2*top_k neighbours and drop the ones whose steps
+lack the detected dish type or whose ingredients lack every extracted
+ingredient, so selective queries came back short (or 404). FilterIndex
+precomputes, over FAISS ids (idmap rows):
+
+  dish-type bitsets   one packed bitset per DISH_TYPES entry (substring of steps)
+  ingredient postings sorted FAISS ids per ingredient token (CSR arrays)
+
+allowed() turns a query's filters into one bitset, which RecipeSearcher passes
+to FAISS as an IDSelectorBitmap, or uses to filter an iteratively deepened
+search. The index is built from the SQLite database once and cached as .npz
+next to it.
+"""
+import os
+import re
+import sqlite3
+import typing as t
+from functools import lru_cache
+
+import numpy as np
+
+DISH_TYPES = ("soup", "dessert", "salad", "pasta", "cake", "stew", "curry",
+              "rice", "pizza", "sandwich", "noodles", "beverage", "breakfast",
+              "side dish", "tacos", "stir fry")
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+
+def popcount(bits: np.ndarray) -> int:
+    return int(np.bitwise_count(bits).sum())
+
+
+def bits_contain(bits: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Bool array: is each FAISS id set in the packed (little-endian) bitset."""
+    ids = np.asarray(ids, dtype=np.int64)
+    return ((bits[ids >> 3] >> (ids & 7).astype(np.uint8)) & 1).astype(bool)
+
+
+def recipe_rows(recipe_ids: t.Sequence[int], sorted_ids: np.ndarray,
+                id_order: np.ndarray) -> t.Tuple[np.ndarray, np.ndarray]:
+    """(the recipe ids found in the idmap, their FAISS ids), in order.
+
+    sorted_ids and id_order are the idmap's recipe ids sorted, and the argsort that sorted them.
+    """
+    ids = np.asarray(recipe_ids, dtype=sorted_ids.dtype)
+    if not len(sorted_ids):
+        return ids[:0], np.empty(0, dtype=np.int64)
+    pos = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+    found = sorted_ids[pos] == ids
+    return ids[found], id_order[pos[found]].astype(np.int64)
+
+
+def _pack(n: int, rows: t.Iterable[int]) -> np.ndarray:
+    mask = np.zeros(n, dtype=bool)
+    mask[np.fromiter(rows, dtype=np.int64)] = True
+    return np.packbits(mask, bitorder="little")
+
+
+class FilterIndex:
+    def __init__(self, n: int, dish_bits: t.Dict[str, np.ndarray], vocab: np.ndarray,
+                 offsets: np.ndarray, postings: np.ndarray):
+        self.n = n
+        self.dish_bits = dish_bits
+        self.vocab = vocab  # sorted ingredient tokens
+        self.offsets = offsets  # postings of vocab[i] are postings[offsets[i]:offsets[i + 1]]
+        self.postings = postings
+        self.ingredient_bits = lru_cache(maxsize=4096)(self._ingredient_bits)
+
+    @classmethod
+    def build(cls, conn: sqlite3.Connection, recipe_ids: np.ndarray) -> "FilterIndex":
+        n = len(recipe_ids)
+        row_of = {rid: row for row, rid in enumerate(recipe_ids.tolist())}
+
+        dish_bits = {}
+        for dish in DISH_TYPES:
+            found = conn.execute("SELECT id FROM recipes WHERE instr(lower(steps), ?) > 0", (dish,))
+            dish_bits[dish] = _pack(n, (row_of[rid] for (rid,) in found if rid in row_of))
+
+        token_rows: t.Dict[str, t.List[int]] = {}
+        for rid, ingredients in conn.execute("SELECT id, ingredients FROM recipes"):
+            row = row_of.get(rid)
+            if row is None or not ingredients:
+                continue
+            for token in set(_TOKEN_RE.findall(ingredients.lower())):
+                token_rows.setdefault(token, []).append(row)
+        vocab = sorted(token_rows)
+        lengths = np.fromiter((len(token_rows[w]) for w in vocab), dtype=np.int64, count=len(vocab))
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        postings = np.fromiter((r for w in vocab for r in sorted(token_rows[w])), dtype=np.uint32,
+                               count=int(offsets[-1]))
+        return cls(n, dish_bits, np.array(vocab, dtype=str), offsets, postings)
+
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, n=np.int64(self.n), dish_names=np.array(list(self.dish_bits), dtype=str),
+                 dish_bits=np.stack(list(self.dish_bits.values())), vocab=self.vocab,
+                 offsets=self.offsets, postings=self.postings)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FilterIndex":
+        with np.load(path) as data:
+            dish_bits = dict(zip(data["dish_names"].tolist(), data["dish_bits"]))
+            return cls(int(data["n"]), dish_bits, data["vocab"], data["offsets"], data["postings"])
+
+    @classmethod
+    def open(cls, path: str, conn: sqlite3.Connection, recipe_ids: np.ndarray,
+             sources: t.Sequence[str] = ()) -> "FilterIndex":
+        """Cached index at `path`, rebuilt when missing, stale (older than a source file) or for another idmap."""
+        try:
+            if os.path.exists(path) and all(os.path.getmtime(path) >= os.path.getmtime(s) for s in sources):
+                index = cls.load(path)
+                if index.n == len(recipe_ids):
+                    return index
+        except Exception as e:
+            print(f"Failed to load filter index {path}: {e}")
+        print("Building dish-type/ingredient filter index ...")
+        index = cls.build(conn, recipe_ids)
+        try:
+            index.save(path)
+        except OSError as e:
+            print(f"Could not cache filter index: {e}")
+        return index
+
+    def _ingredient_bits(self, ingredient: str) -> np.ndarray:
+        # substring match against ingredient tokens, like `ingredient in ingredients.lower()`
+        matches = np.flatnonzero(np.char.find(self.vocab, ingredient.lower()) >= 0)
+        mask = np.zeros(self.n, dtype=bool)
+        for i in matches:
+            mask[self.postings[self.offsets[i]:self.offsets[i + 1]]] = True
+        return np.packbits(mask, bitorder="little")
+
+    def allowed(self, dish_type: t.Optional[str], ingredients: t.Sequence[str]) -> t.Optional[np.ndarray]:
+        """Packed bitset of FAISS ids passing the filters (any one ingredient is enough), or None without filters."""
+        bits = None
+        if dish_type:
+            bits = self.dish_bits.get(dish_type)
+            if bits is None:
+                return np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        if ingredients:
+            any_ing = np.bitwise_or.reduce([self.ingredient_bits(i) for i in dict.fromkeys(ingredients)])
+            bits = any_ing if bits is None else bits & any_ing
+        return bits
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Cost of turning FAISS hits into recipe rows as top_k grows: the old per-hit
+path (pandas idmap.iloc + one SELECT per hit on a shared connection) vs a
+NumPy id array + one batched query through RecipeStore.
+
+    python hydration_benchmark.py --top-k 5 10 20 50 100
+    python hydration_benchmark.py --db /data/recipes.sqlite --idmap /data/idmap.parquet --threads 4
+
+Without --db a synthetic database of --recipes rows is built in a temp dir.
+Each query hydrates 2*top_k random FAISS rows, as RecipeSearcher.search does.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from recipe_store import RECIPE_COLUMNS, RecipeStore
+
+
+def build_synthetic(path: str, n: int, seed: int) -> pd.DataFrame:
+    rng = random.Random(seed)
+    words = ["chicken", "rice", "garlic", "onion", "curry", "coconut", "lime", "chili", "butter", "flour"]
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE recipes ({', '.join(c + (' INTEGER PRIMARY KEY' if c == 'id' else ' TEXT') for c in RECIPE_COLUMNS)})")
+    ids = rng.sample(range(1, n * 10), n)
+
+    def text(k):
+        return " ".join(rng.choices(words, k=k))
+
+    conn.executemany(
+        f"INSERT INTO recipes VALUES ({','.join('?' * len(RECIPE_COLUMNS))})",
+        ((rid, text(3), text(30), text(12), text(80), text(6), "1 serving", "4", text(5)) for rid in ids),
+    )
+    conn.commit()
+    conn.close()
+    return pd.DataFrame({"recipe_id": ids})
+
+
+def old_hydrate(idmap: pd.DataFrame, conn: sqlite3.Connection, rows):
+    out = []
+    for idx in rows:
+        recipe_id = idmap.iloc[idx]["recipe_id"]
+        recipe = conn.execute(
+            f"SELECT {', '.join(RECIPE_COLUMNS)} FROM recipes WHERE id=?", (int(recipe_id),)
+        ).fetchone()
+        if recipe:
+            out.append(recipe)
+    return out
+
+
+def new_hydrate(recipe_ids: np.ndarray, store: RecipeStore, rows):
+    hit_ids = recipe_ids[rows].tolist()
+    recipes = store.fetch(hit_ids)
+    return [recipes[i] for i in hit_ids if i in recipes]
+
+
+def timed(fn, queries, threads: int) -> float:
+    start = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(fn, queries))
+    else:
+        for q in queries:
+            fn(q)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recipe hydration cost vs top_k")
+    parser.add_argument("--db", help="recipes.sqlite (default: synthetic)")
+    parser.add_argument("--idmap", help="idmap.parquet matching --db")
+    parser.add_argument("--recipes", type=int, default=200000, help="Rows in the synthetic database")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[5, 10, 20, 50, 100])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.db:
+        db_path, idmap = args.db, pd.read_parquet(args.idmap)
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp.name, "recipes.sqlite")
+        idmap = build_synthetic(db_path, args.recipes, args.seed)
+    recipe_ids = idmap["recipe_id"].to_numpy()
+    shared = sqlite3.connect(db_path, check_same_thread=False)
+    store = RecipeStore(db_path)
+
+    rng = np.random.default_rng(args.seed)
+    report = {"db": args.db or f"synthetic ({len(idmap)} recipes)", "threads": args.threads, "top_k": {}}
+    for top_k in args.top_k:
+        queries = [rng.integers(0, len(idmap), size=2 * top_k) for _ in range(args.queries)]
+        assert old_hydrate(idmap, shared, queries[0]) == new_hydrate(recipe_ids, store, queries[0])
+        old_s = timed(lambda q: old_hydrate(idmap, shared, q), queries, args.threads)
+        new_s = timed(lambda q: new_hydrate(recipe_ids, store, q), queries, args.threads)
+        report["top_k"][top_k] = {
+            "hits_per_query": 2 * top_k,
+            "old_ms_per_query": round(old_s / len(queries) * 1000, 3),
+            "new_ms_per_query": round(new_s / len(queries) * 1000, 3),
+            "speedup": round(old_s / max(new_s, 1e-9), 2),
+        }
+    store.close()
+    shared.close()
+    if tmp is not None:
+        tmp.cleanup()
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+SQLite FTS5 index over recipe name, ingredients, tags and search_terms, and
+reciprocal rank fusion of its results with the FAISS neighbours.
+
+Dense vectors alone miss recipes for ingredient-heavy queries ("chicken
+coconut lime"), so search also ranks recipes with BM25 over an external-
+content FTS5 table (porter stemming, so "tomato" matches "tomatoes") and
+fuses both lists with RRF: score = sum over lists of 1 / (RRF_K + rank).
+
+Build (or rebuild after the database changes) with:
+
+    python lexical_index.py /data/recipes.sqlite
+"""
+import argparse
+import os
+import re
+import sqlite3
+import time
+import typing as t
+
+FTS_TABLE = "recipes_fts"
+FTS_COLUMNS = ("name", "ingredients", "tags", "search_terms")
+BM25_WEIGHTS = (3.0, 2.0, 1.0, 1.0)  # per FTS_COLUMNS
+RRF_K = int(os.getenv("RECIPE_RRF_K", "60"))
+STOPWORDS = frozenset("""a an and are as at be best can do easy for from give good how i in is it make me my
+of on or please recipe recipes show some that the to want what with without you""".split())
+
+_TERM_RE = re.compile(r"[a-z0-9]+")
+
+
+def build(db_path: str) -> int:
+    """(Re)build the FTS5 table from the recipes table; returns the number of indexed recipes."""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        conn.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({', '.join(FTS_COLUMNS)}, "
+            f"content='recipes', content_rowid='id', tokenize='porter unicode61')"
+        )
+        conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
+        conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('optimize')")
+        conn.commit()
+        return conn.execute("SELECT count(*) FROM recipes").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def has_index(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name=?", (FTS_TABLE,)).fetchone() is not None
+
+
+def match_expression(query: str) -> t.Optional[str]:
+    """FTS5 MATCH expression: any of the query's non-stopword terms, each quoted."""
+    terms = [w for w in _TERM_RE.findall(query.lower()) if w not in STOPWORDS]
+    if not terms:
+        return None
+    return " OR ".join(f'"{w}"' for w in dict.fromkeys(terms))
+
+
+def search(conn: sqlite3.Connection, query: str, limit: int) -> t.List[int]:
+    """Recipe ids, best BM25 match first."""
+    expression = match_expression(query)
+    if expression is None or limit <= 0:
+        return []
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    rows = conn.execute(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT ?",
+        (expression, limit),
+    )
+    return [rowid for (rowid,) in rows]
+
+
+def reciprocal_rank_fusion(ranked_lists: t.Sequence[t.Sequence[int]], k: int = RRF_K) -> t.List[t.Tuple[int, float]]:
+    """(id, fused score) best first; ties keep first-seen order."""
+    scores: t.Dict[int, float] = {}
+    for ranked in ranked_lists:
+        for rank, item in enumerate(dict.fromkeys(ranked), start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the FTS5 recipe index used by hybrid search")
+    parser.add_argument("db", nargs="?", default=os.path.join(os.getenv("DATA_DIR", "/data"), "recipes.sqlite"))
+    args = parser.parse_args()
+    start = time.perf_counter()
+    count = build(args.db)
+    print(f"Indexed {count} recipes into {FTS_TABLE} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
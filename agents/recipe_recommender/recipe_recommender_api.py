@@ -55,7 +55,8 @@ class RecipeResult(BaseModel):
     serving_size: str
     servings: str
     search_terms: str
-    score: float
+    score: float  # FAISS distance to the query
+    rrf_score: Optional[float] = None  # fused FAISS + FTS5 rank score of hybrid search (higher is better)
 
 
 class RecipeQuery(BaseModel):
@@ -0,0 +1,84 @@
+"""
+Batched recipe hydration from the recipes SQLite database.
+
+RecipeSearcher.search used to resolve every FAISS hit with a pandas row lookup
+and one SELECT on a single shared connection (up to 2*top_k round-trips per
+query). RecipeStore fetches all hits with one `WHERE id IN (...)` query, on a
+read-only connection per thread with mmap and page-cache pragmas. It also
+serves BM25 lookups from the FTS5 table built by lexical_index.py.
+"""
+import os
+import sqlite3
+import threading
+import typing as t
+
+import lexical_index
+
+RECIPE_COLUMNS = ("id", "name", "description", "ingredients", "steps", "tags", "serving_size", "servings",
+                  "search_terms")
+DB_MMAP_MB = int(os.getenv("RECIPE_DB_MMAP_MB", "256"))
+DB_CACHE_MB = int(os.getenv("RECIPE_DB_CACHE_MB", "64"))
+SQLITE_MAX_VARIABLES = 999  # lowest default SQLITE_MAX_VARIABLE_NUMBER
+
+
+class RecipeStore:
+    def __init__(self, db_path: str, mmap_mb: int = DB_MMAP_MB, cache_mb: int = DB_CACHE_MB):
+        self.db_path = db_path
+        self.mmap_mb = mmap_mb
+        self.cache_mb = cache_mb
+        self._local = threading.local()
+        self._connections: t.List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._has_fts: t.Optional[bool] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute(f"PRAGMA mmap_size={self.mmap_mb * 1024 * 1024}")
+        conn.execute(f"PRAGMA cache_size=-{self.cache_mb * 1024}")  # negative: KiB
+        conn.execute("PRAGMA query_only=1")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's read-only connection (opened on first use)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def fetch(self, recipe_ids: t.Iterable[int]) -> t.Dict[int, tuple]:
+        """id -> row (RECIPE_COLUMNS) for every id found, in one query per SQLITE_MAX_VARIABLES ids."""
+        ids = list(dict.fromkeys(int(i) for i in recipe_ids))
+        conn = self.connection()
+        rows: t.Dict[int, tuple] = {}
+        for start in range(0, len(ids), SQLITE_MAX_VARIABLES):
+            chunk = ids[start:start + SQLITE_MAX_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            for row in conn.execute(
+                f"SELECT {', '.join(RECIPE_COLUMNS)} FROM recipes WHERE id IN ({placeholders})", chunk
+            ):
+                rows[row[0]] = row
+        return rows
+
+    @property
+    def has_fts(self) -> bool:
+        """Whether lexical_index.py has built the FTS5 table in this database."""
+        if self._has_fts is None:
+            self._has_fts = lexical_index.has_index(self.connection())
+        return self._has_fts
+
+    def lexical(self, query: str, limit: int) -> t.List[int]:
+        """Recipe ids matching the query's terms, best BM25 first ([] without an FTS index)."""
+        if not self.has_fts:
+            return []
+        return lexical_index.search(self.connection(), query, limit)
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
@@ -1,6 +1,5 @@
 import faiss
 import pandas as pd
-import sqlite3
 from sentence_transformers import SentenceTransformer
 import spacy
 import numpy as np
@@ -13,6 +12,16 @@ try:
 except Exception:  # torch may not be installed with CUDA; handle gracefully
     torch = None
 
+from filter_index import DISH_TYPES, FilterIndex, bits_contain, popcount, recipe_rows
+from lexical_index import reciprocal_rank_fusion
+from recipe_store import RecipeStore
+
+# Filtered searches matching at most this many recipes are ranked exactly when the index comes up short
+FILTER_EXACT_MAX = int(os.getenv("RECIPE_FILTER_EXACT_MAX", "20000"))
+# Hybrid retrieval: FAISS and FTS5 (see lexical_index.py) candidates per list, fused by reciprocal rank
+HYBRID_SEARCH = os.getenv("RECIPE_HYBRID_SEARCH", "1") == "1"
+HYBRID_DEPTH = int(os.getenv("RECIPE_HYBRID_DEPTH", "50"))
+
 # Global SpaCy model reference (initialized in RecipeSearcher._init_) so we can prefer GPU
 nlp = None
 
@@ -26,17 +35,14 @@ def extract_ingredients(text: str) -> t.List[str]:
     return [token.lemma_ for token in doc if token.pos_ in ("NOUN", "PROPN")]
 
 def detect_dish_type(text: str) -> t.Optional[str]:
-    categories = ["soup", "dessert", "salad", "pasta", "cake", "stew", "curry",
-                  "rice", "pizza", "sandwich", "noodles", "beverage", "breakfast",
-                  "side dish", "tacos", "stir fry"]
-    for cat in categories:
+    for cat in DISH_TYPES:
         if cat in text.lower():
             return cat
     return None
 
 
 class RecipeSearcher:
-    def __init__(self, index_path: str, idmap_path: str, db_path: str):
+    def __init__(self, index_path: str, idmap_path: str, db_path: str, filters_path: t.Optional[str] = None):
         # Enhanced GPU detection and configuration
         self.torch_device = self._detect_torch_device()
         self.faiss_device = self._detect_faiss_device()
@@ -55,7 +61,16 @@ class RecipeSearcher:
         self.index_path = index_path  # Store for potential fallback
         self.index = faiss.read_index(index_path)
         self.idmap = pd.read_parquet(idmap_path)
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # FAISS row -> recipe id, indexed with a whole array of hits at once
+        self.recipe_ids = self.idmap["recipe_id"].to_numpy()
+        # recipe id -> FAISS row through a sorted copy (for filtering lexical hits)
+        self._id_order = np.argsort(self.recipe_ids, kind="stable")
+        self._sorted_ids = self.recipe_ids[self._id_order]
+        # read-only SQLite connection per thread; hits are fetched in one batched query
+        self.store = RecipeStore(db_path)
+        # dish-type / ingredient bitsets over FAISS ids, applied inside the search
+        self.filters = self._load_filters(filters_path or os.path.splitext(db_path)[0] + ".filters.npz",
+                                          [db_path, idmap_path])
 
         # Move FAISS index to GPU with better error handling
         self._configure_faiss_gpu()
@@ -63,6 +78,14 @@ class RecipeSearcher:
         # Load embedding model with explicit device and memory optimization
         self.model = self._load_embedding_model()
     
+    def _load_filters(self, path: str, sources: t.List[str]) -> t.Optional[FilterIndex]:
+        """Filter index cached next to the database; without it search falls back to post-filtering rows."""
+        try:
+            return FilterIndex.open(path, self.store.connection(), self.recipe_ids, sources)
+        except Exception as e:
+            print(f"Filter index unavailable, post-filtering search hits instead: {e}")
+            return None
+
     def _detect_torch_device(self) -> str:
         """Detect the best available PyTorch device"""
         if torch is None:
@@ -180,6 +203,8 @@ class RecipeSearcher:
             "torch_device": self.torch_device,
             "faiss_device": self.faiss_device,
             "spacy_loaded": nlp is not None,
+            "filter_index": self.filters is not None,
+            "hybrid_search": HYBRID_SEARCH and self.store.has_fts,
         }
         
         # Add GPU memory information if available
@@ -223,6 +248,125 @@ class RecipeSearcher:
                 return {"error": "Could not retrieve GPU info"}
         return {"error": "GPU not available"}
 
+    def _faiss_search(self, query_vec: np.ndarray, k: int, params=None):
+        try:
+            return self.index.search(query_vec, k, params=params)
+        except Exception as e:
+            print(f"FAISS search failed: {e}")
+            # Fallback to CPU search if GPU search fails
+            if self.faiss_device == "gpu":
+                self.faiss_device = "cpu"
+                # Recreate index on CPU
+                self.index = faiss.read_index(self.index_path)
+                return self.index.search(query_vec, k, params=params)
+            raise
+
+    def _selector_params(self, allowed: np.ndarray):
+        """FAISS search parameters restricting results to the ids set in `allowed` (CPU indexes only)."""
+        if self.faiss_device != "cpu":
+            return None
+        selector = faiss.IDSelectorBitmap(allowed)
+        if isinstance(self.index, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.index.nprobe)
+        return faiss.SearchParameters(sel=selector)
+
+    def _reconstruct(self, ids: np.ndarray) -> np.ndarray:
+        try:
+            return self.index.reconstruct_batch(ids)
+        except RuntimeError:
+            # IVF indexes need a direct map (id -> list offset) to reconstruct
+            faiss.extract_index_ivf(self.index).make_direct_map()
+            return self.index.reconstruct_batch(ids)
+
+    def _exact_search(self, query_vec: np.ndarray, top_k: int, allowed: np.ndarray):
+        """Brute-force ranking of the allowed ids, from vectors reconstructed out of the index."""
+        ids = np.flatnonzero(np.unpackbits(allowed, count=self.index.ntotal, bitorder="little"))
+        vectors = self._reconstruct(ids)
+        distances, rows = faiss.knn(query_vec, vectors, min(top_k, len(ids)), metric=self.index.metric_type)
+        return distances, ids[rows]
+
+    def _distances(self, query_vec: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        """The query's FAISS distance to each of the given FAISS ids, in order."""
+        distances, rows = faiss.knn(query_vec, self._reconstruct(ids), len(ids), metric=self.index.metric_type)
+        out = np.empty(len(ids), dtype="float32")
+        out[rows[0]] = distances[0]
+        return out
+
+    def _filtered_search(self, query_vec: np.ndarray, top_k: int, allowed: t.Optional[np.ndarray]):
+        """(distances, indices) of up to top_k neighbours whose ids are set in `allowed`.
+
+        Tries an ID-selector search first. Approximate indexes (HNSW, IVF) can
+        come up short on selective filters; then up to FILTER_EXACT_MAX allowed
+        ids are ranked exactly. Otherwise (or when the index cannot take a
+        selector or reconstruct vectors), k grows 4x per round over an
+        unfiltered search until top_k matches are found or the whole index has
+        been ranked.
+        """
+        if allowed is None:
+            return self._faiss_search(query_vec, top_k)
+        n_allowed = popcount(allowed)
+        want = min(top_k, n_allowed)
+        empty = (np.empty((1, 0), dtype="float32"), np.empty((1, 0), dtype="int64"))
+        if want == 0:
+            return empty
+
+        try:
+            params = self._selector_params(allowed)
+        except Exception:
+            params = None
+        if params is not None:
+            try:
+                distances, indices = self.index.search(query_vec, top_k, params=params)
+                if int((indices[0] != -1).sum()) >= want:
+                    return distances, indices
+            except Exception as e:
+                print(f"Filtered FAISS search failed: {e}")
+
+        if n_allowed <= FILTER_EXACT_MAX:
+            try:
+                return self._exact_search(query_vec, top_k, allowed)
+            except Exception as e:
+                print(f"Exact filtered search failed, deepening instead: {e}")
+
+        ntotal = self.index.ntotal
+        k = min(top_k * 2, ntotal)
+        while True:
+            distances, indices = self._faiss_search(query_vec, k)
+            keep = indices[0] != -1
+            keep[keep] = bits_contain(allowed, indices[0][keep])
+            if int(keep.sum()) >= want or k >= ntotal:
+                return distances[:, keep][:, :top_k], indices[:, keep][:, :top_k]
+            k = min(k * 4, ntotal)
+
+    def _hybrid_search(self, query: str, query_vec: np.ndarray, top_k: int, allowed: t.Optional[np.ndarray]):
+        """(recipe ids, FAISS distances, fused RRF scores) from the FAISS and FTS5 candidate lists.
+
+        Hits are in RRF order. Lexical-only hits get their distance from the reconstructed
+        vectors, so every hit's distance means the same as in a dense-only search.
+        """
+        depth = max(HYBRID_DEPTH, top_k)
+        distances, indices = self._filtered_search(query_vec, depth, allowed)
+        hits = indices[0] != -1
+        vector_ids = self.recipe_ids[indices[0][hits]].tolist()
+        distance_of = dict(zip(vector_ids, distances[0][hits].tolist()))
+        # filters are checked after the FTS lookup, so ask it for more candidates
+        lexical_ids, rows = recipe_rows(self.store.lexical(query, depth if allowed is None else depth * 4),
+                                        self._sorted_ids, self._id_order)
+        if allowed is not None:
+            keep = bits_contain(allowed, rows)
+            lexical_ids, rows = lexical_ids[keep][:depth], rows[keep][:depth]
+        lexical_only = np.array([rid not in distance_of for rid in lexical_ids.tolist()], dtype=bool)
+        if lexical_only.any():
+            try:
+                distance_of.update(zip(lexical_ids[lexical_only].tolist(),
+                                       self._distances(query_vec, rows[lexical_only]).tolist()))
+            except Exception as e:
+                print(f"Could not score lexical hits, keeping the FAISS ones only: {e}")
+                lexical_ids = lexical_ids[~lexical_only]
+        fused = reciprocal_rank_fusion([vector_ids, lexical_ids.tolist()])[:top_k]
+        return ([recipe_id for recipe_id, _ in fused], [distance_of[recipe_id] for recipe_id, _ in fused],
+                [rrf for _, rrf in fused])
+
     def search(self, query: str, top_k: int = 5):
         # Extract extra filters
         ingredients = extract_ingredients(query)
@@ -253,33 +397,32 @@ class RecipeSearcher:
                 query_vec = np.array(query_vec)
             query_vec = query_vec.astype("float32", copy=False)
 
-        # Search FAISS (request more results to allow post-filtering)
-        try:
-            distances, indices = self.index.search(query_vec, top_k * 2)
-        except Exception as e:
-            print(f"FAISS search failed: {e}")
-            # Fallback to CPU search if GPU search fails
-            if self.faiss_device == "gpu":
-                self.faiss_device = "cpu"
-                # Recreate index on CPU
-                self.index = faiss.read_index(self.index_path)
-                distances, indices = self.index.search(query_vec, top_k * 2)
-        
+        allowed = None
+        if self.filters is not None:
+            # filters are applied inside the search, so every hit already passes them
+            allowed = self.filters.allowed(dish_type, ingredients)
+            dish_type, ingredients = None, []
+
+        # score stays the FAISS distance; hybrid hits come in RRF order and carry rrf_score
+        rrf_scores: t.List[t.Optional[float]] = []
+        if HYBRID_SEARCH and self.store.has_fts:
+            hit_ids, scores, rrf_scores = self._hybrid_search(query, query_vec, top_k, allowed)
+        else:
+            if self.filters is not None:
+                distances, indices = self._filtered_search(query_vec, top_k, allowed)
+            else:
+                # Search FAISS (request more results to allow post-filtering)
+                distances, indices = self._faiss_search(query_vec, top_k * 2)
+            hits = indices[0] != -1
+            hit_ids, scores = self.recipe_ids[indices[0][hits]].tolist(), distances[0][hits]
+
         results = []
 
-        for idx, score in zip(indices[0], distances[0]):
-            if idx == -1:
-                continue
+        recipes = self.store.fetch(hit_ids)
 
-            recipe_id = self.idmap.iloc[idx]["recipe_id"]
-            recipe = self.conn.execute(
-                """
-                SELECT id, name, description, ingredients, steps, tags, serving_size, servings, search_terms
-                FROM recipes
-                WHERE id=?
-                """,
-                (recipe_id,)
-            ).fetchone()
+        rrf_scores = rrf_scores or [None] * len(hit_ids)
+        for recipe_id, score, rrf_score in zip(hit_ids, scores, rrf_scores):
+            recipe = recipes.get(recipe_id)
 
             if recipe:
                 # Convert columns to safe strings
@@ -305,7 +448,8 @@ class RecipeSearcher:
                     "serving_size": recipe_safe[6],
                     "servings": recipe_safe[7],
                     "search_terms": recipe_safe[8],
-                    "score": float(score)
+                    "score": float(score),
+                    "rrf_score": rrf_score,
                 })
 
             if len(results) >= top_k:
@@ -0,0 +1,71 @@
+import sqlite3
+
+import numpy as np
+
+import lexical_index
+from filter_index import FilterIndex, bits_contain, popcount, recipe_rows
+
+# FAISS id -> recipe id; not in recipe id order, and recipe 40 is not in the index
+IDMAP = np.array([50, 10, 30, 20], dtype=np.int64)
+
+
+def build(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return FilterIndex.build(conn, IDMAP)
+    finally:
+        conn.close()
+
+
+def allowed_recipes(bits):
+    return set(IDMAP[np.flatnonzero(bits_contain(bits, np.arange(len(IDMAP))))].tolist())
+
+
+def test_bits_contain_reads_packed_bits():
+    bits = np.packbits(np.array([0, 1, 0, 0, 0, 0, 0, 0, 1], dtype=bool), bitorder="little")
+    assert bits_contain(bits, np.array([0, 1, 8])).tolist() == [False, True, True]
+    assert popcount(bits) == 2
+
+
+def test_allowed_combines_dish_type_and_ingredients(recipe_db):
+    index = build(recipe_db)
+    assert index.allowed(None, []) is None
+    assert allowed_recipes(index.allowed("soup", [])) == {10, 50}
+    assert allowed_recipes(index.allowed("soup", ["chicken"])) == {50}
+    # any one ingredient is enough; substring of an ingredient token
+    assert allowed_recipes(index.allowed(None, ["lime", "tomato"])) == {10, 20, 30}
+    assert allowed_recipes(index.allowed("pizza", [])) == set()
+
+
+def test_save_and_load_round_trip(recipe_db, tmp_path):
+    index = build(recipe_db)
+    path = str(tmp_path / "filters.npz")
+    index.save(path)
+    loaded = FilterIndex.load(path)
+    assert loaded.n == index.n
+    assert np.array_equal(loaded.allowed("cake", ["lime"]), index.allowed("cake", ["lime"]))
+
+
+def test_recipe_rows_maps_ids_to_faiss_ids():
+    order = np.argsort(IDMAP, kind="stable")
+    ids, rows = recipe_rows([20, 40, 50, 10], IDMAP[order], order)
+    assert ids.tolist() == [20, 50, 10]
+    assert rows.tolist() == [3, 0, 1]
+    ids, rows = recipe_rows([], IDMAP[order], order)
+    assert len(ids) == len(rows) == 0
+
+
+def test_fts_hits_are_checked_against_the_bitset(recipe_db):
+    index = build(recipe_db)
+    lexical_index.build(recipe_db)
+    conn = sqlite3.connect(recipe_db)
+    hits = lexical_index.search(conn, "chicken coconut lime", 10)
+    conn.close()
+    assert 40 in hits  # matches, but has no FAISS id
+
+    order = np.argsort(IDMAP, kind="stable")
+    ids, rows = recipe_rows(hits, IDMAP[order], order)
+    kept = ids[bits_contain(index.allowed("soup", []), rows)].tolist()
+    assert kept == [50]
+    kept = ids[bits_contain(index.allowed(None, ["lime"]), rows)].tolist()
+    assert kept == [h for h in hits if h in (20, 30)]
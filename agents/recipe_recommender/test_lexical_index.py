@@ -0,0 +1,41 @@
+import sqlite3
+
+import pytest
+
+import lexical_index
+from lexical_index import match_expression, reciprocal_rank_fusion
+
+
+def test_match_expression_drops_stopwords_and_repeats():
+    assert match_expression("Show me a recipe with chicken and CHICKEN lime") == '"chicken" OR "lime"'
+    assert match_expression("what can I make") is None
+
+
+def test_fusion_scores_sum_over_lists():
+    fused = dict(reciprocal_rank_fusion([[1, 2, 3], [3, 4]], k=60))
+    assert fused[1] == pytest.approx(1 / 61)
+    assert fused[3] == pytest.approx(1 / 63 + 1 / 61)
+    assert fused[4] == pytest.approx(1 / 62)
+    assert max(fused, key=fused.get) == 3
+
+
+def test_fusion_ties_keep_first_seen_order_and_ignore_repeats():
+    fused = reciprocal_rank_fusion([[7, 7, 8], [8, 7]], k=0)
+    # 7: 1/1 + 1/2, 8: 1/2 + 1/1; the repeated 7 does not take rank 2
+    assert [item for item, _ in fused] == [7, 8]
+    assert fused[0][1] == fused[1][1] == pytest.approx(1.5)
+    assert reciprocal_rank_fusion([[], []]) == []
+
+
+def test_search_ranks_stemmed_matches(recipe_db):
+    assert lexical_index.build(recipe_db) == 5
+    conn = sqlite3.connect(recipe_db)
+    assert lexical_index.has_index(conn)
+    # porter stemming: "tomato" matches "tomatoes"
+    assert lexical_index.search(conn, "tomato", 10) == [10]
+    hits = lexical_index.search(conn, "chicken coconut lime", 10)
+    # the recipe with all three terms comes first
+    assert hits[0] == 20 and set(hits) == {20, 30, 40, 50}
+    assert lexical_index.search(conn, "chicken", 1) == lexical_index.search(conn, "chicken", 10)[:1]
+    assert lexical_index.search(conn, "the", 10) == []
+    conn.close()
@@ -0,0 +1,44 @@
+import sqlite3
+
+import pytest
+
+import lexical_index
+from conftest import make_db
+from recipe_store import SQLITE_MAX_VARIABLES, RecipeStore
+
+
+def test_fetch_returns_found_rows(recipe_db):
+    store = RecipeStore(recipe_db)
+    rows = store.fetch([30, 99, 10, 30])
+    assert set(rows) == {10, 30}
+    assert rows[30][1] == "Lime cake"
+    assert store.fetch([]) == {}
+    store.close()
+
+
+def test_fetch_splits_long_id_lists(tmp_path):
+    recipes = [(i, f"Recipe {i}", "salt", "Mix.", "") for i in range(1, SQLITE_MAX_VARIABLES * 2 + 10)]
+    store = RecipeStore(make_db(str(tmp_path / "many.sqlite"), recipes))
+    ids = list(range(1, SQLITE_MAX_VARIABLES * 2 + 10))
+    assert set(store.fetch(ids)) == set(ids)
+    store.close()
+
+
+def test_connection_is_read_only(recipe_db):
+    store = RecipeStore(recipe_db)
+    with pytest.raises(sqlite3.OperationalError):
+        store.connection().execute("DELETE FROM recipes")
+    store.close()
+
+
+def test_lexical_needs_the_fts_index(recipe_db):
+    store = RecipeStore(recipe_db)
+    assert not store.has_fts
+    assert store.lexical("chicken", 10) == []
+    store.close()
+
+    lexical_index.build(recipe_db)
+    store = RecipeStore(recipe_db)
+    assert store.has_fts
+    assert set(store.lexical("chicken", 10)) == {20, 50}
+    store.close()
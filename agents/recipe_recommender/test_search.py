@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+faiss = pytest.importorskip("faiss")
+
+import lexical_index
+import search
+from filter_index import FilterIndex
+from recipe_store import RecipeStore
+
+IDMAP = np.array([50, 10, 30, 20, 40], dtype=np.int64)
+
+
+def searcher(db_path, vectors):
+    """A RecipeSearcher over a flat index of the given vectors, without the models."""
+    s = search.RecipeSearcher.__new__(search.RecipeSearcher)
+    s.faiss_device = "cpu"
+    s.index = faiss.IndexFlatL2(vectors.shape[1])
+    s.index.add(vectors)
+    s.recipe_ids = IDMAP
+    s._id_order = np.argsort(IDMAP, kind="stable")
+    s._sorted_ids = IDMAP[s._id_order]
+    s.store = RecipeStore(db_path)
+    s.filters = FilterIndex.build(s.store.connection(), IDMAP)
+    return s
+
+
+@pytest.fixture
+def hybrid(recipe_db, monkeypatch):
+    lexical_index.build(recipe_db)
+    monkeypatch.setattr(search, "HYBRID_DEPTH", 2)
+    # FAISS rows 0..4 at distance 0, 1, 4, 9, 16 from the query
+    vectors = np.array([[0.0, 0.0], [1.0, 0.0], [2.0, 0.0], [3.0, 0.0], [4.0, 0.0]], dtype="float32")
+    s = searcher(recipe_db, vectors)
+    yield s
+    s.store.close()
+
+
+def test_score_stays_the_faiss_distance(hybrid):
+    query_vec = np.zeros((1, 2), dtype="float32")
+    ids, distances, rrf = hybrid._hybrid_search("coconut rice", query_vec, 3, None)
+    # FAISS: 50, 10; FTS: 40 (both terms), 20 (coconut)
+    # the two first-ranked hits tie and keep first-seen order
+    assert ids == [50, 40, 10]
+    distance_of = dict(zip(ids, distances))
+    # the lexical-only hits get their exact distance, not a rank score
+    assert distance_of[40] == pytest.approx(16.0)
+    assert distance_of[50] == pytest.approx(0.0)
+    assert rrf == sorted(rrf, reverse=True)
+    fused = dict(lexical_index.reciprocal_rank_fusion([[50, 10], [40, 20]]))
+    assert rrf == [pytest.approx(fused[i]) for i in ids]
+
+
+def test_fts_hits_outside_the_filter_are_dropped(hybrid):
+    query_vec = np.zeros((1, 2), dtype="float32")
+    allowed = hybrid.filters.allowed("curry", [])
+    ids, distances, _ = hybrid._hybrid_search("coconut", query_vec, 5, allowed)
+    # 40 matches "coconut" but is no curry
+    assert ids == [20]
+    assert distances == [pytest.approx(9.0)]
@@ -0,0 +1,237 @@
+"""
+Memory-bounded per-user feedback boosts.
+
+The boosts used to be nested dicts (user -> word -> count) that grew with
+every user and every accepted suggestion. BoostTable keeps one packed bytes
+value per user: 12 bytes per entry (interned word id uint32, score float32,
+last update uint32 seconds). Words are interned once and shared by all users.
+
+Recency is tracked with two generations instead of a linked list: used users
+sit in `hot`. When entries must be evicted, `hot` becomes `cold` and cold
+users are dropped oldest first, unless they are used again first.
+
+Bounds:
+  SPELL_BOOST_MAX_PER_USER  entries per user; the entry with the lowest
+                            decayed score makes room for a new one
+  SPELL_BOOST_MAX_ENTRIES   total entries; users not used since the last
+                            generation swap are evicted first
+  SPELL_BOOST_HALF_LIFE_DAYS  scores halve over this period (0 disables decay)
+"""
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+BOOST_MAX_ENTRIES = int(os.getenv("SPELL_BOOST_MAX_ENTRIES", "1000000"))
+BOOST_MAX_PER_USER = int(os.getenv("SPELL_BOOST_MAX_PER_USER", "64"))
+BOOST_HALF_LIFE_DAYS = float(os.getenv("SPELL_BOOST_HALF_LIFE_DAYS", "30"))
+
+
+def decayed(score: float, stamp: float, now: float, half_life_s: float) -> float:
+    if half_life_s <= 0 or now <= stamp:
+        return score
+    return score * 0.5 ** ((now - stamp) / half_life_s)
+
+
+ENTRY = struct.Struct("<IfI")  # word id, score, last update (unix seconds)
+
+
+def _unpack(data: bytes) -> List[List[Any]]:
+    return [list(e) for e in ENTRY.iter_unpack(data)]
+
+
+def _pack(entries: List[List[Any]]) -> bytes:
+    return b"".join(ENTRY.pack(*e) for e in entries)
+
+
+class BoostTable:
+    def __init__(self, max_entries: int = BOOST_MAX_ENTRIES, max_per_user: int = BOOST_MAX_PER_USER,
+                 half_life_days: float = BOOST_HALF_LIFE_DAYS):
+        self.max_entries = max_entries
+        self.max_per_user = max_per_user
+        self.half_life_s = half_life_days * 86400.0
+        self._hot: Dict[str, bytes] = {}
+        self._cold: Dict[str, bytes] = {}
+        self._cold_order: List[str] = []  # cold users, most recently used first (eviction pops the end)
+        self._word_ids: Dict[str, int] = {}
+        self._words: List[Optional[str]] = []
+        self._refs = array("I")
+        self._free: List[int] = []
+        self._lock = threading.Lock()
+        self.entries = 0
+        self.evicted_users = 0
+        self.evicted_entries = 0
+        # user keys, packed values and interned words; container overhead is added in memory_bytes()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._hot) + len(self._cold)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._hot or user_id in self._cold
+
+    def _intern(self, word: str) -> int:
+        wid = self._word_ids.get(word)
+        if wid is None:
+            if self._free:
+                wid = self._free.pop()
+                self._words[wid] = word
+                self._refs[wid] = 0
+            else:
+                wid = len(self._words)
+                self._words.append(word)
+                self._refs.append(0)
+            self._word_ids[word] = wid
+            self._bytes += sys.getsizeof(word)
+        self._refs[wid] += 1
+        return wid
+
+    def _release(self, wid: int) -> None:
+        self._refs[wid] -= 1
+        if self._refs[wid] == 0:
+            word = self._words[wid]
+            del self._word_ids[word]
+            self._words[wid] = None
+            self._free.append(wid)
+            self._bytes -= sys.getsizeof(word)
+
+    def _take(self, user_id: str) -> List[List[Any]]:
+        """Remove a user's packed row (callers store it back into `hot`)."""
+        data = self._hot.pop(user_id, None)
+        if data is None:
+            data = self._cold.pop(user_id, None)
+        if data is None:
+            return []
+        self._bytes -= sys.getsizeof(user_id) + sys.getsizeof(data)
+        return _unpack(data)
+
+    def _store(self, user_id: str, entries: List[List[Any]]) -> None:
+        data = _pack(entries)
+        self._hot[user_id] = data
+        self._bytes += sys.getsizeof(user_id) + sys.getsizeof(data)
+
+    def _drop_entries(self, entries: List[List[Any]]) -> None:
+        for wid, _, _ in entries:
+            self._release(wid)
+        self.entries -= len(entries)
+        self.evicted_entries += len(entries)
+
+    def _evict(self) -> None:
+        while self.entries > self.max_entries:
+            if not self._cold_order:
+                if len(self._hot) <= 1:
+                    return
+                # swap generations; dict order is insertion order, so the end of the list is the oldest user
+                self._cold, self._hot = self._hot, {}
+                self._cold_order = list(self._cold)[::-1]
+                continue
+            user_id = self._cold_order.pop()
+            if user_id not in self._cold:
+                continue  # used again since the swap
+            self._drop_entries(self._take(user_id))
+            self.evicted_users += 1
+        if not self._cold:
+            self._cold_order = []
+
+    def _put(self, entries: List[List[Any]], word: str, score: float, stamp: int, now: float) -> None:
+        wid = self._word_ids.get(word)
+        if wid is not None:
+            for e in entries:
+                if e[0] == wid:
+                    e[1] = decayed(e[1], e[2], now, self.half_life_s) + score
+                    e[2] = stamp
+                    return
+        if len(entries) >= self.max_per_user:
+            # replace the weakest entry (lowest decayed score)
+            weakest = min(entries, key=lambda e: decayed(e[1], e[2], now, self.half_life_s))
+            self._release(weakest[0])
+            weakest[:] = [self._intern(word), score, stamp]
+            self.evicted_entries += 1
+            return
+        entries.append([self._intern(word), score, stamp])
+        self.entries += 1
+
+    def add(self, user_id: str, word: str, amount: float = 1.0, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            entries = self._take(user_id)
+            self._put(entries, word, amount, int(now), now)
+            self._store(user_id, entries)
+            self._evict()
+
+    def set_user(self, user_id: str, items: Iterable[Tuple[str, float, float]], now: Optional[float] = None) -> None:
+        """Replace a user's entries with (word, score, stamp) items, keeping the strongest max_per_user.
+
+        A user without items is removed: empty rows hold no entries, so eviction would never drop them.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            old = self._take(user_id)
+            self._drop_entries(old)
+            self.evicted_entries -= len(old)
+            entries: List[List[Any]] = []
+            for word, score, stamp in items:
+                self._put(entries, word, score, int(stamp), now)
+            if entries:
+                self._store(user_id, entries)
+                self._evict()
+
+    def get(self, user_id: str, now: Optional[float] = None) -> Dict[str, float]:
+        """Decayed scores for one user (and marks the user as recently used)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            data = self._hot.get(user_id)
+            if data is None:
+                data = self._cold.pop(user_id, None)
+                if data is None:
+                    return {}
+                self._hot[user_id] = data
+            return {self._words[wid]: decayed(s, t, now, self.half_life_s) for wid, s, t in ENTRY.iter_unpack(data)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hot.clear()
+            self._cold.clear()
+            self._cold_order = []
+            self._word_ids.clear()
+            self._words.clear()
+            self._refs = array("I")
+            self._free.clear()
+            self.entries = 0
+            self._bytes = 0
+
+    def to_dict(self, now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """Decayed scores as of `now`, cold users first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            return {
+                user_id: {self._words[wid]: round(decayed(s, t, now, self.half_life_s), 4)
+                          for wid, s, t in ENTRY.iter_unpack(data)}
+                for rows in (self._cold, self._hot) for user_id, data in rows.items()
+            }
+
+    def load(self, boosts: Dict[str, Dict[str, float]], at: float) -> None:
+        """Inverse of to_dict: scores were decayed up to `at` and keep decaying from there."""
+        for user_id, words in boosts.items():
+            self.set_user(user_id, ((w, s, at) for w, s in words.items()))
+
+    def memory_bytes(self) -> int:
+        containers = (self._hot, self._cold, self._cold_order, self._word_ids, self._words, self._refs, self._free)
+        return self._bytes + sum(sys.getsizeof(c) for c in containers)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "users": len(self._hot) + len(self._cold),
+                "entries": self.entries,
+                "words": len(self._word_ids),
+                "memory_bytes": self.memory_bytes(),
+                "max_entries": self.max_entries,
+                "max_per_user": self.max_per_user,
+                "half_life_days": self.half_life_s / 86400.0,
+                "evicted_users": self.evicted_users,
+                "evicted_entries": self.evicted_entries,
+            }
@@ -1,9 +1,33 @@
-import pandas as pd
-import re
+"""
+Build the spell agent's domain vocabulary from recipe CSV dumps.
+
+    python build_domain_vocab.py                      # CSV_FILES below
+    python build_domain_vocab.py dump1.csv dump2.csv --workers 4
+
+CSVs are streamed in chunks of CHUNK_ROWS rows, so memory stays bounded on
+multi-GB dumps. Each chunk is joined into one string and tokenized with a
+single regex pass in a worker process; the main process only parses CSV and
+merges the counts. When the number of distinct terms passes MAX_TERMS, the
+rarest terms are dropped (and the cut-off is printed).
+
+Outputs:
+  domain_vocab.pkl                   Counter of term frequencies
+  domain_vocab.idx                   memory-mapped artifact (sorted vocab + frequencies + fuzzy index)
+  domain_frequency_dictionary.txt    "term count" lines, loaded into SymSpell by spell_api
+  domain_vocab_embeddings.pt         word embeddings; words already in the previous file are not re-encoded
+"""
+import argparse
 import os
 import pickle
+import re
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
 from tqdm import tqdm
-import torch
+
+from fuzzy_index import DeleteIndex
 
 # ===== CONFIG =====
 CSV_FILES = [
@@ -11,54 +35,149 @@ CSV_FILES = [
     "recipes.csv"
 ]
 OUTPUT_PKL = "domain_vocab.pkl"
-USE_GPU = torch.cuda.is_available()
-DEVICE = "cuda" if USE_GPU else "cpu"
+OUTPUT_INDEX = "domain_vocab.idx"  # memory-mapped by spell_api at startup
+OUTPUT_SYMSPELL = "domain_frequency_dictionary.txt"
+OUTPUT_EMBEDDINGS = "domain_vocab_embeddings.pt"
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+CHUNK_ROWS = 20000
+MAX_TERMS = 2_000_000
+SYMSPELL_MIN_COUNT = 5  # rarer terms are mostly typos; keep them out of SymSpell's dictionary
+
+WORD_RE = re.compile(r"[a-z]+")
+
 
 # ===== FUNCTION TO CLEAN & TOKENIZE =====
 def tokenize_text(text: str) -> list[str]:
     """Extract lowercase alphabetic words from text"""
     if not isinstance(text, str):
         return []
-    return re.findall(r"[A-Za-z]+", text.lower())
+    return WORD_RE.findall(text.lower())
+
+
+def count_tokens(text: str) -> Counter:
+    """Term counts of a chunk of cells joined by newlines (runs in a worker process)."""
+    return Counter(tokenize_text(text))
+
+
+def chunk_texts(csv_file: str, chunk_rows: int):
+    """One newline-joined string of every non-empty cell per chunk of rows."""
+    for chunk in pd.read_csv(csv_file, chunksize=chunk_rows, dtype=str):
+        cells = chunk.stack().dropna()
+        yield len(chunk), "\n".join(cells.tolist())
+
+
+def prune(term_counts: Counter, max_terms: int, floor: int) -> int:
+    """Drop terms seen fewer than `floor` times until at most max_terms remain; returns the new floor."""
+    while len(term_counts) > max_terms:
+        floor += 1
+        for word in [w for w, c in term_counts.items() if c < floor]:
+            del term_counts[word]
+    return floor
+
 
 # ===== BUILD VOCAB =====
-domain_vocab = set()
+def build_counts(csv_files, workers: int, chunk_rows: int = CHUNK_ROWS, max_terms: int = MAX_TERMS) -> Counter:
+    term_counts = Counter()
+    floor = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for csv_file in csv_files:
+            print(f"Processing {csv_file} ...")
+            pending = deque()  # at most 2 chunks per worker in flight keeps memory bounded
+            with tqdm(desc=os.path.basename(csv_file), unit="row") as bar:
+                for rows, text in chunk_texts(csv_file, chunk_rows):
+                    pending.append((rows, pool.submit(count_tokens, text)))
+                    while len(pending) >= 2 * workers:
+                        done_rows, future = pending.popleft()
+                        term_counts.update(future.result())
+                        bar.update(done_rows)
+                    floor = prune(term_counts, max_terms, floor)
+                while pending:
+                    done_rows, future = pending.popleft()
+                    term_counts.update(future.result())
+                    bar.update(done_rows)
+            floor = prune(term_counts, max_terms, floor)
+    if floor:
+        print(f"Kept the {len(term_counts)} most frequent terms (dropped terms seen fewer than {floor} times)")
+    return term_counts
 
-for csv_file in CSV_FILES:
-    print(f"Processing {csv_file} ...")
-    df = pd.read_csv(csv_file)
-    
-    for col in tqdm(df.columns, desc="Columns", unit="col"):
-        for val in tqdm(df[col].dropna().astype(str), desc=f"Rows in {col}", unit="row", leave=False):
-            tokens = tokenize_text(val)
-            domain_vocab.update(tokens)
 
-print(f"Total unique words in vocab: {len(domain_vocab)}")
+# ===== OPTIONAL: Precompute embeddings (incremental) =====
+def load_previous_embeddings(path: str, model_name: str):
+    """word -> embedding row of an earlier build with the same model, or {}."""
+    import torch
 
-# ===== SAVE TO PICKLE =====
-with open(OUTPUT_PKL, "wb") as f:
-    pickle.dump(domain_vocab, f)
+    if not os.path.exists(path):
+        return {}
+    data = torch.load(path, map_location="cpu", weights_only=True)
+    if not isinstance(data, dict) or "words" not in data or data.get("model", model_name) != model_name:
+        return {}
+    return {w: row for w, row in zip(data["words"], data["embeddings"])}
 
-print(f"Saved domain vocab to {OUTPUT_PKL}")
 
-# ===== OPTIONAL: Precompute embeddings on GPU =====
-try:
+def precompute_embeddings(vocab_list, path: str = OUTPUT_EMBEDDINGS, model_name: str = EMBEDDING_MODEL,
+                          batch_size: int = 512) -> None:
+    import torch
     from sentence_transformers import SentenceTransformer
-    print(f"Loading SentenceTransformer model on {DEVICE} ...")
-    model = SentenceTransformer("all-MiniLM-L6-v2", device=DEVICE)
-
-    vocab_list = list(domain_vocab)
-    batch_size = 512
-    embeddings = []
-
-    print("Computing embeddings for domain vocab ...")
-    for i in tqdm(range(0, len(vocab_list), batch_size), desc="Batches"):
-        batch = vocab_list[i:i+batch_size]
-        emb = model.encode(batch, convert_to_tensor=True, device=DEVICE)
-        embeddings.append(emb)
-
-    embeddings = torch.cat(embeddings)
-    torch.save(embeddings, "domain_vocab_embeddings.pt")
-    print("Saved embeddings to domain_vocab_embeddings.pt")
-except Exception as e:
-    print("Skipping embeddings precomputation:", e)
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    previous = load_previous_embeddings(path, model_name)
+    missing = [w for w in vocab_list if w not in previous]
+    print(f"{len(vocab_list) - len(missing)} words already embedded, encoding {len(missing)} new words")
+
+    new = {}
+    if missing:
+        print(f"Loading SentenceTransformer model on {device} ...")
+        model = SentenceTransformer(model_name, device=device)
+        for i in tqdm(range(0, len(missing), batch_size), desc="Batches"):
+            batch = missing[i:i + batch_size]
+            emb = model.encode(batch, convert_to_tensor=True, device=device, normalize_embeddings=True)
+            new.update(zip(batch, emb.cpu()))
+
+    # sorted, and saved with the word list, so spell_api can map rows back to words
+    rows = [new[w] if w in new else previous[w] for w in vocab_list]
+    embeddings = torch.stack(rows) if rows else torch.empty(0)
+    torch.save({"words": list(vocab_list), "embeddings": embeddings, "model": model_name}, path)
+    print(f"Saved embeddings to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the domain vocab artifacts from recipe CSVs")
+    parser.add_argument("csv_files", nargs="*", default=CSV_FILES)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--max-terms", type=int, default=MAX_TERMS)
+    parser.add_argument("--skip-embeddings", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    term_counts = build_counts(args.csv_files, args.workers, args.chunk_rows, args.max_terms)
+    print(f"Total unique words in vocab: {len(term_counts)} ({time.perf_counter() - start:.1f}s)")
+
+    # ===== SAVE TO PICKLE =====
+    with open(OUTPUT_PKL, "wb") as f:
+        pickle.dump(term_counts, f)
+    print(f"Saved domain vocab to {OUTPUT_PKL}")
+
+    # ===== SAVE MEMORY-MAPPED ARTIFACT (sorted vocab + frequencies + fuzzy index) =====
+    start = time.perf_counter()
+    DeleteIndex.build(term_counts).save(OUTPUT_INDEX)
+    print(f"Saved vocab artifact to {OUTPUT_INDEX} in {time.perf_counter() - start:.1f}s")
+
+    # ===== SAVE SYMSPELL FREQUENCY DICTIONARY =====
+    with open(OUTPUT_SYMSPELL, "w", encoding="utf-8") as f:
+        for word, count in term_counts.most_common():
+            if count < SYMSPELL_MIN_COUNT:
+                break
+            f.write(f"{word} {count}\n")
+    print(f"Saved SymSpell frequency dictionary to {OUTPUT_SYMSPELL}")
+
+    if args.skip_embeddings:
+        return
+    try:
+        precompute_embeddings(sorted(term_counts))
+    except Exception as e:
+        print("Skipping embeddings precomputation:", e)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Per-position candidate lattice and beam search for layer 1.
+
+Layer 1 used to pour single-token suggestions and whole-sentence variants
+into one set, and every member went through the MLM and embedding layers as
+if it were a sentence. Here each token position keeps its top-K alternatives
+with a cheap score (corrector votes, edit distance, frequency, domain
+membership), and a beam search joins them into whole-sentence hypotheses.
+Only the best few hypotheses are sent on to the model layers.
+"""
+import heapq
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+LATTICE_TOP_K = int(os.getenv("SPELL_LATTICE_TOP_K", "3"))
+BEAM_WIDTH = int(os.getenv("SPELL_BEAM_WIDTH", "8"))
+BEAM_HYPOTHESES = int(os.getenv("SPELL_BEAM_HYPOTHESES", "4"))
+
+
+class Alternative(NamedTuple):
+    text: str
+    score: float
+    sources: Tuple[str, ...]
+
+
+class Hypothesis(NamedTuple):
+    text: str
+    score: float
+    tokens: Tuple[str, ...]
+
+
+class Lattice:
+    def __init__(self, top_k: int = LATTICE_TOP_K):
+        self.top_k = top_k
+        self.positions: List[List[Alternative]] = []
+
+    def add_position(self, alternatives: Sequence[Alternative]) -> None:
+        """Keep the top_k highest-scoring alternatives of one token position."""
+        best = sorted(alternatives, key=lambda a: a.score, reverse=True)[:self.top_k]
+        self.positions.append(best)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def size(self) -> int:
+        return sum(len(p) for p in self.positions)
+
+    def beam_search(self, beam_width: int = BEAM_WIDTH, n_best: int = BEAM_HYPOTHESES,
+                    pair_bonus: Optional[Callable[[str, str], float]] = None) -> List[Hypothesis]:
+        """Whole-sentence hypotheses, best first. Scores are sums of token scores plus
+        pair_bonus(previous token, token) for adjacent pairs."""
+        beam: List[Tuple[float, Tuple[str, ...]]] = [(0.0, ())]
+        for alternatives in self.positions:
+            if not alternatives:
+                continue
+            expanded = []
+            for score, tokens in beam:
+                for alt in alternatives:
+                    s = score + alt.score
+                    if pair_bonus is not None and tokens:
+                        s += pair_bonus(tokens[-1], alt.text)
+                    expanded.append((s, tokens + (alt.text,)))
+            beam = heapq.nlargest(beam_width, expanded, key=lambda h: h[0])
+        seen: Dict[str, Hypothesis] = {}
+        for score, tokens in beam:
+            text = " ".join(tokens)
+            if text not in seen:
+                seen[text] = Hypothesis(text, score, tokens)
+        return sorted(seen.values(), key=lambda h: h.score, reverse=True)[:n_best]
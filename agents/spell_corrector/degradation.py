@@ -0,0 +1,176 @@
+"""
+Load-adaptive quality degradation for /check and /check_batch.
+
+Under a request spike every query still went through ContextualSpellCheck,
+the BERT MLM and the embedding rerank (with WordNet expansion), and queueing
+delay grew without bound. DegradationController watches two load signals:
+
+  in-flight   texts currently inside the pipeline
+  queue wait  mean time a model call waited in a MicroBatcher queue before its
+              batch started, over the last SPELL_DEGRADE_WINDOW_S
+
+and turns the expensive layers off in a fixed order as load rises:
+
+  normal         all layers
+  no_contextual  ContextualSpellCheck off (and the NER pass that feeds it)
+  no_mlm         ... and the MLM; candidates keep their layer-1 order
+  no_embeddings  ... and the embedding rerank + WordNet expansion
+
+pressure = max(in-flight / SPELL_DEGRADE_INFLIGHT, queue wait / SPELL_DEGRADE_QUEUE_MS),
+and a pressure of k or more asks for level k. Levels go up at once, and come
+down one at a time, only after pressure has stayed below level - HYSTERESIS
+for SPELL_DEGRADE_COOLDOWN_S, so the mode does not flap when degrading
+itself brings latency down.
+
+The total per-text latency is reported in stats() but is not a load signal:
+on CPU a single idle request through every layer already takes longer than
+any useful target. Queue wait is about zero when idle (at most the batcher's
+SPELL_BATCH_WAIT_MS) and grows by about one model call for every request
+waiting ahead. Set SPELL_DEGRADE_QUEUE_MS near the layer2 p50 that
+spell_benchmark reports on the serving hardware, so no_contextual starts once
+about one batch is queued.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+DEGRADE_ENABLED = os.getenv("SPELL_DEGRADE_ENABLED", "1") == "1"
+DEGRADE_INFLIGHT = float(os.getenv("SPELL_DEGRADE_INFLIGHT", "8"))
+DEGRADE_QUEUE_MS = float(os.getenv("SPELL_DEGRADE_QUEUE_MS", "250"))
+DEGRADE_WINDOW_S = float(os.getenv("SPELL_DEGRADE_WINDOW_S", "5"))
+DEGRADE_COOLDOWN_S = float(os.getenv("SPELL_DEGRADE_COOLDOWN_S", "10"))
+DEGRADE_HYSTERESIS = float(os.getenv("SPELL_DEGRADE_HYSTERESIS", "0.5"))
+
+# layers in the order they are turned off
+DEGRADE_ORDER = ("contextual", "mlm", "embeddings")
+MODES = ("normal", "no_contextual", "no_mlm", "no_embeddings")
+
+
+def disabled_layers(mode: str) -> Tuple[str, ...]:
+    return DEGRADE_ORDER[:MODES.index(mode)]
+
+
+class DegradationController:
+    def __init__(self, enabled: bool = DEGRADE_ENABLED, inflight_target: float = DEGRADE_INFLIGHT,
+                 queue_target_ms: float = DEGRADE_QUEUE_MS, window_s: float = DEGRADE_WINDOW_S,
+                 cooldown_s: float = DEGRADE_COOLDOWN_S, hysteresis: float = DEGRADE_HYSTERESIS):
+        self.enabled = enabled
+        self.inflight_target = inflight_target
+        self.queue_target_s = queue_target_ms / 1000.0
+        self.window_s = window_s
+        self.cooldown_s = cooldown_s
+        self.hysteresis = hysteresis
+        self.level = 0
+        self.inflight = 0
+        self._latencies: Deque[Tuple[float, float]] = deque()  # (finished at, seconds per text)
+        self._latency_sum = 0.0
+        self._waits: Deque[Tuple[float, float]] = deque()  # (started at, seconds queued)
+        self._wait_sum = 0.0
+        self._calm_since: Optional[float] = None
+        self._lock = threading.Lock()
+        self.transitions = 0
+        self.requests: Dict[str, int] = {m: 0 for m in MODES}
+        self._mode_since = time.monotonic()
+        self._time_in: Dict[str, float] = {m: 0.0 for m in MODES}
+
+    @property
+    def mode(self) -> str:
+        return MODES[self.level]
+
+    def _latency(self, now: float) -> float:
+        while self._latencies and self._latencies[0][0] < now - self.window_s:
+            self._latency_sum -= self._latencies.popleft()[1]
+        return self._latency_sum / len(self._latencies) if self._latencies else 0.0
+
+    def _queue_wait(self, now: float) -> float:
+        while self._waits and self._waits[0][0] < now - self.window_s:
+            self._wait_sum -= self._waits.popleft()[1]
+        return self._wait_sum / len(self._waits) if self._waits else 0.0
+
+    def _pressure(self, now: float) -> float:
+        pressure = self.inflight / self.inflight_target if self.inflight_target > 0 else 0.0
+        if self.queue_target_s > 0:
+            pressure = max(pressure, self._queue_wait(now) / self.queue_target_s)
+        return pressure
+
+    def _set_level(self, level: int, now: float) -> None:
+        self._time_in[self.mode] += now - self._mode_since
+        self._mode_since = now
+        print(f"Spell agent load mode: {self.mode} -> {MODES[level]}")
+        self.level = level
+        self.transitions += 1
+
+    def _update(self, now: float) -> None:
+        if not self.enabled:
+            return
+        pressure = self._pressure(now)
+        target = min(len(MODES) - 1, int(pressure))
+        if target > self.level:
+            self._set_level(target, now)
+            self._calm_since = None
+        elif self.level > 0 and pressure < self.level - self.hysteresis:
+            if self._calm_since is None:
+                self._calm_since = now
+            elif now - self._calm_since >= self.cooldown_s:
+                self._set_level(self.level - 1, now)
+                self._calm_since = now  # the next step down needs another full cooldown
+        else:
+            self._calm_since = None
+
+    def enter(self, n: int = 1) -> str:
+        """Admit n texts; returns the mode they run in."""
+        with self._lock:
+            self.inflight += n
+            self._update(time.monotonic())
+            self.requests[self.mode] += n
+            return self.mode
+
+    def exit(self, n: int, seconds: float) -> None:
+        with self._lock:
+            self.inflight -= n
+            now = time.monotonic()
+            per_text = seconds / max(n, 1)
+            self._latencies.append((now, per_text))
+            self._latency_sum += per_text
+            self._update(now)
+
+    def record_wait(self, seconds: float) -> None:
+        """Record how long one model call waited in a queue before it started (MicroBatcher on_wait)."""
+        with self._lock:
+            now = time.monotonic()
+            self._waits.append((now, seconds))
+            self._wait_sum += seconds
+            self._update(now)
+
+    @contextmanager
+    def track(self, n: int = 1) -> Iterator[str]:
+        start = time.perf_counter()
+        mode = self.enter(n)
+        try:
+            yield mode
+        finally:
+            self.exit(n, time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._update(now)
+            time_in = dict(self._time_in)
+            time_in[self.mode] += now - self._mode_since
+            return {
+                "enabled": self.enabled,
+                "mode": self.mode,
+                "disabled_layers": list(disabled_layers(self.mode)),
+                "pressure": round(self._pressure(now), 3),
+                "inflight": self.inflight,
+                "queue_wait_ms": round(self._queue_wait(now) * 1000, 2),
+                "latency_ms": round(self._latency(now) * 1000, 2),
+                "inflight_target": self.inflight_target,
+                "queue_target_ms": self.queue_target_s * 1000,
+                "transitions": self.transitions,
+                "requests_by_mode": dict(self.requests),
+                "seconds_in_mode": {m: round(s, 1) for m, s in time_in.items()},
+            }
@@ -0,0 +1,125 @@
+"""
+String -> sentence-embedding cache for layer-3 reranking.
+
+Lookups go to a bounded LRU of recently encoded strings, then to a read-only
+matrix of precomputed domain vocab embeddings (domain_vocab_embeddings.pt from
+build_domain_vocab.py). Only the remaining misses are encoded, in one batch.
+All vectors are L2-normalized so cosine similarity is a matrix-vector product.
+"""
+import os
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EMBED_CACHE_SIZE = int(os.getenv("SPELL_EMBED_CACHE_SIZE", "20000"))
+VOCAB_EMBEDDINGS = os.getenv(
+    "SPELL_VOCAB_EMBEDDINGS", os.path.join(os.path.dirname(__file__), "domain_vocab_embeddings.pt")
+)
+
+
+def normalize_rows(mat: np.ndarray) -> np.ndarray:
+    mat = np.asarray(mat, dtype=np.float32)
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    return mat / np.maximum(norms, 1e-12)
+
+
+def load_vocab_embeddings(path: str = VOCAB_EMBEDDINGS) -> Tuple[Optional[List[str]], Optional[np.ndarray]]:
+    """(sorted words, read-only normalized matrix) from build_domain_vocab.py, or (None, None).
+
+    Older builds saved a bare tensor in set-iteration order, which cannot be
+    matched back to words; those files are skipped.
+    """
+    if not os.path.exists(path):
+        return None, None
+    import torch
+
+    data = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    if not isinstance(data, dict) or "words" not in data:
+        print(f"{os.path.basename(path)} has no word list (rebuild with build_domain_vocab.py), not seeding cache.")
+        return None, None
+    words = list(data["words"])
+    matrix = data["embeddings"].float().numpy()
+    if len(words) != len(matrix):
+        print(f"{os.path.basename(path)}: {len(words)} words but {len(matrix)} embeddings, not seeding cache.")
+        return None, None
+    if any(words[i] > words[i + 1] for i in range(len(words) - 1)):
+        order = sorted(range(len(words)), key=words.__getitem__)
+        words = [words[i] for i in order]
+        matrix = matrix[order]
+    if not np.allclose(np.linalg.norm(matrix, axis=1), 1.0, atol=1e-3):
+        matrix = normalize_rows(matrix)
+    matrix.flags.writeable = False
+    return words, matrix
+
+
+class EmbeddingCache:
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], capacity: int = EMBED_CACHE_SIZE,
+                 seed_words: Optional[Sequence[str]] = None, seed_matrix: Optional[np.ndarray] = None):
+        self._encode = encode
+        self.capacity = capacity
+        self.seed_words = seed_words or []
+        self.seed_matrix = seed_matrix
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.seed_hits = 0
+        self.misses = 0
+
+    def _seed_row(self, text: str) -> Optional[np.ndarray]:
+        if self.seed_matrix is None:
+            return None
+        i = bisect_left(self.seed_words, text)
+        if i < len(self.seed_words) and self.seed_words[i] == text:
+            return self.seed_matrix[i]
+        return None
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Normalized embeddings for texts, shape (len(texts), dim)."""
+        found: Dict[str, np.ndarray] = {}
+        missing: List[str] = []
+        with self._lock:
+            for text in dict.fromkeys(texts):
+                vec = self._lru.get(text)
+                if vec is not None:
+                    self._lru.move_to_end(text)
+                    self.hits += 1
+                    found[text] = vec
+                    continue
+                vec = self._seed_row(text)
+                if vec is not None:
+                    self.seed_hits += 1
+                    found[text] = vec
+                else:
+                    missing.append(text)
+            self.misses += len(missing)
+
+        if missing:
+            # encode outside the lock; concurrent requests may encode the same string twice
+            encoded = normalize_rows(self._encode(missing))
+            with self._lock:
+                for text, vec in zip(missing, encoded):
+                    # own copy, so evicting a row frees it even if its batch-mates stay cached
+                    vec = vec.copy()
+                    vec.flags.writeable = False
+                    found[text] = vec
+                    self._lru[text] = vec
+                    self._lru.move_to_end(text)
+                while len(self._lru) > self.capacity:
+                    self._lru.popitem(last=False)
+
+        return np.stack([found[t] for t in texts]) if texts else np.zeros((0, 0), dtype=np.float32)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.seed_hits + self.misses
+        return {
+            "size": len(self._lru),
+            "capacity": self.capacity,
+            "seeded_words": len(self.seed_words),
+            "hits": self.hits,
+            "seed_hits": self.seed_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.seed_hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,540 @@
+"""
+Durable, batched feedback store for /feedback and the per-user boosts.
+
+/feedback used to open feedback.log, append one line and close it on every
+call, and the boosts lived only in the worker's memory. Here a writer thread
+owns the storage. Requests enqueue their event, and the writer commits
+everything that queued up during its previous commit in one write + fsync
+(group commit). SPELL_FEEDBACK_FLUSH_MS > 0 also waits that long for more
+events before each commit. With SPELL_FEEDBACK_DURABLE=1 (the default) a
+request returns once its batch is on disk. With 0 it returns as soon as the
+event is queued.
+
+Backends (SPELL_FEEDBACK_BACKEND):
+  sqlite  (default) feedback.db in WAL mode: a feedback events table plus a
+          user_boosts table that every worker reads, so boosts are shared.
+          Existing feedback.log lines are imported once at startup.
+  log     feedback.log stays the write-ahead log (same tab-separated format).
+          The log is folded into a SQLite boost snapshot
+          (feedback.log.boosts.db) at startup, every SNAPSHOT_EVERY events
+          and on close, a chunk of lines at a time. A user's boosts are read
+          from the snapshot plus the log lines written after it. The boosts
+          are per worker: another worker's events for a user show up once
+          that user is read back again. Meant for a single worker; a worker
+          that finds another process writing the log prints a warning.
+
+Boosts in memory live in a bounded boost_table.BoostTable: the recently used
+users' boosts for the log backend (an evicted user is read back on its next
+request), and a per-user read cache for the sqlite backend.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from boost_table import BoostTable, decayed
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks (Windows): the log backend cannot tell it has company
+    fcntl = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FEEDBACK_BACKEND = os.getenv("SPELL_FEEDBACK_BACKEND", "sqlite").lower()
+FEEDBACK_LOG = os.getenv("SPELL_FEEDBACK_LOG", os.path.join(HERE, "feedback.log"))
+FEEDBACK_DB = os.getenv("SPELL_FEEDBACK_DB", os.path.join(HERE, "feedback.db"))
+FEEDBACK_DURABLE = os.getenv("SPELL_FEEDBACK_DURABLE", "1").lower() not in ("0", "false", "no")
+FEEDBACK_FLUSH_MS = float(os.getenv("SPELL_FEEDBACK_FLUSH_MS", "0"))
+FEEDBACK_BATCH_MAX = int(os.getenv("SPELL_FEEDBACK_BATCH_MAX", "1024"))
+# log backend: fold the log into the boost snapshot after this many new events (a user read back
+# from the snapshot also scans the log lines written since, so this bounds that scan too)
+SNAPSHOT_EVERY = int(os.getenv("SPELL_FEEDBACK_SNAPSHOT_EVERY", "1000"))
+# users known to have no boosts, remembered outside the BoostTable
+NO_BOOSTS_CACHE_SIZE = int(os.getenv("SPELL_FEEDBACK_NO_BOOSTS_CACHE", "100000"))
+# log bytes read per step when folding or importing feedback.log
+READ_CHUNK_BYTES = 1 << 20
+
+class FeedbackEvent(NamedTuple):
+    user_id: str
+    original: str
+    suggested: str
+    accepted: bool
+
+    def to_line(self) -> str:
+        fields = (self.user_id, self.original, self.suggested)
+        # tabs and newlines would break the line format
+        return "\t".join(" ".join(f.split()) for f in fields) + f"\t{int(self.accepted)}\n"
+
+    @classmethod
+    def from_line(cls, line: str) -> Optional["FeedbackEvent"]:
+        parts = line.rstrip("\n").split("\t")
+        if len(parts) != 4 or parts[3] not in ("0", "1"):
+            return None
+        return cls(parts[0], parts[1], parts[2], parts[3] == "1")
+
+
+def read_log(path: str, offset: int = 0, limit: Optional[int] = None) -> Tuple[List[FeedbackEvent], int]:
+    """Events after byte `offset`, and the offset just past the last complete line.
+
+    With `limit`, stops at the end of the line that byte `limit` falls in.
+    A torn last line (crash mid-write) has no newline yet. It is left for the next replay.
+    """
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read() if limit is None else f.read(limit) + f.readline()
+    end = data.rfind(b"\n") + 1
+    events = []
+    for raw in data[:end].splitlines():
+        event = FeedbackEvent.from_line(raw.decode("utf-8", errors="replace"))
+        if event is not None:
+            events.append(event)
+    return events, offset + end
+
+
+def iter_log(path: str, offset: int = 0, chunk_bytes: int = READ_CHUNK_BYTES
+             ) -> Iterator[Tuple[List[FeedbackEvent], int]]:
+    """read_log in chunks of about `chunk_bytes`: (events, offset past them) up to the last complete line."""
+    while True:
+        events, end = read_log(path, offset, chunk_bytes)
+        if end <= offset:
+            return
+        yield events, end
+        offset = end
+
+
+BOOSTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_boosts (
+    user_id TEXT NOT NULL,
+    word TEXT NOT NULL,
+    count REAL NOT NULL,  -- decayed to updated_at
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (user_id, word)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    original TEXT NOT NULL,
+    suggested TEXT NOT NULL,
+    accepted INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+""" + BOOSTS_SCHEMA
+
+
+def connect(path: str, half_life_s: float) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # FULL syncs the WAL on every commit, which group commit makes one fsync per batch
+    conn.execute("PRAGMA synchronous=FULL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.create_function("decayed", 2, lambda score, stamp: decayed(score, stamp, time.time(), half_life_s))
+    return conn
+
+
+def upsert_boosts(conn: sqlite3.Connection, events: List[FeedbackEvent], now: float) -> None:
+    counts = Counter((e.user_id, e.suggested.lower()) for e in events if e.accepted)
+    conn.executemany(
+        "INSERT INTO user_boosts (user_id, word, count, updated_at) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(user_id, word) DO UPDATE SET "
+        "count = decayed(count, updated_at) + excluded.count, updated_at = excluded.updated_at",
+        [(user, word, n, now) for (user, word), n in counts.items()],
+    )
+
+
+def user_rows(conn: sqlite3.Connection, user_id: str, limit: int) -> List[Tuple[str, float, float]]:
+    """A user's strongest (word, count, updated_at) rows."""
+    return conn.execute(
+        "SELECT word, count, updated_at FROM user_boosts WHERE user_id = ? "
+        "ORDER BY decayed(count, updated_at) DESC LIMIT ?", (user_id, limit),
+    ).fetchall()
+
+
+def log_offset(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT value FROM meta WHERE key = 'log_offset'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def set_log_offset(conn: sqlite3.Connection, offset: int) -> None:
+    conn.execute("INSERT INTO meta (key, value) VALUES ('log_offset', ?) "
+                 "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (str(offset),))
+
+
+class _GroupCommitStore:
+    """Writer thread plus queue. Subclasses implement _commit(events), called with one batch at a time."""
+
+    backend = "none"
+
+    def __init__(self, durable: bool = FEEDBACK_DURABLE, flush_ms: float = FEEDBACK_FLUSH_MS,
+                 batch_max: int = FEEDBACK_BATCH_MAX):
+        self.durable = durable
+        self.flush_wait = flush_ms / 1000.0
+        self.batch_max = batch_max
+        self._queue: "queue.Queue[Optional[Tuple[FeedbackEvent, Optional[Future]]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self.replayed = 0
+        self.events = 0
+        self.commits = 0
+        self.max_batch = 0
+        self.commit_seconds = 0.0
+        # users without boosts hold no BoostTable row (an empty row counts no entries and is never evicted)
+        self._no_boosts: "OrderedDict[str, None]" = OrderedDict()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"feedback-{self.backend}", daemon=True)
+
+    def _start(self) -> None:
+        self._thread.start()
+
+    def record(self, event: FeedbackEvent, wait: Optional[bool] = None) -> None:
+        if self._closed:
+            raise RuntimeError("feedback store is closed")
+        wait = self.durable if wait is None else wait
+        future: Optional[Future] = Future() if wait else None
+        self._queue.put((event, future))
+        if future is not None:
+            future.result()
+
+    def flush(self) -> None:
+        """Block until everything queued so far is committed."""
+        future: Future = Future()
+        self._queue.put((None, future))  # type: ignore[arg-type]
+        future.result()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+    def _collect(self) -> Optional[List[Tuple[Optional[FeedbackEvent], Optional[Future]]]]:
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.flush_wait
+        while len(batch) < self.batch_max:
+            try:
+                # drain whatever is already queued, then wait out the flush window for more
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if entry is None:
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            events = [e for e, _ in batch if e is not None]
+            error: Optional[BaseException] = None
+            if events:
+                start = time.perf_counter()
+                try:
+                    self._commit(events)
+                except Exception as e:  # surface to waiting requests, keep the writer alive
+                    print(f"[feedback] commit of {len(events)} events failed: {e}")
+                    error = e
+                else:
+                    with self._lock:
+                        self.commit_seconds += time.perf_counter() - start
+                        self.events += len(events)
+                        self.commits += 1
+                        self.max_batch = max(self.max_batch, len(events))
+            for _, future in batch:
+                if future is not None:
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(None)
+
+    def _commit(self, events: List[FeedbackEvent]) -> None:
+        raise NotImplementedError
+
+    def boosts(self, user_id: Optional[str]) -> Dict[str, float]:
+        raise NotImplementedError
+
+    def _known_empty(self, key: str) -> bool:
+        if key in self._no_boosts:
+            self._no_boosts.move_to_end(key)
+            return True
+        return False
+
+    def _remember_empty(self, key: str) -> None:
+        self._no_boosts[key] = None
+        if len(self._no_boosts) > NO_BOOSTS_CACHE_SIZE:
+            self._no_boosts.popitem(last=False)
+
+    def boost_stats(self) -> Dict[str, Any]:
+        return self.table.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "durable": self.durable,
+                "replayed": self.replayed,
+                "events": self.events,
+                "commits": self.commits,
+                "avg_events_per_commit": round(self.events / self.commits, 2) if self.commits else 0.0,
+                "max_events_per_commit": self.max_batch,
+                "avg_commit_ms": round(self.commit_seconds / self.commits * 1000, 3) if self.commits else 0.0,
+                "queued": self._queue.qsize(),
+            }
+
+
+class LogFeedbackStore(_GroupCommitStore):
+    backend = "log"
+
+    def __init__(self, path: str = FEEDBACK_LOG, snapshot_path: Optional[str] = None,
+                 table: Optional[BoostTable] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.snapshot_path = snapshot_path or path + ".boosts.db"
+        # boosts of the recently used users; the others are read back on a miss (see _read_back)
+        self.table = table if table is not None else BoostTable()
+        self._since_snapshot = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.shared = False
+        self._writer_lock = self._claim_log()
+        self._writer = connect(self.snapshot_path, self.table.half_life_s)
+        self._writer.executescript(BOOSTS_SCHEMA)
+        self._reader = connect(self.snapshot_path, self.table.half_life_s)
+        # serializes reading a user back with appending to the log, so no line is counted twice or missed
+        self._boost_lock = threading.Lock()
+        self.replay()
+        self._file = open(path, "ab")
+        self._start()
+
+    def _claim_log(self):
+        """Hold an advisory lock on the log for this process's lifetime; warn when another process has it.
+
+        Several uvicorn workers on the log backend each keep their own boosts, so they disagree on them.
+        """
+        if fcntl is None:
+            return None
+        f = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.shared = True
+            print(f"[feedback] WARNING: another process is writing {self.path}. The log backend keeps "
+                  "boosts per worker, so workers will disagree on them; use SPELL_FEEDBACK_BACKEND=sqlite "
+                  "with more than one worker.")
+        return f
+
+    def compact(self) -> int:
+        """Fold the log lines written after the snapshot into it; returns the number of lines folded in.
+
+        The log is read in READ_CHUNK_BYTES steps and upserted per (user, word), so a compaction
+        costs the new lines, not every user. The log is shared by every worker; BEGIN IMMEDIATE
+        lets one of them fold a given stretch of it.
+        """
+        cur = self._writer
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            offset = log_offset(cur)
+            if offset > (os.path.getsize(self.path) if os.path.exists(self.path) else 0):
+                # a log that shrank was rotated or rewritten; the snapshot no longer describes it
+                cur.execute("DELETE FROM user_boosts")
+                offset = 0
+            count = 0
+            now = time.time()
+            # log lines carry no timestamp; folded events count as new
+            for events, offset in iter_log(self.path, offset):
+                upsert_boosts(cur, events, now)
+                count += len(events)
+            set_log_offset(cur, offset)
+            cur.execute("COMMIT")
+        except BaseException:
+            cur.execute("ROLLBACK")
+            raise
+        return count
+
+    def replay(self) -> int:
+        """Fold the log written since the last snapshot into it; users are then read back on demand."""
+        count = self.compact()
+        with self._boost_lock:
+            self.table.clear()
+            self._no_boosts.clear()
+        with self._lock:
+            self.replayed = count
+        return count
+
+    def _read_back(self, key: str) -> List[Tuple[str, float, float]]:
+        """A user's snapshot rows plus their log lines after the snapshot, as (word, score, stamp) items."""
+        cur = self._reader
+        cur.execute("BEGIN")  # the offset and the rows come from the same snapshot version
+        try:
+            offset = log_offset(cur)
+            items = user_rows(cur, key, self.table.max_per_user)
+        finally:
+            cur.execute("COMMIT")
+        now = time.time()
+        events, _ = read_log(self.path, offset)
+        items.extend((e.suggested.lower(), 1.0, now) for e in events if e.accepted and e.user_id == key)
+        return items
+
+    def _commit(self, events: List[FeedbackEvent]) -> None:
+        # one append + one fsync for the whole batch; O_APPEND keeps lines from several workers whole
+        with self._boost_lock:
+            self._file.write("".join(e.to_line() for e in events).encode("utf-8"))
+            self._file.flush()
+            for e in events:
+                if e.accepted:
+                    self._no_boosts.pop(e.user_id, None)
+                    # a user not in the table reads this line back from the log when next asked for
+                    if e.user_id in self.table:
+                        self.table.add(e.user_id, e.suggested.lower())
+        os.fsync(self._file.fileno())
+        self._since_snapshot += len(events)
+        if self._since_snapshot >= SNAPSHOT_EVERY:
+            self._since_snapshot = 0
+            self.compact()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        super().close()
+        if self._since_snapshot:
+            self.compact()
+        self._file.close()
+        self._writer.close()
+        self._reader.close()
+        if self._writer_lock is not None:
+            self._writer_lock.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "shared_log": self.shared}
+
+    def boosts(self, user_id: Optional[str]) -> Dict[str, float]:
+        key = user_id or ""
+        with self._boost_lock:
+            if key not in self.table:
+                if self._known_empty(key):
+                    return {}
+                items = self._read_back(key)
+                if not items:
+                    self._remember_empty(key)
+                    return {}
+                self.table.set_user(key, items)
+            return self.table.get(key)
+
+
+class SqliteFeedbackStore(_GroupCommitStore):
+    backend = "sqlite"
+
+    def __init__(self, path: str = FEEDBACK_DB, legacy_log: Optional[str] = FEEDBACK_LOG,
+                 table: Optional[BoostTable] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        # bounded read cache of the users' strongest boosts
+        self.table = table if table is not None else BoostTable()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._writer = self._connect()
+        self._writer.executescript(SCHEMA)
+        columns = {row[1] for row in self._writer.execute("PRAGMA table_info(user_boosts)")}
+        if "updated_at" not in columns:
+            # databases created before decay: existing counts start decaying now
+            self._writer.execute("ALTER TABLE user_boosts ADD COLUMN updated_at REAL NOT NULL DEFAULT 0")
+            self._writer.execute("UPDATE user_boosts SET updated_at = ?", (time.time(),))
+        # readers share one connection; PRAGMA data_version changes when any other connection commits
+        self._reader = self._connect()
+        self._read_lock = threading.Lock()
+        self._version: Optional[int] = None
+        if legacy_log:
+            self.replay(legacy_log)
+        self._start()
+
+    def _connect(self) -> sqlite3.Connection:
+        return connect(self.path, self.table.half_life_s)
+
+    def replay(self, log_path: str) -> int:
+        """Import feedback.log lines not imported yet (tracked by byte offset in `meta`)."""
+        cur = self._writer
+        cur.execute("BEGIN IMMEDIATE")  # one worker imports, the others wait and find nothing new
+        try:
+            offset = log_offset(cur)
+            if os.path.exists(log_path) and offset > os.path.getsize(log_path):
+                offset = 0
+            count = 0
+            for events, offset in iter_log(log_path, offset):
+                self._insert(events)
+                count += len(events)
+            set_log_offset(cur, offset)
+            cur.execute("COMMIT")
+        except BaseException:
+            cur.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self.replayed = count
+        return count
+
+    def _insert(self, events: List[FeedbackEvent]) -> None:
+        now = time.time()
+        self._writer.executemany(
+            "INSERT INTO feedback (user_id, original, suggested, accepted, created_at) VALUES (?, ?, ?, ?, ?)",
+            [(e.user_id, e.original, e.suggested, int(e.accepted), now) for e in events],
+        )
+        upsert_boosts(self._writer, events, now)
+
+    def _commit(self, events: List[FeedbackEvent]) -> None:
+        self._writer.execute("BEGIN IMMEDIATE")
+        try:
+            self._insert(events)
+            self._writer.execute("COMMIT")
+        except BaseException:
+            self._writer.execute("ROLLBACK")
+            raise
+
+    def boosts(self, user_id: Optional[str]) -> Dict[str, float]:
+        key = user_id or ""
+        with self._read_lock:
+            version = self._reader.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._version:
+                self.table.clear()
+                self._no_boosts.clear()
+                self._version = version
+            if key not in self.table:
+                if self._known_empty(key):
+                    return {}
+                rows = user_rows(self._reader, key, self.table.max_per_user)
+                if not rows:
+                    self._remember_empty(key)
+                    return {}
+                self.table.set_user(key, rows)
+            return self.table.get(key)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        super().close()
+        self._writer.close()
+        self._reader.close()
+
+
+def open_store(backend: str = FEEDBACK_BACKEND) -> _GroupCommitStore:
+    if backend == "log":
+        return LogFeedbackStore()
+    if backend != "sqlite":
+        print(f"[feedback] unknown SPELL_FEEDBACK_BACKEND={backend!r}, using the sqlite backend")
+    return SqliteFeedbackStore()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the domain-vocab fuzzy lookup used by _nearest_domain_word:
+full Levenshtein scan over domain_vocab vs the symmetric-delete index.
+
+    python fuzzy_benchmark.py --tokens 50
+
+Checks that both return the same word for every token and prints timings.
+"""
+import argparse
+import os
+import pickle
+import random
+import time
+
+from fuzzy_index import DeleteIndex
+from spell_api import _levenshtein
+
+VOCAB_PATH = os.path.join(os.path.dirname(__file__), "domain_vocab.pkl")
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+FOOD_TOKENS = ["chiken", "biryni", "colmobo", "berger", "restaurnt", "spagheti", "tomatos", "kottu", "hoppers"]
+
+
+def scan(token: str, words) -> str:
+    # same loop as spell_api._nearest_domain_word_scan
+    best, best_d = None, 10**9
+    for w in words:
+        d = _levenshtein(token, w)
+        if d < best_d:
+            best, best_d = w, d
+            if d == 0:
+                break
+    return best if best is not None and best_d <= 2 else None
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    chars = list(word)
+    for _ in range(rng.randint(1, 2)):
+        i = rng.randrange(len(chars) + 1)
+        op = rng.random()
+        if op < 0.33 and i < len(chars):
+            chars[i] = rng.choice(LETTERS)
+        elif op < 0.66:
+            chars.insert(i, rng.choice(LETTERS))
+        elif i < len(chars) and len(chars) > 1:
+            del chars[i]
+    return "".join(chars)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full-scan vs indexed nearest domain word")
+    parser.add_argument("--tokens", type=int, default=30, help="Synthetic misspellings to test")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(VOCAB_PATH, "rb") as f:
+        vocab = pickle.load(f)
+    words = sorted(vocab)
+    print(f"Vocabulary: {len(words)} words")
+
+    start = time.perf_counter()
+    index = DeleteIndex.build(words)
+    build_s = time.perf_counter() - start
+    index_mb = (index.keys.nbytes + index.ids.nbytes + index.lengths.nbytes + index.masks.nbytes) / 1024**2
+    print(f"Index build: {build_s:.2f}s, {len(index.keys)} deletes, {index_mb:.1f} MB arrays")
+
+    rng = random.Random(args.seed)
+    tokens = FOOD_TOKENS + [misspell(w, rng) for w in rng.sample(words, args.tokens)]
+
+    scan_s, index_s, mismatches = 0.0, 0.0, 0
+    for tok in tokens:
+        t0 = time.perf_counter()
+        expected = scan(tok, words)
+        t1 = time.perf_counter()
+        got = index.nearest(tok)
+        t2 = time.perf_counter()
+        scan_s += t1 - t0
+        index_s += t2 - t1
+        if got != expected:
+            mismatches += 1
+            print(f"  MISMATCH {tok!r}: scan={expected!r} index={got!r}")
+
+    n = len(tokens)
+    print(f"Full scan: {scan_s / n * 1e3:.1f} ms/token")
+    print(f"Index:     {index_s / n * 1e6:.1f} us/token")
+    print(f"Speedup:   {scan_s / max(index_s, 1e-9):.0f}x over {n} tokens, mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Symmetric-delete index for bounded edit-distance lookups over the domain vocabulary.
+
+Every vocabulary word contributes the strings reachable by deleting up to
+`max_distance` characters from its first `prefix_length` characters (as in
+SymSpell). Two words within edit distance k always share such a delete, so a
+lookup only has to verify the few words that share a delete with the query
+instead of scanning the whole vocabulary.
+
+Deletes are stored as sorted (crc32, word id) arrays rather than a dict of
+strings, which keeps ~3.5M entries for a 140k-word vocabulary at ~28 MB.
+Candidates are pre-filtered in bulk by length and by a letter-set lower bound
+before the exact distance check (editdistpy, which symspellpy installs, or a
+pure Python fallback).
+
+The index (plus the sorted vocabulary and term frequencies) can be saved as a
+single flat file and memory-mapped back read-only, so loading is near-instant
+and uvicorn workers share the same page-cache pages:
+
+    python fuzzy_index.py domain_vocab.pkl domain_vocab.idx
+"""
+import json
+import os
+import sys
+from bisect import bisect_left
+from typing import Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Union
+from zlib import crc32
+
+import numpy as np
+
+try:
+    # C++ Levenshtein shipped with symspellpy
+    from editdistpy import levenshtein as _editdistpy
+except ImportError:
+    _editdistpy = None
+
+ARTIFACT_MAGIC = b"CSVOCAB1"
+ARTIFACT_ALIGN = 64
+
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+
+
+def deletes(word: str, max_distance: int = MAX_DISTANCE, prefix_length: int = PREFIX_LENGTH) -> Set[str]:
+    key = word[:prefix_length]
+    out = {key}
+    frontier = {key}
+    for _ in range(max_distance):
+        nxt = set()
+        for w in frontier:
+            for i in range(len(w)):
+                nxt.add(w[:i] + w[i + 1:])
+        out |= nxt
+        frontier = nxt
+    return out
+
+
+def _hash(s: str) -> int:
+    return crc32(s.encode("utf-8"))
+
+
+def letter_mask(word: str) -> int:
+    """Bit per letter a-z present in word; bit 26 stands for any other character."""
+    m = 0
+    for ch in word:
+        o = ord(ch) - 97
+        m |= 1 << o if 0 <= o < 26 else 1 << 26
+    return m
+
+
+def bounded_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """Levenshtein distance, or max_distance + 1 as soon as it is known to exceed max_distance.
+
+    Only the diagonal band |i - j| <= max_distance of the DP table can hold values
+    within the bound, so each row computes at most 2 * max_distance + 1 cells.
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    la, lb = len(a), len(b)
+    if la - lb > max_distance:
+        return max_distance + 1
+    # common prefix/suffix never change the distance
+    while lb and a[0] == b[0]:
+        a, b, la, lb = a[1:], b[1:], la - 1, lb - 1
+    while lb and a[-1] == b[-1]:
+        a, b, la, lb = a[:-1], b[:-1], la - 1, lb - 1
+    if lb == 0:
+        return la if la <= max_distance else max_distance + 1
+    over = max_distance + 1
+    previous = [j if j <= max_distance else over for j in range(lb + 1)]
+    for i in range(1, la + 1):
+        ca = a[i - 1]
+        lo = max(1, i - max_distance)
+        hi = min(lb, i + max_distance)
+        current = [over] * (lb + 1)
+        current[0] = i if i <= max_distance else over
+        row_min = current[0]
+        for j in range(lo, hi + 1):
+            d = previous[j - 1] + (ca != b[j - 1])
+            if previous[j] + 1 < d:
+                d = previous[j] + 1
+            if current[j - 1] + 1 < d:
+                d = current[j - 1] + 1
+            if d > over:
+                d = over
+            current[j] = d
+            if d < row_min:
+                row_min = d
+        if row_min > max_distance:
+            return over
+        previous = current
+    return previous[lb] if previous[lb] <= max_distance else over
+
+
+def _editdistpy_distance(a: str, b: str, max_distance: int) -> int:
+    d = _editdistpy.distance(a, b, max_distance)
+    return d if d >= 0 else max_distance + 1
+
+
+# bounded_levenshtein's contract; about 8x faster through editdistpy
+distance = _editdistpy_distance if _editdistpy is not None else bounded_levenshtein
+
+
+class WordTable(Sequence):
+    """Sorted, read-only word list stored as one UTF-8 blob plus offsets (mmap friendly)."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+        # memoryviews index without creating numpy (or memmap) objects, which dominated lookups
+        self._bytes = memoryview(np.ascontiguousarray(blob)).cast("B")
+        self._offsets = memoryview(np.ascontiguousarray(offsets, dtype=np.uint64)).cast("B").cast("Q")
+
+    @classmethod
+    def from_words(cls, words: List[str]) -> "WordTable":
+        encoded = [w.encode("utf-8") for w in words]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return str(self._bytes[self._offsets[i]:self._offsets[i + 1]], "utf-8")
+
+    def __contains__(self, word) -> bool:
+        i = bisect_left(self, word)
+        return i < len(self) and self[i] == word
+
+    def index(self, word, *args) -> int:
+        i = bisect_left(self, word)
+        if i < len(self) and self[i] == word:
+            return i
+        raise ValueError(word)
+
+
+class DeleteIndex:
+    def __init__(self, words: Sequence[str], keys: np.ndarray, ids: np.ndarray,
+                 lengths: np.ndarray, masks: np.ndarray, freqs: Optional[np.ndarray] = None,
+                 max_distance: int = MAX_DISTANCE, prefix_length: int = PREFIX_LENGTH):
+        self.words = words
+        self.keys = keys
+        self.ids = ids
+        self.lengths = lengths
+        self.masks = masks
+        self.freqs = freqs if freqs is not None else np.ones(len(words), dtype=np.uint32)
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+
+    @classmethod
+    def build(cls, vocab: Union[Iterable[str], Mapping[str, int]], max_distance: int = MAX_DISTANCE,
+              prefix_length: int = PREFIX_LENGTH) -> "DeleteIndex":
+        """Index a set of words, or a word -> frequency mapping."""
+        # sorted words make ids (and tie-breaking) deterministic across processes
+        words = sorted(set(vocab))
+        if isinstance(vocab, Mapping):
+            freqs = np.fromiter((min(int(vocab[w]), 2**32 - 1) for w in words), dtype=np.uint32, count=len(words))
+        else:
+            freqs = np.ones(len(words), dtype=np.uint32)
+        keys: List[int] = []
+        ids: List[int] = []
+        for wid, w in enumerate(words):
+            for d in deletes(w, max_distance, prefix_length):
+                keys.append(_hash(d))
+                ids.append(wid)
+        keys_arr = np.asarray(keys, dtype=np.uint32)
+        ids_arr = np.asarray(ids, dtype=np.uint32)
+        order = np.argsort(keys_arr, kind="stable")
+        lengths = np.fromiter((len(w) for w in words), dtype=np.uint16, count=len(words))
+        masks = np.fromiter((letter_mask(w) for w in words), dtype=np.uint32, count=len(words))
+        return cls(WordTable.from_words(words), keys_arr[order], ids_arr[order], lengths, masks, freqs,
+                   max_distance, prefix_length)
+
+    def _arrays(self) -> dict:
+        return {
+            "word_offsets": self.words.offsets,
+            "word_bytes": self.words.blob,
+            "freqs": self.freqs,
+            "lengths": self.lengths,
+            "masks": self.masks,
+            "keys": self.keys,
+            "ids": self.ids,
+        }
+
+    def save(self, path: str) -> None:
+        """Write a flat artifact: magic, header length, JSON header, then 64-byte aligned arrays."""
+        if not isinstance(self.words, WordTable):
+            self.words = WordTable.from_words(list(self.words))
+        arrays = self._arrays()
+        header = {"max_distance": self.max_distance, "prefix_length": self.prefix_length,
+                  "num_words": len(self.words), "arrays": {}}
+        # offsets depend on the header size, so lay out twice until stable
+        for _ in range(2):
+            raw = json.dumps(header).encode("utf-8")
+            offset = len(ARTIFACT_MAGIC) + 8 + len(raw)
+            for name, arr in arrays.items():
+                offset = -(-offset // ARTIFACT_ALIGN) * ARTIFACT_ALIGN
+                header["arrays"][name] = {"dtype": arr.dtype.str, "offset": offset, "count": int(arr.size)}
+                offset += arr.nbytes
+        raw = json.dumps(header).encode("utf-8")
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(ARTIFACT_MAGIC)
+            f.write(len(raw).to_bytes(8, "little"))
+            f.write(raw)
+            for name, arr in arrays.items():
+                f.write(b"\0" * (header["arrays"][name]["offset"] - f.tell()))
+                f.write(np.ascontiguousarray(arr).tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DeleteIndex":
+        """Memory-map an artifact written by save(); nothing is copied into the heap."""
+        with open(path, "rb") as f:
+            if f.read(len(ARTIFACT_MAGIC)) != ARTIFACT_MAGIC:
+                raise ValueError(f"{path} is not a domain vocab artifact")
+            header = json.loads(f.read(int.from_bytes(f.read(8), "little")))
+        # a plain ndarray over the mapping: slicing a memmap builds a memmap object per slice
+        mm = np.asarray(np.memmap(path, dtype=np.uint8, mode="r"))
+        arrays = {}
+        for name, meta in header["arrays"].items():
+            dtype = np.dtype(meta["dtype"])
+            start = meta["offset"]
+            arrays[name] = mm[start:start + meta["count"] * dtype.itemsize].view(dtype)
+        words = WordTable(arrays["word_bytes"], arrays["word_offsets"])
+        return cls(words, arrays["keys"], arrays["ids"], arrays["lengths"], arrays["masks"], arrays["freqs"],
+                   header["max_distance"], header["prefix_length"])
+
+    def frequency(self, word: str) -> int:
+        i = bisect_left(self.words, word)
+        if i < len(self.words) and self.words[i] == word:
+            return int(self.freqs[i])
+        return 0
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def _contains(self, token: str) -> bool:
+        return token in self.words
+
+    def _candidates(self, token: str, max_distance: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Word ids that may be within max_distance, with a lower bound on their distance."""
+        probes = np.fromiter((_hash(d) for d in deletes(token, self.max_distance, self.prefix_length)),
+                             dtype=np.uint32)
+        lo = np.searchsorted(self.keys, probes, side="left")
+        hi = np.searchsorted(self.keys, probes, side="right")
+        hits = [self.ids[a:b] for a, b in zip(lo, hi) if b > a]
+        if not hits:
+            return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.int32)
+        cand = np.unique(np.concatenate(hits))
+        # every letter present in one word but not the other costs at least one edit
+        m = np.uint32(letter_mask(token))
+        wm = self.masks[cand]
+        lower = np.maximum(np.bitwise_count(wm & ~m), np.bitwise_count(m & ~wm)).astype(np.int32)
+        lower = np.maximum(lower, np.abs(self.lengths[cand].astype(np.int32) - len(token)))
+        keep = lower <= max_distance
+        # most promising first (stable, so equal bounds stay alphabetical)
+        order = np.argsort(lower[keep], kind="stable")
+        return cand[keep][order], lower[keep][order]
+
+    def lookup(self, token: str, max_distance: Optional[int] = None) -> List[Tuple[str, int]]:
+        """All vocabulary words within max_distance of token, closest first (ties alphabetical)."""
+        k = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        matches = []
+        ids, _ = self._candidates(token, k)
+        for wid in ids:
+            w = self.words[wid]
+            d = distance(token, w, k)
+            if d <= k:
+                matches.append((w, d))
+        matches.sort(key=lambda m: (m[1], m[0]))
+        return matches
+
+    def nearest(self, token: str) -> Optional[str]:
+        if self._contains(token):
+            return token
+        best = None
+        best_d = self.max_distance + 1
+        ids, lower = self._candidates(token, self.max_distance)
+        for wid, lb in zip(ids.tolist(), lower.tolist()):
+            if lb > best_d or (lb == best_d and best is not None and self.words[wid] > best):
+                continue
+            w = self.words[wid]
+            d = distance(token, w, best_d)
+            if d < best_d or (d == best_d and best is not None and w < best):
+                best, best_d = w, d
+        return best if best_d <= self.max_distance else None
+
+
+if __name__ == "__main__":
+    # Compile an existing pickled vocabulary (set, or word -> count dict) into an artifact
+    import pickle
+    import time
+
+    src = sys.argv[1] if len(sys.argv) > 1 else "domain_vocab.pkl"
+    dst = sys.argv[2] if len(sys.argv) > 2 else "domain_vocab.idx"
+    with open(src, "rb") as f:
+        vocab = pickle.load(f)
+    start = time.perf_counter()
+    DeleteIndex.build(vocab).save(dst)
+    print(f"Wrote {dst} ({os.path.getsize(dst) / 1024**2:.1f} MB, {len(vocab)} words) "
+          f"in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,101 @@
+"""
+Micro-batching for the model layers of concurrent /check requests.
+
+/check runs in the threadpool, so each request used to make its own MLM and
+sentence-transformer calls, and they competed for the GIL and BLAS threads.
+A MicroBatcher owns one worker thread per model. Request threads submit their
+items and block. The worker collects submissions for up to `max_wait_ms` or
+`max_items`, makes one call over the concatenated items and hands each request
+its slice of the result. Each submission's wait, from submit to the start of
+the call that runs it, goes to `on_wait` (the degradation controller's
+queueing-delay signal).
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+MICROBATCH_ENABLED = os.getenv("SPELL_MICROBATCH", "1") not in ("0", "false", "no")
+BATCH_MAX_ITEMS = int(os.getenv("SPELL_BATCH_MAX_ITEMS", "64"))
+BATCH_WAIT_MS = float(os.getenv("SPELL_BATCH_WAIT_MS", "5"))
+
+
+class MicroBatcher:
+    def __init__(self, fn: Callable[[List[Any]], Sequence[Any]], name: str,
+                 max_items: int = BATCH_MAX_ITEMS, max_wait_ms: float = BATCH_WAIT_MS,
+                 on_wait: Optional[Callable[[float], None]] = None):
+        self.fn = fn
+        self.on_wait = on_wait
+        self.name = name
+        self.max_items = max_items
+        self.max_wait = max_wait_ms / 1000.0
+        # (items, future, submitted at)
+        self._queue: "queue.Queue[Tuple[List[Any], Future, float]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"microbatch-{name}", daemon=True)
+        self._thread.start()
+        self.batches = 0
+        self.requests = 0
+        self.items = 0
+        self.max_batch_requests = 0
+
+    def submit(self, items: Sequence[Any]) -> Sequence[Any]:
+        """Run fn over items as part of the next batch; blocks until the result is ready."""
+        if not items:
+            return self.fn([])
+        future: Future = Future()
+        self._queue.put((list(items), future, time.monotonic()))
+        return future.result()
+
+    def _collect(self) -> List[Tuple[List[Any], Future, float]]:
+        batch = [self._queue.get()]
+        count = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while count < self.max_items:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(entry)
+            count += len(entry[0])
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            flat = [item for items, _, _ in batch for item in items]
+            if self.on_wait is not None:
+                started = time.monotonic()
+                for _, _, submitted in batch:
+                    self.on_wait(started - submitted)
+            try:
+                results = self.fn(flat)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for items, future, _ in batch:
+                future.set_result(results[offset:offset + len(items)])
+                offset += len(items)
+            self.batches += 1
+            self.requests += len(batch)
+            self.items += len(flat)
+            self.max_batch_requests = max(self.max_batch_requests, len(batch))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "items": self.items,
+            "avg_requests_per_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "avg_items_per_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_requests_per_batch": self.max_batch_requests,
+            "queued": self._queue.qsize(),
+            "max_items": self.max_items,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark for layer-2 MLM scoring: the previous per-position fill-mask loop
+(3 pipeline calls per candidate, top-5 rank heuristic) vs batched
+pseudo-log-likelihood scoring from mlm_scoring.
+
+    python mlm_benchmark.py --candidates 1 5 10 20 --repeat 3
+"""
+import argparse
+import time
+
+import torch
+from transformers import pipeline
+
+from mlm_scoring import pll_scores
+
+SENTENCE = "find the best chicken biryani restaurants in colombo"
+SWAPS = [("chicken", "chiken"), ("biryani", "biryni"), ("colombo", "colmobo"), ("best", "bset"),
+         ("restaurants", "restaurnts"), ("find", "fnd")]
+
+
+def rank_heuristic(fill_mask, sent: str) -> float:
+    # the loop _context_aware used before batching
+    toks = sent.split()
+    if not toks:
+        return 0.0
+    sampled = toks[: min(3, len(toks))]
+    s = 0.0
+    for i in range(len(sampled)):
+        masked = toks.copy()
+        masked[i] = fill_mask.tokenizer.mask_token
+        with torch.no_grad():
+            res = fill_mask(" ".join(masked), top_k=5)
+        for rank, r in enumerate(res, start=1):
+            if r.get("token_str", "").strip().lower() == toks[i].lower():
+                s += 1.0 / rank
+                break
+    return s / max(1, len(sampled))
+
+
+def make_candidates(n: int):
+    cands = [SENTENCE]
+    for i in range(1, n):
+        sent = SENTENCE
+        for j, (good, bad) in enumerate(SWAPS):
+            if (i >> j) & 1:
+                sent = sent.replace(good, bad)
+        cands.append(sent)
+    return cands
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-position fill-mask vs batched PLL scoring")
+    parser.add_argument("--model", default="bert-base-uncased")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[1, 5, 10, 20])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    device = 0 if torch.cuda.is_available() else -1
+    fill_mask = pipeline("fill-mask", model=args.model, device=device)
+
+    for n in args.candidates:
+        cands = make_candidates(n)
+        loop_s = timed(lambda: [rank_heuristic(fill_mask, c) for c in cands], args.repeat)
+        batch_s = timed(lambda: pll_scores(fill_mask.model, fill_mask.tokenizer, cands), args.repeat)
+        ranked = sorted(zip(pll_scores(fill_mask.model, fill_mask.tokenizer, cands), cands), reverse=True)
+        print(f"{n:3d} candidates: loop {loop_s * 1000:8.1f} ms | batched {batch_s * 1000:8.1f} ms | "
+              f"{loop_s / batch_s:5.1f}x | PLL top: {ranked[0][1]!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Batched masked-LM scoring for spell candidates.
+
+Each candidate is scored by its pseudo-log-likelihood (PLL): every word-piece is
+masked in turn and the log-probability of the original piece is read from the
+logits. All masked variants of all candidates go through the model as padded
+batches (a single forward pass for typical queries) instead of one fill-mask
+pipeline call per position.
+"""
+import math
+import os
+from typing import List, Sequence
+
+MLM_BATCH_SIZE = int(os.getenv("SPELL_MLM_BATCH_SIZE", "128"))
+# Masked positions per candidate; later word-pieces are not scored
+MLM_MAX_POSITIONS = int(os.getenv("SPELL_MLM_MAX_POSITIONS", "32"))
+
+
+def masked_variants(tokenizer, sentences: Sequence[str], max_positions: int = MLM_MAX_POSITIONS):
+    """Token rows with one word-piece masked, plus (sentence index, position, original id) per row."""
+    encoded = tokenizer(list(sentences), add_special_tokens=True, truncation=True)["input_ids"]
+    special = set(tokenizer.all_special_ids)
+    rows, targets = [], []
+    for s_idx, ids in enumerate(encoded):
+        positions = [i for i, t in enumerate(ids) if t not in special][:max_positions]
+        for pos in positions:
+            masked = list(ids)
+            masked[pos] = tokenizer.mask_token_id
+            rows.append(masked)
+            targets.append((s_idx, pos, ids[pos]))
+    return rows, targets
+
+
+def _masked_logits(model, input_ids, attention_mask, index, positions):
+    """Vocabulary logits at the masked position of each row only.
+
+    For BERT-style heads the vocab projection is applied to the gathered hidden
+    states instead of every position of every row.
+    """
+    base = getattr(model, "base_model", None)
+    head = getattr(model, "cls", None)
+    if base is not None and head is not None and base is not model:
+        hidden = base(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        return head(hidden[index, positions])
+    logits = model(input_ids=input_ids, attention_mask=attention_mask).logits
+    return logits[index, positions]
+
+
+def pseudo_log_likelihoods(model, tokenizer, sentences: Sequence[str], batch_size: int = MLM_BATCH_SIZE,
+                           max_positions: int = MLM_MAX_POSITIONS) -> List[float]:
+    """Mean per-piece PLL of each sentence (-inf when it has no word-pieces)."""
+    import torch
+
+    totals = [0.0] * len(sentences)
+    counts = [0] * len(sentences)
+    rows, targets = masked_variants(tokenizer, sentences, max_positions)
+    device = next(model.parameters()).device
+    pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else 0
+
+    for start in range(0, len(rows), batch_size):
+        chunk = rows[start:start + batch_size]
+        chunk_targets = targets[start:start + batch_size]
+        width = max(len(r) for r in chunk)
+        input_ids = torch.full((len(chunk), width), pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(chunk), width), dtype=torch.long)
+        for r, row in enumerate(chunk):
+            input_ids[r, :len(row)] = torch.tensor(row, dtype=torch.long)
+            attention_mask[r, :len(row)] = 1
+        index = torch.arange(len(chunk))
+        positions = torch.tensor([pos for _, pos, _ in chunk_targets], dtype=torch.long)
+        originals = torch.tensor([tok for _, _, tok in chunk_targets], dtype=torch.long)
+
+        index, positions, originals = index.to(device), positions.to(device), originals.to(device)
+        with torch.no_grad():
+            masked_logits = _masked_logits(model, input_ids.to(device), attention_mask.to(device), index, positions)
+            log_probs = torch.log_softmax(masked_logits.float(), dim=-1)[index, originals]
+
+        for (s_idx, _, _), lp in zip(chunk_targets, log_probs.tolist()):
+            totals[s_idx] += lp
+            counts[s_idx] += 1
+
+    return [totals[i] / counts[i] if counts[i] else float("-inf") for i in range(len(sentences))]
+
+
+def pll_scores(model, tokenizer, sentences: Sequence[str], **kwargs) -> List[float]:
+    """PLL mapped to (0, 1] as the geometric-mean piece probability, so it mixes with the other layer scores."""
+    return [math.exp(p) if p != float("-inf") else 0.0
+            for p in pseudo_log_likelihoods(model, tokenizer, sentences, **kwargs)]
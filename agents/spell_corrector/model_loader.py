@@ -0,0 +1,149 @@
+"""
+Offline-first, parallel startup for the spell corrector's models.
+
+Each model is a named step with dependencies. Independent steps load in
+parallel threads (torch, spaCy and model weight loading release the GIL for
+most of their work). Per-step state and timings are kept for /ready.
+
+Offline first: Hugging Face models and NLTK corpora are looked up on local
+disk without any network call. When everything is cached, the HF hub is put
+in offline mode, so libraries that call from_pretrained themselves
+(ContextualSpellCheck) do not reach the network either. SPELL_OFFLINE=1 never
+downloads; missing models are reported as "unavailable".
+"""
+import glob
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+SPELL_OFFLINE = os.getenv("SPELL_OFFLINE", "0").lower() in ("1", "true", "yes")
+PARALLEL_LOAD = os.getenv("SPELL_PARALLEL_LOAD", "1").lower() not in ("0", "false", "no")
+
+
+def hf_cache_dir() -> str:
+    if os.getenv("HF_HUB_CACHE"):
+        return os.environ["HF_HUB_CACHE"]
+    home = os.getenv("HF_HOME", os.path.join(os.path.expanduser("~"), ".cache", "huggingface"))
+    return os.path.join(home, "hub")
+
+
+def hf_cached(repo_id: str) -> bool:
+    """True if a snapshot of repo_id with a config is on disk (filesystem check only)."""
+    folder = os.path.join(hf_cache_dir(), "models--" + repo_id.replace("/", "--"), "snapshots")
+    return bool(glob.glob(os.path.join(folder, "*", "config.json")))
+
+
+def prefer_offline(repo_ids: Sequence[str]) -> bool:
+    """Switch the HF hub to offline mode when forced or when every repo is cached.
+
+    Must run before transformers / sentence-transformers are imported.
+    """
+    if SPELL_OFFLINE or all(hf_cached(r) for r in repo_ids):
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+        return True
+    return False
+
+
+def nltk_local(resource: str) -> bool:
+    """e.g. nltk_local("corpora/wordnet"); checks NLTK data paths without downloading."""
+    import nltk
+
+    for candidate in (resource, resource + ".zip"):
+        try:
+            nltk.data.find(candidate)
+            return True
+        except LookupError:
+            continue
+    return False
+
+
+class Unavailable(Exception):
+    """A step that was skipped on purpose (e.g. offline and not cached)."""
+
+
+class ParallelLoader:
+    def __init__(self, steps: Dict[str, Tuple[Callable[[], Any], Sequence[str]]], parallel: bool = PARALLEL_LOAD):
+        self.steps = steps
+        self.parallel = parallel
+        self.state: Dict[str, Dict[str, Any]] = {name: {"state": "pending"} for name in steps}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def _run_step(self, name: str, wait_for: Dict[str, Any]) -> None:
+        fn, deps = self.steps[name]
+        for dep in deps:
+            if dep in wait_for:
+                wait_for[dep].result()
+        status = self.state[name]
+        status["state"] = "loading"
+        start = time.perf_counter()
+        try:
+            fn()
+            status["state"] = "ready"
+        except Unavailable as e:
+            status.update(state="unavailable", detail=str(e))
+        except Exception as e:
+            status.update(state="failed", error=str(e)[:300])
+            print(f"[startup] {name} failed: {e}")
+        status["seconds"] = round(time.perf_counter() - start, 3)
+
+    def _order(self) -> List[str]:
+        ordered: List[str] = []
+        seen = set()
+
+        def visit(name: str) -> None:
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in self.steps[name][1]:
+                visit(dep)
+            ordered.append(name)
+
+        for name in self.steps:
+            visit(name)
+        return ordered
+
+    def run(self) -> None:
+        self.started_at = time.perf_counter()
+        order = self._order()
+        if self.parallel:
+            # one thread per step, so a step blocked on its dependencies never starves another
+            with ThreadPoolExecutor(max_workers=len(order), thread_name_prefix="model-load") as pool:
+                futures: Dict[str, Any] = {}
+                for name in order:
+                    futures[name] = pool.submit(self._run_step, name, futures)
+        else:
+            for name in order:
+                self._run_step(name, {})
+        self.finished_at = time.perf_counter()
+        self._done.set()
+
+    def run_once(self) -> None:
+        """First caller loads everything; concurrent and later callers wait for that load."""
+        with self._lock:
+            first = self.started_at is None
+            if first:
+                self.started_at = time.perf_counter()
+        if first:
+            self.run()
+        else:
+            self._done.wait()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def report(self) -> Dict[str, Any]:
+        end = self.finished_at or time.perf_counter()
+        return {
+            "ready": self.done,
+            "parallel": self.parallel,
+            "offline": os.getenv("HF_HUB_OFFLINE") == "1",
+            "elapsed_s": round(end - self.started_at, 3) if self.started_at else 0.0,
+            "models": self.state,
+        }
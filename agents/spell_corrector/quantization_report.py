@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Accuracy vs latency of the int8 backend against the fp32 models, on a corpus of
+misspelled food queries (fixed examples plus synthetic edits of domain words).
+
+    python quantization_report.py --pairs 200 --output quantization_report.json
+
+MLM accuracy: how often the correct sentence gets a higher PLL than its
+misspelling. Embeddings: cosine between fp32 and int8 vectors, and whether the
+correct word stays the nearest candidate to the misspelled query.
+"""
+import argparse
+import json
+import os
+import pickle
+import random
+import time
+
+import numpy as np
+import torch
+
+from fuzzy_benchmark import misspell
+from mlm_scoring import pll_scores
+from quantized_models import (
+    MLM_MODEL, QUANTIZED_DIR, SENTENCE_MODEL, load_mlm_pipeline, load_sentence_model, quantize,
+)
+
+VOCAB_PATH = os.path.join(os.path.dirname(__file__), "domain_vocab.pkl")
+TEMPLATES = ["{} recipe", "best {} near me", "how to make {} at home", "spicy {} in colombo", "order {} for dinner"]
+FIXED_PAIRS = [
+    ("chicken biryani recipe", "chiken biryni recipe"),
+    ("best burger in colombo", "best berger in colmobo"),
+    ("spaghetti carbonara", "spagheti carbonara"),
+    ("italian restaurant near me", "italian restaurnt near me"),
+    ("fresh tomatoes salad", "fresh tomatos salad"),
+]
+
+
+def build_corpus(n: int, seed: int):
+    rng = random.Random(seed)
+    pairs = list(FIXED_PAIRS)
+    if os.path.exists(VOCAB_PATH):
+        with open(VOCAB_PATH, "rb") as f:
+            words = sorted(w for w in pickle.load(f) if 4 <= len(w) <= 12)
+        while len(pairs) < n:
+            word = rng.choice(words)
+            wrong = misspell(word, rng)
+            if wrong != word:
+                template = rng.choice(TEMPLATES)
+                pairs.append((template.format(word), template.format(wrong)))
+    return pairs[:n]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+def mlm_report(fp32, int8, pairs, batch: int):
+    report = {}
+    scores = {}
+    for label, pipe in (("fp32", fp32), ("int8", int8)):
+        sentences = [s for pair in pairs for s in pair]
+        pll = []
+        elapsed = 0.0
+        for i in range(0, len(sentences), batch):
+            out, secs = timed(lambda: pll_scores(pipe.model, pipe.tokenizer, sentences[i:i + batch]))
+            pll.extend(out)
+            elapsed += secs
+        scores[label] = pll
+        correct = sum(pll[2 * i] > pll[2 * i + 1] for i in range(len(pairs)))
+        report[label] = {
+            "accuracy": round(correct / len(pairs), 4),
+            "ms_per_sentence": round(elapsed / len(sentences) * 1000, 2),
+        }
+    agree = sum((scores["fp32"][2 * i] > scores["fp32"][2 * i + 1]) == (scores["int8"][2 * i] > scores["int8"][2 * i + 1])
+                for i in range(len(pairs)))
+    report["decision_agreement"] = round(agree / len(pairs), 4)
+    report["speedup"] = round(report["fp32"]["ms_per_sentence"] / max(report["int8"]["ms_per_sentence"], 1e-9), 2)
+    return report
+
+
+def embedding_report(fp32, int8, pairs, batch: int):
+    report = {}
+    vecs = {}
+    texts = [s for pair in pairs for s in pair]
+    for label, model in (("fp32", fp32), ("int8", int8)):
+        with torch.no_grad():
+            emb, secs = timed(lambda: model.encode(texts, batch_size=batch, normalize_embeddings=True))
+        vecs[label] = np.asarray(emb)
+        report[label] = {"ms_per_text": round(secs / len(texts) * 1000, 3)}
+        # the correct sentence should be closer to its own misspelling than to other pairs' sentences
+        right, wrong = vecs[label][0::2], vecs[label][1::2]
+        nearest = (wrong @ right.T).argmax(axis=1)
+        report[label]["nearest_is_correct"] = round(float((nearest == np.arange(len(pairs))).mean()), 4)
+    report["mean_cosine_fp32_vs_int8"] = round(float((vecs["fp32"] * vecs["int8"]).sum(axis=1).mean()), 4)
+    report["speedup"] = round(report["fp32"]["ms_per_text"] / max(report["int8"]["ms_per_text"], 1e-9), 2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fp32 and int8 spell corrector models")
+    parser.add_argument("--pairs", type=int, default=200, help="(correct, misspelled) sentence pairs")
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threads", type=int, help="torch intra-op threads (defaults to torch's choice)")
+    parser.add_argument("--quantized-dir", default=QUANTIZED_DIR,
+                        help="Exported artifacts; models are quantized in memory when missing")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    from sentence_transformers import SentenceTransformer
+    from transformers import pipeline
+
+    pairs = build_corpus(args.pairs, args.seed)
+    fp32_mlm = pipeline("fill-mask", model=MLM_MODEL, device=-1)
+    int8_mlm = load_mlm_pipeline(args.quantized_dir) or pipeline(
+        "fill-mask", model=quantize(pipeline("fill-mask", model=MLM_MODEL, device=-1).model),
+        tokenizer=fp32_mlm.tokenizer, device=-1,
+    )
+    fp32_st = SentenceTransformer(SENTENCE_MODEL, device="cpu")
+    int8_st = load_sentence_model(args.quantized_dir) or quantize(SentenceTransformer(SENTENCE_MODEL, device="cpu"))
+
+    report = {
+        "pairs": len(pairs),
+        "threads": torch.get_num_threads(),
+        "mlm": mlm_report(fp32_mlm, int8_mlm, pairs, args.batch),
+        "embeddings": embedding_report(fp32_st, int8_st, pairs, args.batch),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
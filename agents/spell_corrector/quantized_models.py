@@ -0,0 +1,124 @@
+"""
+Dynamic int8 CPU backend for the spell corrector's BERT MLM and sentence model.
+
+Export once (downloads the fp32 models, quantizes every nn.Linear to int8):
+
+    python quantized_models.py --out models/int8
+
+then start the agent with SPELL_INFERENCE_BACKEND=int8. When the artifacts are
+missing, fail to load, or a GPU is in use, spell_api falls back to the regular
+transformers / sentence-transformers models.
+
+Only the int8 state_dict is saved (int8_state.pt). At load time the fp32
+architecture is rebuilt (from the saved config for the MLM, from the saved
+fp32 model for the sentence model), quantized again, and the weights are read
+with torch.load(weights_only=True), so an artifact cannot carry pickled code.
+"""
+import argparse
+import os
+import time
+
+INFERENCE_BACKEND = os.getenv("SPELL_INFERENCE_BACKEND", "transformers").lower()
+QUANTIZED_DIR = os.getenv("SPELL_QUANTIZED_DIR", os.path.join(os.path.dirname(__file__), "models", "int8"))
+MLM_MODEL = "bert-base-uncased"
+SENTENCE_MODEL = "all-MiniLM-L6-v2"
+
+
+def quantize(model):
+    """Dynamic int8 quantization of all Linear layers (weights int8, activations quantized per batch)."""
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _model_file(out_dir: str, name: str) -> str:
+    return os.path.join(out_dir, name, "int8_state.pt")
+
+
+def save_quantized(model, path: str) -> None:
+    """Save the int8 weights only; the module itself is rebuilt by load_quantized."""
+    import torch
+
+    torch.save(model.state_dict(), path)
+
+
+def load_quantized(model, path: str):
+    """Quantize a freshly built fp32 `model` the same way export did and load the saved int8 weights into it.
+
+    weights_only=True: the artifact holds tensors only, so loading it cannot run pickled code.
+    """
+    import torch
+
+    model = quantize(model)
+    model.load_state_dict(torch.load(path, map_location="cpu", weights_only=True))
+    return model
+
+
+def export_mlm(model_name: str = MLM_MODEL, out_dir: str = QUANTIZED_DIR) -> str:
+    from transformers import AutoModelForMaskedLM, AutoTokenizer
+
+    target = os.path.join(out_dir, "mlm")
+    os.makedirs(target, exist_ok=True)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(target)
+    model = AutoModelForMaskedLM.from_pretrained(model_name)
+    # the config rebuilds the architecture at load time, without the fp32 weights
+    model.config.save_pretrained(target)
+    save_quantized(quantize(model), _model_file(out_dir, "mlm"))
+    return target
+
+
+def export_sentence_model(model_name: str = SENTENCE_MODEL, out_dir: str = QUANTIZED_DIR) -> str:
+    from sentence_transformers import SentenceTransformer
+
+    target = os.path.join(out_dir, "sentence")
+    os.makedirs(target, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    # the fp32 model (modules, tokenizer, pooling) is what load_sentence_model rebuilds and quantizes
+    model.save(target)
+    save_quantized(quantize(model), _model_file(out_dir, "sentence"))
+    return target
+
+
+def artifacts_present(out_dir: str = QUANTIZED_DIR) -> bool:
+    return os.path.exists(_model_file(out_dir, "mlm")) and os.path.exists(_model_file(out_dir, "sentence"))
+
+
+def load_mlm_pipeline(out_dir: str = QUANTIZED_DIR):
+    """fill-mask pipeline over the int8 model, or None if the artifact is missing."""
+    path = _model_file(out_dir, "mlm")
+    if not os.path.exists(path):
+        return None
+    from transformers import AutoConfig, AutoModelForMaskedLM, AutoTokenizer, pipeline
+
+    target = os.path.dirname(path)
+    model = load_quantized(AutoModelForMaskedLM.from_config(AutoConfig.from_pretrained(target)), path)
+    tokenizer = AutoTokenizer.from_pretrained(target)
+    return pipeline("fill-mask", model=model, tokenizer=tokenizer, device=-1)
+
+
+def load_sentence_model(out_dir: str = QUANTIZED_DIR):
+    path = _model_file(out_dir, "sentence")
+    if not os.path.exists(path):
+        return None
+    from sentence_transformers import SentenceTransformer
+
+    return load_quantized(SentenceTransformer(os.path.dirname(path), device="cpu"), path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export int8 dynamically quantized spell corrector models")
+    parser.add_argument("--out", default=QUANTIZED_DIR)
+    parser.add_argument("--mlm-model", default=MLM_MODEL)
+    parser.add_argument("--sentence-model", default=SENTENCE_MODEL)
+    args = parser.parse_args()
+
+    for label, export, name in (("MLM", export_mlm, args.mlm_model),
+                                ("sentence model", export_sentence_model, args.sentence_model)):
+        start = time.perf_counter()
+        target = export(name, args.out)
+        size = os.path.getsize(_model_file(args.out, os.path.basename(target))) / 1024**2
+        print(f"Exported int8 {label} {name} to {target} ({size:.1f} MB) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+CPU cost of spaCy per spell check request: the old flow (full en_core_web_sm
+pipeline for layer 1, then again for layer 2) vs the current one (tokenizer
+only for layer 1, NER-only pipeline for layer 2, layer-1 docs reused).
+
+    python spacy_benchmark.py --queries 500
+    python spacy_benchmark.py --model /path/to/pipeline
+
+ContextualSpellCheck itself is left out: it runs the same BERT model in both
+flows. The numbers are spaCy-only process CPU time.
+"""
+import argparse
+import json
+import os
+import pickle
+import random
+import time
+
+import spacy
+
+from fuzzy_benchmark import misspell
+from spell_api import SPACY_MODEL, _trimmed_spacy
+
+VOCAB_PATH = os.path.join(os.path.dirname(__file__), "domain_vocab.pkl")
+TEMPLATES = ["{} recipe", "best {} near me", "how to make {} at home", "spicy {} in colombo", "order {} for dinner"]
+
+
+def build_queries(n: int, seed: int):
+    """(query, layer-1 output) pairs; about half are already correct, so layer 1 leaves them unchanged."""
+    rng = random.Random(seed)
+    words = ["burger", "biryani", "kottu", "hoppers", "carbonara", "ramen", "tacos"]
+    if os.path.exists(VOCAB_PATH):
+        with open(VOCAB_PATH, "rb") as f:
+            words = sorted(w for w in pickle.load(f) if 4 <= len(w) <= 12)
+    pairs = []
+    for _ in range(n):
+        word = rng.choice(words)
+        template = rng.choice(TEMPLATES)
+        correct = template.format(word)
+        wrong = template.format(misspell(word, rng)) if rng.random() < 0.5 else correct
+        pairs.append((wrong, correct))
+    return pairs
+
+
+def cpu(fn) -> float:
+    start = time.process_time()
+    fn()
+    return time.process_time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure spaCy CPU per spell check request, full vs trimmed pipelines")
+    parser.add_argument("--model", default=SPACY_MODEL)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    pairs = build_queries(args.queries, args.seed)
+
+    full = spacy.load(args.model)
+    full.add_pipe("sentencizer", first=True)
+
+    trimmed = _trimmed_spacy(args.model)
+
+    def old_flow():
+        for text, l1 in pairs:
+            full(text)
+            full(l1)
+
+    def new_flow():
+        for text, l1 in pairs:
+            doc = trimmed.make_doc(text)
+            trimmed(doc if doc.text == l1 else l1)
+
+    old_flow(), new_flow()  # warm up
+    old_s, new_s = cpu(old_flow), cpu(new_flow)
+    report = {
+        "model": args.model,
+        "full_pipes": full.pipe_names,
+        "trimmed_pipes": trimmed.pipe_names,
+        "queries": len(pairs),
+        "old_ms_per_request": round(old_s / len(pairs) * 1000, 3),
+        "new_ms_per_request": round(new_s / len(pairs) * 1000, 3),
+        "saved_ms_per_request": round((old_s - new_s) / len(pairs) * 1000, 3),
+        "speedup": round(old_s / max(new_s, 1e-9), 2),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,77 @@
 from typing import List, Optional, Dict, Any, Tuple
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
+import json
+import math
 import os
+import re
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks (Windows): each worker builds its own domain index
+    fcntl = None
+
+from candidate_lattice import Alternative, Lattice
+from degradation import DegradationController, disabled_layers
+from feedback_store import FeedbackEvent, open_store
+from micro_batch import MICROBATCH_ENABLED, MicroBatcher
+from model_loader import SPELL_OFFLINE, ParallelLoader, Unavailable, hf_cached, nltk_local, prefer_offline
+from quantized_models import INFERENCE_BACKEND, QUANTIZED_DIR, load_mlm_pipeline, load_sentence_model
+from tier_metrics import TierMetrics
+from token_cache import TokenCache, artifact_fingerprint
 
 # Layer deps (loaded lazily to keep import time small and allow graceful degradation)
 nlp = None
 contextual_spellcheck = None
 autocorrect_speller = None
 symspell = None
+english_words: frozenset = frozenset()  # SymSpell's English dictionary words (see _is_known_word)
 mlm_fill_mask = None
 sentence_model = None
+embedding_cache = None  # embedding_cache.EmbeddingCache around sentence_model
+# micro_batch.MicroBatcher workers that share MLM / embedding calls across concurrent requests
+mlm_batcher = None
+embed_batcher = None
+int8_models: set[str] = set()  # models served from quantized_models artifacts
 wordnet = None
-cosine_similarity = None
 np = None
-domain_vocab: set[str] = set()
+domain_vocab: set[str] = set()  # or the artifact's sorted, memory-mapped WordTable
+domain_index = None  # fuzzy_index.DeleteIndex over domain_vocab, mapped or built once at startup
+# layer-1 (corrector, token) -> result memo; cleared when the domain vocab is reloaded
+token_cache = TokenCache()
+# turns ContextualSpellCheck, MLM and embeddings off (in that order) under load
+degrader = DegradationController()
 torch = None
 torch_device_index: int = -1
 torch_device_str: str = "cpu"
 
 app = FastAPI(title="Spell Corrector Agent")
 
-# Initialize models on startup
+# Initialize models on startup (in the background, so /ready can report progress)
 @app.on_event("startup")
 async def startup_event():
     """Initialize models and show GPU configuration on startup"""
     print("Initializing Spell Corrector Agent...")
+    _feedback_store()
+    threading.Thread(target=_load_models, name="model-startup", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    # commit queued feedback and write the compacted boost snapshot
+    if feedback_store is not None:
+        feedback_store.close()
+
+
+def _load_models():
     _lazy_imports()
-    
+    report = model_loader.report()
+    states = {name: status["state"] for name, status in report["models"].items()}
+    print(f"Models loaded in {report['elapsed_s']:.1f}s: {states}")
+
     if torch is not None and torch.cuda.is_available():
         print(f"✅ GPU detected: {torch.cuda.get_device_name(0)}")
         print(f"✅ GPU memory: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.1f} GB")
@@ -57,6 +102,28 @@ class SpellCheckResponse(BaseModel):
     changed: bool
     candidates: List[SpellCandidate]
     notes: Optional[str] = None
+    # which tier answered: "clean" (vocabulary check), "token" (layer 1 only) or "full"
+    tier: Optional[str] = None
+
+
+# /check_batch limits: larger inputs stream NDJSON, processed in chunks of unique texts
+BATCH_MAX_TEXTS = int(os.getenv("SPELL_BATCH_MAX_TEXTS", "10000"))
+BATCH_STREAM_THRESHOLD = int(os.getenv("SPELL_BATCH_STREAM_THRESHOLD", "50"))
+BATCH_STREAM_CHUNK = int(os.getenv("SPELL_BATCH_STREAM_CHUNK", "64"))
+NLP_PIPE_BATCH_SIZE = int(os.getenv("SPELL_NLP_PIPE_BATCH_SIZE", "64"))
+
+
+class SpellCheckBatchRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_TEXTS)
+    top_k: int = Field(default=3, ge=1, le=10)
+    user_id: Optional[str] = None
+    # None: stream NDJSON when there are more than SPELL_BATCH_STREAM_THRESHOLD texts
+    stream: Optional[bool] = None
+
+
+class SpellCheckBatchResponse(BaseModel):
+    results: List[SpellCheckResponse]
+    unique: int
 
 
 class FeedbackRequest(BaseModel):
@@ -66,9 +133,46 @@ class FeedbackRequest(BaseModel):
     user_id: Optional[str] = None
 
 
-# Simple on-disk feedback store (append-only). In production, use DB.
-FEEDBACK_LOG = os.getenv("SPELL_FEEDBACK_LOG", os.path.join(os.path.dirname(__file__), "feedback.log"))
-USER_BOOSTS: Dict[str, Dict[str, int]] = {}
+# Domain vocab artifact built by build_domain_vocab.py (or `python fuzzy_index.py domain_vocab.pkl domain_vocab.idx`)
+DOMAIN_VOCAB_INDEX = os.getenv("SPELL_VOCAB_INDEX", os.path.join(os.path.dirname(__file__), "domain_vocab.idx"))
+DOMAIN_VOCAB_PICKLE = os.path.join(os.path.dirname(__file__), "domain_vocab.pkl")
+# How often /check looks for a rebuilt vocab artifact (0 disables the check)
+VOCAB_RELOAD_CHECK_S = float(os.getenv("SPELL_VOCAB_RELOAD_CHECK_S", "30"))
+
+# Feedback log / SQLite store with batched commits and boosts replayed at startup (see feedback_store)
+feedback_store = None
+_feedback_store_lock = threading.Lock()
+
+# Tiered pipeline: "tiered" answers clean and domain-only inputs early, "full" always runs all three layers
+SPELL_PIPELINE_MODE = os.getenv("SPELL_PIPELINE_MODE", "tiered").lower()
+# A word is "known" when a dictionary has seen it at least this often
+CLEAN_MIN_COUNT = int(os.getenv("SPELL_CLEAN_MIN_COUNT", "5"))
+# Domain vocab counts only when the artifact carries real frequencies (recipe text has typos too)
+CLEAN_MIN_DOMAIN_FREQ = int(os.getenv("SPELL_CLEAN_MIN_DOMAIN_FREQ", "3"))
+# ...and no word one edit away is this many times more frequent
+CLEAN_DOMINANCE = float(os.getenv("SPELL_CLEAN_DOMINANCE", "100"))
+tier_metrics = TierMetrics()
+TIER_NOTES = {
+    "clean": "tiered spell correction: all words known, models skipped",
+    "token": "tiered spell correction: domain fixes from preprocess layer",
+    "full": "layered spell correction (preprocess, context, domain rerank)",
+}
+MODE_NOTES = {
+    "no_contextual": "ContextualSpellCheck skipped",
+    "no_mlm": "ContextualSpellCheck and MLM skipped",
+    "no_embeddings": "ContextualSpellCheck, MLM and embedding rerank skipped",
+}
+domain_has_freqs: Optional[bool] = None
+
+_WORD_RE = re.compile(r"[A-Za-z]+")
+
+FOOD_GAZETTEER = {
+    "biryani","sushi","pho","ramen","tacos","pizza","pasta","paneer","shawarma","falafel","hummus","tandoori",
+    "naan","masala","idli","dosa","sambar","rasam","curry","kebab","bbq","brisket","kimchi","bibimbap",
+    "sashimi","ceviche","poutine","paella","risotto","gnocchi","burger","burgers","colombo",
+    # Sri Lankan places and dishes one edit away from common English words ("kandy" -> "sandy")
+    "kandy","galle","negombo","jaffna","kottu","roti","hoppers","lamprais","sambol","tikka"
+}
 
 
 def _clear_gpu_memory():
@@ -81,156 +185,359 @@ def _clear_gpu_memory():
             print(f"Warning: Could not clear GPU memory: {e}")
 
 
-def _lazy_imports():
-    global nlp, contextual_spellcheck, autocorrect_speller, symspell, mlm_fill_mask
-    global sentence_model, wordnet, cosine_similarity, np, torch, torch_device_index, torch_device_str
+MLM_MODEL = "bert-base-uncased"
+SENTENCE_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+CONTEXTUAL_MODEL = "bert-base-cased"  # loaded internally by contextualSpellCheck
+SPACY_MODEL = os.getenv("SPELL_SPACY_MODEL", "en_core_web_sm")
+# Layer 1 only needs tokens; ContextualSpellCheck reads entity types (PERSON/GPE/ORG) and
+# sentence boundaries, which the rule-based sentencizer sets instead of the parser
+SPACY_UNUSED_PIPES = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter", "morphologizer"]
 
-    if np is None:
-        import numpy as _np
-        globals()["np"] = _np
 
-    if cosine_similarity is None:
-        from sklearn.metrics.pairwise import cosine_similarity as _cos
-        globals()["cosine_similarity"] = _cos
+def _load_autocorrect():
+    from autocorrect import Speller as _Speller
+    globals()["autocorrect_speller"] = _Speller(lang="en")
 
-    if autocorrect_speller is None:
-        try:
-            from autocorrect import Speller as _Speller
-            globals()["autocorrect_speller"] = _Speller(lang="en")
-        except Exception:
-            globals()["autocorrect_speller"] = None
 
-    # Torch and device selection with enhanced GPU support
-    if torch is None:
+def _load_torch():
+    global torch_device_index, torch_device_str
+    import torch as _torch
+    globals()["torch"] = _torch
+
+    # Enhanced GPU detection and configuration
+    if _torch.cuda.is_available():
+        torch_device_index = 0
+        torch_device_str = "cuda:0"
+        # Set memory management for better GPU utilization
+        _torch.cuda.empty_cache()
+        print(f"GPU detected: {_torch.cuda.get_device_name(0)}")
+        print(f"GPU memory: {_torch.cuda.get_device_properties(0).total_memory / 1024**3:.1f} GB")
+    else:
+        torch_device_index = -1
+        torch_device_str = "cpu"
+        print("CUDA not available, using CPU")
+
+
+def _english_words(dict_path: str) -> frozenset:
+    """Words of SymSpell's English frequency dictionary (the copy symspellpy ships when there is
+    none next to this file). Only the words are read; the dictionary is not loaded into SymSpell."""
+    if not os.path.exists(dict_path):
+        import symspellpy
+        dict_path = os.path.join(os.path.dirname(symspellpy.__file__), os.path.basename(dict_path))
+    if not os.path.exists(dict_path):
+        return frozenset()
+    with open(dict_path, encoding="utf-8") as f:
+        return frozenset(line.split(" ", 1)[0] for line in f)
+
+
+def _load_symspell():
+    from symspellpy import SymSpell, Verbosity
+    sym = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
+    # load frequency dictionary if present next to this file
+    dict_path = os.path.join(os.path.dirname(__file__), "frequency_dictionary_en_82_765.txt")
+    if os.path.exists(dict_path):
+        sym.load_dictionary(dict_path, term_index=0, count_index=1)
+    globals()["english_words"] = _english_words(dict_path)
+    # recipe-corpus term counts from build_domain_vocab.py, added to the English counts
+    domain_dict_path = os.path.join(os.path.dirname(__file__), "domain_frequency_dictionary.txt")
+    if os.path.exists(domain_dict_path):
+        sym.load_dictionary(domain_dict_path, term_index=0, count_index=1)
+    globals()["symspell"] = (sym, Verbosity)
+
+
+def _trimmed_spacy(model: str = SPACY_MODEL):
+    import spacy as _spacy
+    _nlp = _spacy.load(model, exclude=SPACY_UNUSED_PIPES)
+    if "tok2vec" in _nlp.pipe_names and not _nlp.get_pipe("tok2vec").listening_components:
+        _nlp.remove_pipe("tok2vec")  # en_core_web_sm's ner has its own embedding layer
+    # ContextualSpellCheck reads token.sent (spaCy E030 without sentence boundaries)
+    _nlp.add_pipe("sentencizer", first=True)
+    return _nlp
+
+
+def _load_spacy():
+    # Layer 1 runs only the tokenizer (nlp.make_doc / nlp.tokenizer.pipe); the full nlp() is
+    # reserved for layer 2, where it is NER + ContextualSpellCheck
+    _nlp = _trimmed_spacy(SPACY_MODEL)
+    # Add food-specific extensions: simple gazetteer for cuisines/foods
+    from spacy.matcher import PhraseMatcher
+    matcher = PhraseMatcher(_nlp.vocab, attr="LOWER")
+    food_terms = [
+        "biryani","sushi","pho","ramen","tacos","pizza","pasta","paneer",
+        "shawarma","falafel","hummus","tandoori","naan","masala","idli",
+        "dosa","sambar","rasam","curry","kebab","bbq","brisket","kimchi",
+        "bibimbap","sashimi","ceviche","poutine","paella","risotto","gnocchi",
+        "burger","burgers"
+    ]
+    patterns = [ _nlp.make_doc(t) for t in food_terms ]
+    matcher.add("FOOD_TERMS", patterns)
+    _nlp.matcher = matcher  # attach for later use
+    globals()["nlp"] = _nlp
+
+
+def _load_contextual_spellcheck():
+    if nlp is None:
+        raise Unavailable("spaCy pipeline not loaded")
+    if os.getenv("HF_HUB_OFFLINE") == "1" and not hf_cached(CONTEXTUAL_MODEL):
+        raise Unavailable(f"{CONTEXTUAL_MODEL} not in local cache")
+    import contextualSpellCheck as _csc
+    _csc.add_to_pipe(nlp)
+    globals()["contextual_spellcheck"] = _csc
+
+
+def _use_int8() -> bool:
+    if INFERENCE_BACKEND != "int8":
+        return False
+    if torch_device_str.startswith("cuda"):
+        print("SPELL_INFERENCE_BACKEND=int8 is CPU-only; using the regular models on GPU.")
+        return False
+    return True
+
+
+def _load_mlm():
+    if _use_int8():
         try:
-            import torch as _torch
-            globals()["torch"] = _torch
-            
-            # Enhanced GPU detection and configuration
-            if _torch.cuda.is_available():
-                torch_device_index = 0
-                torch_device_str = "cuda:0"
-                # Set memory management for better GPU utilization
-                _torch.cuda.empty_cache()
-                print(f"GPU detected: {_torch.cuda.get_device_name(0)}")
-                print(f"GPU memory: {_torch.cuda.get_device_properties(0).total_memory / 1024**3:.1f} GB")
-            else:
-                torch_device_index = -1
-                torch_device_str = "cpu"
-                print("CUDA not available, using CPU")
+            globals()["mlm_fill_mask"] = load_mlm_pipeline()
+            if mlm_fill_mask is not None:
+                int8_models.add("mlm")
+                print(f"MLM model loaded from int8 artifacts in {QUANTIZED_DIR}")
+                return
+            print(f"No int8 MLM artifact in {QUANTIZED_DIR}, falling back to transformers.")
         except Exception as e:
-            print(f"Error initializing torch: {e}")
-            globals()["torch"] = None
-            torch_device_index = -1
-            torch_device_str = "cpu"
+            print(f"Error loading int8 MLM model, falling back to transformers: {e}")
+
+    local = hf_cached(MLM_MODEL)
+    if not local and SPELL_OFFLINE:
+        raise Unavailable(f"{MLM_MODEL} not in local cache")
+    from transformers import AutoModelForMaskedLM, AutoTokenizer, pipeline as _pipeline
+    # Enhanced GPU device handling for MLM
+    if torch_device_str.startswith("cuda"):
+        device_arg = 0  # Use GPU 0
+        print("Loading MLM model on GPU...")
+    else:
+        device_arg = -1  # Use CPU
+        print("Loading MLM model on CPU...")
 
-    if symspell is None:
-        try:
-            from symspellpy import SymSpell, Verbosity
-            sym = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
-            # load frequency dictionary if present next to this file
-            dict_path = os.path.join(os.path.dirname(__file__), "frequency_dictionary_en_82_765.txt")
-            if os.path.exists(dict_path):
-                sym.load_dictionary(dict_path, term_index=0, count_index=1)
-            globals()["symspell"] = (sym, Verbosity)
-        except Exception:
-            globals()["symspell"] = None
+    dtype = torch.float16 if torch_device_str.startswith("cuda") else torch.float32
+    globals()["mlm_fill_mask"] = _pipeline(
+        "fill-mask",
+        model=AutoModelForMaskedLM.from_pretrained(MLM_MODEL, torch_dtype=dtype, local_files_only=local),
+        tokenizer=AutoTokenizer.from_pretrained(MLM_MODEL, local_files_only=local),
+        device=device_arg
+    )
+    print(f"MLM model loaded on {torch_device_str}")
 
-    if nlp is None:
-        try:
-            import spacy as _spacy
-            _nlp = _spacy.load("en_core_web_sm")
-            # Add food-specific extensions: simple gazetteer for cuisines/foods
-            from spacy.matcher import PhraseMatcher
-            matcher = PhraseMatcher(_nlp.vocab, attr="LOWER")
-            food_terms = [
-                "biryani","sushi","pho","ramen","tacos","pizza","pasta","paneer",
-                "shawarma","falafel","hummus","tandoori","naan","masala","idli",
-                "dosa","sambar","rasam","curry","kebab","bbq","brisket","kimchi",
-                "bibimbap","sashimi","ceviche","poutine","paella","risotto","gnocchi",
-                "burger","burgers"
-            ]
-            patterns = [ _nlp.make_doc(t) for t in food_terms ]
-            matcher.add("FOOD_TERMS", patterns)
-            _nlp.add_pipe("sentencizer", first=True)
-            _nlp.get_pipe("sentencizer")
-            _nlp.matcher = matcher  # attach for later use
-            globals()["nlp"] = _nlp
-        except Exception:
-            globals()["nlp"] = None
-
-    if contextual_spellcheck is None and nlp is not None:
-        try:
-            import contextualSpellCheck as _csc
-            _csc.add_to_pipe(nlp)
-            globals()["contextual_spellcheck"] = _csc
-        except Exception:
-            globals()["contextual_spellcheck"] = None
 
-    if mlm_fill_mask is None:
+def _load_sentence_model():
+    if _use_int8():
         try:
-            from transformers import pipeline as _pipeline
-            # Enhanced GPU device handling for MLM
-            if torch_device_str.startswith("cuda"):
-                device_arg = 0  # Use GPU 0
-                print("Loading MLM model on GPU...")
-            else:
-                device_arg = -1  # Use CPU
-                print("Loading MLM model on CPU...")
-            
-            globals()["mlm_fill_mask"] = _pipeline(
-                "fill-mask", 
-                model="bert-base-uncased", 
-                device=device_arg,
-                torch_dtype=torch.float16 if torch_device_str.startswith("cuda") else torch.float32
-            )
-            print(f"MLM model loaded on {torch_device_str}")
+            globals()["sentence_model"] = load_sentence_model()
+            if sentence_model is not None:
+                int8_models.add("sentence_transformer")
+                print(f"Sentence transformer loaded from int8 artifacts in {QUANTIZED_DIR}")
+                return
+            print(f"No int8 sentence model artifact in {QUANTIZED_DIR}, falling back to sentence-transformers.")
         except Exception as e:
-            print(f"Error loading MLM model: {e}")
-            globals()["mlm_fill_mask"] = None
-
+            print(f"Error loading int8 sentence model, falling back to sentence-transformers: {e}")
+
+    local = hf_cached(SENTENCE_MODEL)
+    if not local and SPELL_OFFLINE:
+        raise Unavailable(f"{SENTENCE_MODEL} not in local cache")
+    from sentence_transformers import SentenceTransformer as _ST
+    print(f"Loading sentence transformer on {torch_device_str}...")
+    globals()["sentence_model"] = _ST(
+        SENTENCE_MODEL,
+        device=torch_device_str,
+        local_files_only=local
+    )
+    print(f"Sentence transformer loaded on {torch_device_str}")
+
+
+def _load_embedding_cache():
     if sentence_model is None:
+        raise Unavailable("sentence transformer not loaded")
+    from embedding_cache import EmbeddingCache, load_vocab_embeddings
+    seed_words, seed_matrix = load_vocab_embeddings()
+    globals()["embedding_cache"] = EmbeddingCache(
+        lambda texts: sentence_model.encode(texts, batch_size=64),
+        seed_words=seed_words, seed_matrix=seed_matrix,
+    )
+    print(f"Embedding cache ready ({len(seed_words or [])} precomputed vocab embeddings).")
+
+
+def _start_batchers():
+    global mlm_batcher, embed_batcher
+    if not MICROBATCH_ENABLED:
+        raise Unavailable("SPELL_MICROBATCH=0")
+    if mlm_batcher is None and mlm_fill_mask is not None:
+        from mlm_scoring import pll_scores
+        mlm_batcher = MicroBatcher(
+            lambda sentences: pll_scores(mlm_fill_mask.model, mlm_fill_mask.tokenizer, sentences), "mlm",
+            on_wait=degrader.record_wait,
+        )
+    if embed_batcher is None and embedding_cache is not None:
+        embed_batcher = MicroBatcher(embedding_cache.encode, "embeddings", on_wait=degrader.record_wait)
+
+
+def _load_wordnet():
+    import nltk
+    # nltk.download needs the network and can hang startup; only fetch when missing and allowed
+    if not nltk_local("corpora/wordnet"):
+        if SPELL_OFFLINE:
+            raise Unavailable("wordnet corpus not in NLTK data path")
+        nltk.download("wordnet", quiet=True)
+    from nltk.corpus import wordnet as _wn
+    _wn.ensure_loaded()
+    globals()["wordnet"] = _wn
+
+
+def _map_domain_index() -> bool:
+    """Map the prebuilt artifact (sorted vocab + frequencies + fuzzy index) unless it is missing or stale."""
+    global domain_vocab, domain_index, _vocab_fingerprint
+    from fuzzy_index import DeleteIndex
+    try:
+        if not os.path.exists(DOMAIN_VOCAB_INDEX):
+            return False
+        if os.path.exists(DOMAIN_VOCAB_PICKLE) and os.path.getmtime(DOMAIN_VOCAB_PICKLE) > os.path.getmtime(DOMAIN_VOCAB_INDEX):
+            print(f"{DOMAIN_VOCAB_INDEX} is older than domain_vocab.pkl, ignoring it.")
+            return False
+        start = time.perf_counter()
+        fingerprint = artifact_fingerprint([DOMAIN_VOCAB_INDEX, DOMAIN_VOCAB_PICKLE])
+        domain_index = DeleteIndex.load(DOMAIN_VOCAB_INDEX)
+        domain_vocab = domain_index.words
+        _vocab_fingerprint = fingerprint
+        print(f"Mapped {os.path.basename(DOMAIN_VOCAB_INDEX)} with {len(domain_vocab)} words "
+              f"in {(time.perf_counter() - start) * 1000:.1f}ms.")
+        return True
+    except Exception as e:
+        print("Failed to map domain vocab artifact:", e)
+        domain_index = None
+        return False
+
+
+def _build_domain_index_once() -> bool:
+    """Build the artifact from domain_vocab.pkl for every worker at once, then map it.
+
+    The first worker to take DOMAIN_VOCAB_INDEX.lock builds and saves the artifact
+    (about 7 s for the full vocabulary); the others wait for it and map the same
+    file instead of each building and holding their own index.
+    """
+    from fuzzy_index import DeleteIndex
+    try:
+        lock = open(DOMAIN_VOCAB_INDEX + ".lock", "a")
+    except OSError as e:
+        print(f"Cannot write next to {DOMAIN_VOCAB_INDEX}: {e}")
+        return False
+    with lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        # another worker may have saved it while this one waited
+        if _map_domain_index():
+            return True
         try:
-            from sentence_transformers import SentenceTransformer as _ST
-            print(f"Loading sentence transformer on {torch_device_str}...")
-            globals()["sentence_model"] = _ST(
-                "all-MiniLM-L6-v2",
-                device=torch_device_str
-            )
-            print(f"Sentence transformer loaded on {torch_device_str}")
+            start = time.perf_counter()
+            DeleteIndex.build(domain_vocab).save(DOMAIN_VOCAB_INDEX)
+            print(f"Built {os.path.basename(DOMAIN_VOCAB_INDEX)} in {time.perf_counter() - start:.1f}s.")
         except Exception as e:
-            print(f"Error loading sentence transformer: {e}")
-            globals()["sentence_model"] = None
+            print("Failed to save domain vocab artifact:", e)
+            return False
+        return _map_domain_index()
 
-    if wordnet is None:
-        try:
-            import nltk
-            nltk.download("wordnet", quiet=True)
-            from nltk.corpus import wordnet as _wn
-            globals()["wordnet"] = _wn
-        except Exception:
-            globals()["wordnet"] = None
 
+def _load_domain_vocab():
     # domain vocabulary: foods and key locations the app cares about
-    global domain_vocab
-    if not domain_vocab:
+    global domain_vocab, domain_index, _vocab_fingerprint
+    from fuzzy_index import DeleteIndex
+    vocab_path = DOMAIN_VOCAB_PICKLE
+    _vocab_fingerprint = artifact_fingerprint([DOMAIN_VOCAB_INDEX, vocab_path])
+    # prebuilt artifact, memory-mapped and shared by workers
+    if _map_domain_index():
+        return
+
+    try:
+        import pickle
+        if os.path.exists(vocab_path):
+            with open(vocab_path, "rb") as f:
+                domain_vocab = pickle.load(f)
+            print(f"Loaded domain_vocab.pkl with {len(domain_vocab)} words.")
+            if _build_domain_index_once():
+                return
+        else:
+            # fallback to small hardcoded set if pickle not found
+            domain_vocab = set([
+                "burger","burgers","sushi","pizza","pasta","biryani","ramen","tacos","curry","kebab",
+                "colombo","new york","san francisco","london","paris","tokyo","bangalore","mumbai","delhi"
+            ])
+            print("domain_vocab.pkl not found, using default small vocab.")
+    except Exception as e:
+        print("Failed to load domain_vocab.pkl:", e)
+        domain_vocab = set()
+
+    if domain_vocab:
         try:
-            import pickle
-            vocab_path = os.path.join(os.path.dirname(__file__), "domain_vocab.pkl")
-            if os.path.exists(vocab_path):
-                with open(vocab_path, "rb") as f:
-                    domain_vocab = pickle.load(f)
-                print(f"Loaded domain_vocab.pkl with {len(domain_vocab)} words.")
-            else:
-                # fallback to small hardcoded set if pickle not found
-                domain_vocab = set([
-                    "burger","burgers","sushi","pizza","pasta","biryani","ramen","tacos","curry","kebab",
-                    "colombo","new york","san francisco","london","paris","tokyo","bangalore","mumbai","delhi"
-                ])
-                print("domain_vocab.pkl not found, using default small vocab.")
+            start = time.perf_counter()
+            domain_index = DeleteIndex.build(domain_vocab)
+            print(f"Built domain vocab fuzzy index in {time.perf_counter() - start:.1f}s.")
         except Exception as e:
-            print("Failed to load domain_vocab.pkl:", e)
-            domain_vocab = set()
+            # _nearest_domain_word falls back to a full scan
+            print("Failed to build domain vocab index:", e)
+            domain_index = None
+
+
+# name -> (loader, dependencies); independent entries load in parallel threads
+model_loader = ParallelLoader({
+    "autocorrect": (_load_autocorrect, ()),
+    "symspell": (_load_symspell, ()),
+    "torch": (_load_torch, ()),
+    "spacy": (_load_spacy, ()),
+    "contextual_spellcheck": (_load_contextual_spellcheck, ("spacy", "torch")),
+    "mlm": (_load_mlm, ("torch",)),
+    "sentence_transformer": (_load_sentence_model, ("torch",)),
+    "embedding_cache": (_load_embedding_cache, ("sentence_transformer",)),
+    "micro_batching": (_start_batchers, ("mlm", "embedding_cache")),
+    "wordnet": (_load_wordnet, ()),
+    "domain_vocab": (_load_domain_vocab, ()),
+})
+
+
+_vocab_fingerprint: Tuple = ()  # artifact files the loaded domain vocab came from
+_vocab_checked_at = 0.0
+_vocab_reload_lock = threading.Lock()
+
+
+def _reload_domain_vocab_if_changed():
+    """Reload the domain vocab in the background when its artifact was rebuilt on disk."""
+    global _vocab_checked_at
+    now = time.monotonic()
+    if VOCAB_RELOAD_CHECK_S <= 0 or not model_loader.done or now - _vocab_checked_at < VOCAB_RELOAD_CHECK_S:
+        return
+    _vocab_checked_at = now
+    if artifact_fingerprint([DOMAIN_VOCAB_INDEX, DOMAIN_VOCAB_PICKLE]) == _vocab_fingerprint:
+        return
+    if not _vocab_reload_lock.acquire(blocking=False):
+        return  # already reloading
+
+    def reload():
+        try:
+            print("Domain vocab artifact changed on disk, reloading.")
+            _load_domain_vocab()
+            # memoized domain lookups were made against the old vocab
+            token_cache.clear()
+        finally:
+            _vocab_reload_lock.release()
+
+    threading.Thread(target=reload, name="vocab-reload", daemon=True).start()
+
+
+def _lazy_imports():
+    """Load every model once (see model_loader); later and concurrent calls wait for that load."""
+    global np
+    if np is None:
+        import numpy as _np
+        np = _np
+    if not model_loader.done:
+        prefer_offline([MLM_MODEL, SENTENCE_MODEL, CONTEXTUAL_MODEL])
+    model_loader.run_once()
 
 
 def _levenshtein(a: str, b: str) -> int:
@@ -251,10 +558,18 @@ def _levenshtein(a: str, b: str) -> int:
 
 
 def _nearest_domain_word(token: str) -> Optional[str]:
+    """Closest domain word within edit distance 2 (ties resolved alphabetically)."""
+    if domain_index is not None:
+        return domain_index.nearest(token.lower())
+    return _nearest_domain_word_scan(token)
+
+
+def _nearest_domain_word_scan(token: str) -> Optional[str]:
+    """Reference full scan over domain_vocab; used when the index is unavailable."""
     t = token.lower()
     best = None
     best_d = 10**9
-    for w in domain_vocab:
+    for w in sorted(domain_vocab):
         d = _levenshtein(t, w)
         if d < best_d:
             best_d = d
@@ -266,171 +581,297 @@ def _nearest_domain_word(token: str) -> Optional[str]:
     return None
 
 
-def _token_level_preprocess(text: str) -> Tuple[str, List[str]]:
+def _edits1(word: str) -> set[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    deletes = [l + r[1:] for l, r in splits if r]
+    transposes = [l + r[1] + r[0] + r[2:] for l, r in splits if len(r) > 1]
+    replaces = [l + c + r[1:] for l, r in splits if r for c in letters]
+    inserts = [l + c + r for l, r in splits for c in letters]
+    return set(deletes + transposes + replaces + inserts) - {word}
+
+
+def _frequency_lists() -> List[Dict[str, int]]:
+    lists = []
+    if autocorrect_speller is not None:
+        lists.append(autocorrect_speller.nlp_data)
+    if symspell is not None:
+        lists.append(symspell[0].words)
+    return lists
+
+
+def _dictionary_count(low: str) -> int:
+    return max((counts.get(low, 0) for counts in _frequency_lists()), default=0)
+
+
+def _is_known_word(low: str) -> bool:
+    """Cheap vocabulary check used to skip the model layers for clean input.
+
+    SymSpell's English dictionary has no misspellings, so its words always count.
+    Autocorrect's frequency list contains common misspellings too ("thier"), so
+    other words only count when no word one edit away is CLEAN_DOMINANCE times
+    more frequent in the same list (the lists count on different scales).
+    """
+    if low in FOOD_GAZETTEER or low in english_words:
+        return True
+    for counts in _frequency_lists():
+        count = counts.get(low, 0)
+        if count >= CLEAN_MIN_COUNT and all(counts.get(e, 0) <= CLEAN_DOMINANCE * count for e in _edits1(low)):
+            return True
+    freq = _domain_frequency(low)
+    if freq >= CLEAN_MIN_DOMAIN_FREQ:
+        return all(domain_index.frequency(w) <= CLEAN_DOMINANCE * freq
+                   for w, d in domain_index.lookup(low, 1) if d == 1)
+    return False
+
+
+def _domain_frequency(low: str) -> int:
+    """Recipe-corpus count of a word; 0 when the vocab artifact carries no real frequencies."""
+    global domain_has_freqs
+    if domain_index is None:
+        return 0
+    if domain_has_freqs is None:
+        # artifacts compiled from the old pickle store 1 for every word
+        domain_has_freqs = int(domain_index.freqs.max()) > 1
+    return domain_index.frequency(low) if domain_has_freqs else 0
+
+
+def _domain_only_fixes(original: str, corrected: str) -> bool:
+    """True when layer 1 only rewrote unknown words into domain words and everything else is known."""
+    before = [w.lower() for w in _WORD_RE.findall(original)]
+    after = [w.lower() for w in _WORD_RE.findall(corrected)]
+    if len(before) != len(after) or before == after:
+        return False
+    for b, a in zip(before, after):
+        if b == a:
+            if not _is_known_word(b):
+                return False
+        elif _is_known_word(b) or _nearest_domain_word(b) != a:
+            # a real word was rewritten, or the fix is not the closest domain word: let the model layers decide
+            return False
+    return True
+
+
+def _feedback_store():
+    global feedback_store
+    if feedback_store is None:
+        with _feedback_store_lock:
+            if feedback_store is None:
+                start = time.perf_counter()
+                store = open_store()
+                print(f"Feedback store ({store.backend}) replayed {store.replayed} events "
+                      f"in {(time.perf_counter() - start) * 1000:.1f}ms.")
+                feedback_store = store
+    return feedback_store
+
+
+def _user_boosts(user_id: Optional[str]) -> Dict[str, float]:
+    return _feedback_store().boosts(user_id)
+
+
+def _apply_user_boosts(scored: List[Tuple[str, float, str]], user_id: Optional[str], top_k: int) -> List[Tuple[str, float, str]]:
+    user_boost = _user_boosts(user_id)
+    boosted = [(c, s + 0.02 * user_boost.get(c.lower(), 0), src) for c, s, src in scored]
+    boosted.sort(key=lambda x: x[1], reverse=True)
+    return boosted[:top_k]
+
+
+def _autocorrect_token(tok: str) -> str:
+    try:
+        return autocorrect_speller(tok)
+    except Exception:
+        return tok
+
+
+def _symspell_terms(tok: str) -> Tuple[str, ...]:
+    sym, Verbosity = symspell
+    try:
+        suggs = sym.lookup(tok, Verbosity.CLOSEST, max_edit_distance=2)
+        return tuple(s.term for s in suggs[:3])
+    except Exception:
+        return ()
+
+
+# Common misspellings the generic correctors get wrong
+CUSTOM_FIXES = {"berger": "burger", "colmobo": "colombo"}
+# Cheap per-token scores for the layer-1 lattice
+# per corrector proposing an alternative (SymSpell's k-th suggestion gets 1/k)
+LATTICE_VOTES = {"autocorrect": 1.0, "symspell": 1.0, "domain": 1.0, "custom": 4.0}
+LATTICE_EDIT_WEIGHT = 0.3     # per edit away from the typed token
+LATTICE_FREQ_WEIGHT = 0.05    # per log10 of dictionary count
+LATTICE_DOMAIN_BONUS = 0.5    # alternative is a domain word (and not a likely corpus typo)
+LATTICE_KNOWN_BONUS = 1.5     # typed token is already a known word: keep it (see _token_alternatives)
+LATTICE_PAIR_BONUS = 0.5      # adjacent pair forms a domain phrase ("new york")
+
+
+def _in_domain(low: str) -> bool:
+    return low in FOOD_GAZETTEER or low in domain_vocab
+
+
+def _domain_typo(low: str) -> bool:
+    """Domain word that is likely a corpus typo: a word one edit away is CLEAN_DOMINANCE times
+    more frequent (recipe text has "chiken" and "tomatos" too)."""
+    if low in FOOD_GAZETTEER:
+        return False
+    count = max(_dictionary_count(low), _domain_frequency(low))
+    return any(_dictionary_count(e) > CLEAN_DOMINANCE * max(count, 1) for e in _edits1(low))
+
+
+def _token_alternatives(tok: str) -> List[Alternative]:
+    """Scored alternatives for one typed token: the token itself plus the proposals of
+    Autocorrect, SymSpell (on the Autocorrect output), the custom fixes and the domain vocab."""
+    low = tok.lower()
+    if low in FOOD_GAZETTEER or not _WORD_RE.fullmatch(tok):
+        return [Alternative(tok, 0.0, ("original",))]
+
+    votes: Dict[str, float] = {low: 0.0}
+    sources: Dict[str, List[str]] = {low: ["original"]}
+    forms: Dict[str, str] = {low: tok}
+
+    def propose(alt: Optional[str], source: str, weight: float = 1.0) -> None:
+        if not alt:
+            return
+        key = alt.lower()
+        if source == "domain" and key == low:
+            return  # a domain word is its own nearest domain word; that is not a correction
+        votes[key] = votes.get(key, 0.0) + LATTICE_VOTES[source] * weight
+        sources.setdefault(key, []).append(source)
+        forms.setdefault(key, alt)
+
+    corrected = tok
+    if autocorrect_speller is not None:
+        corrected = token_cache.lookup("autocorrect", tok, lambda: _autocorrect_token(tok))
+        propose(corrected, "autocorrect")
+    if symspell is not None:
+        terms = token_cache.lookup("symspell", corrected, lambda: _symspell_terms(corrected))
+        for rank, term in enumerate(terms):
+            propose(term, "symspell", 1.0 / (rank + 1))
+        if terms and terms[0].lower() != low:
+            top = terms[0].lower()
+            propose(token_cache.lookup("domain", top, lambda: _nearest_domain_word(top)), "domain")
+    propose(CUSTOM_FIXES.get(low), "custom")
+    propose(token_cache.lookup("domain", low, lambda: _nearest_domain_word(tok)), "domain")
+
+    known = token_cache.lookup("known", low, lambda: _is_known_word(low))
+    if not known and _in_domain(low):
+        # a domain word counts as known unless it looks like a typo of a more frequent word
+        known = not token_cache.lookup("domain_typo", low, lambda: _domain_typo(low))
+    scores: Dict[str, float] = {}
+    for key, vote in votes.items():
+        words = key.split()
+        score = vote - LATTICE_EDIT_WEIGHT * min(_levenshtein(low, key), 3)
+        score += LATTICE_FREQ_WEIGHT * sum(math.log10(1 + _dictionary_count(w)) for w in words) / max(len(words), 1)
+        if _in_domain(key) and not token_cache.lookup("domain_typo", key, lambda: _domain_typo(key)):
+            score += LATTICE_DOMAIN_BONUS
+        if key == low and known:
+            score += LATTICE_KNOWN_BONUS
+        scores[key] = score
+    if known and CUSTOM_FIXES.get(low) is None:
+        # layer 1 never rewrites a known word ("sluice" is not "slice"): the domain and frequency
+        # bonuses of its neighbours only rank them as hypotheses for the model layers, and the
+        # pair bonus (at most 2 * LATTICE_PAIR_BONUS) cannot close this gap
+        scores[low] = max(scores[low], max(scores.values()) + LATTICE_KNOWN_BONUS)
+    return [Alternative(forms[key], score, tuple(sources[key])) for key, score in scores.items()]
+
+
+def _domain_pair_bonus(prev: str, tok: str) -> float:
+    return LATTICE_PAIR_BONUS if f"{prev} {tok}".lower() in domain_vocab else 0.0
+
+
+def _token_level_preprocess(text: str, doc=None) -> Tuple[str, List[str]]:
     """Layer 1: spaCy + Autocorrect + SymSpell to propose low-level fixes.
-    Returns corrected text and list of candidate strings.
+    Returns the best whole-sentence hypothesis and the top hypotheses (whole
+    sentences only) for the model layers; see candidate_lattice.
+    `doc` is an already tokenized text (see _tokenize). Per-token results of the
+    three correctors are memoized across requests in token_cache.
     """
     _lazy_imports()
 
-    candidates: set[str] = set()
-    current = text
-
-    # spaCy tokenization and simple food-aware keep-words
-    tokens: List[str] = []
-    keep_lower = set()
+    # spaCy tokenization (food gazetteer tokens are kept as typed, see _token_alternatives)
     if nlp is not None:
-        doc = nlp(text)
+        if doc is None:
+            doc = nlp.make_doc(text)
         tokens = [t.text for t in doc]
-        # protect detected food terms from over-correction
-        for match_id, start, end in getattr(nlp, "matcher", []):
-            pass  # fallback to no-op if matcher not iterable
-        # simple heuristic: keep any token that is entirely alphabetic and in our food gazetteer
-        gazetteer = {"biryani","sushi","pho","ramen","tacos","pizza","pasta","paneer","shawarma","falafel","hummus","tandoori","naan","masala","idli","dosa","sambar","rasam","curry","kebab","bbq","brisket","kimchi","bibimbap","sashimi","ceviche","poutine","paella","risotto","gnocchi","burger","burgers","colombo"}
-        keep_lower = gazetteer
     else:
         tokens = text.split()
 
-    # Autocorrect pass
-    if autocorrect_speller is not None:
-        auto_tokens = []
-        for tok in tokens:
-            if tok.lower() in keep_lower:
-                auto_tokens.append(tok)
-                continue
-            try:
-                auto_tokens.append(autocorrect_speller(tok))
-            except Exception:
-                auto_tokens.append(tok)
-        current = " ".join(auto_tokens)
+    lattice = Lattice()
+    for tok in tokens:
+        lattice.add_position(token_cache.lookup("lattice", tok, lambda: _token_alternatives(tok)))
+    hypotheses = lattice.beam_search(pair_bonus=_domain_pair_bonus)
+    if not hypotheses:
+        return text, [text]
+    return hypotheses[0].text, [h.text for h in hypotheses]
 
-    # SymSpell candidates per token
-    if symspell is not None:
-        sym, Verbosity = symspell
-        sym_tokens = []
-        for tok in current.split():
-            if tok.lower() in keep_lower:
-                sym_tokens.append(tok)
-                continue
-            try:
-                suggs = sym.lookup(tok, Verbosity.CLOSEST, max_edit_distance=2)
-                if suggs:
-                    best = suggs[0].term
-                    sym_tokens.append(best)
-                    for s in suggs[:3]:
-                        candidates.add(s.term)
-                else:
-                    sym_tokens.append(tok)
-            except Exception:
-                sym_tokens.append(tok)
-        current = " ".join(sym_tokens)
-
-    # Custom common misspellings and domain nearest-neighbor fallback
-    custom_map = {"berger": "burger", "colmobo": "colombo"}
-    final_tokens = []
-    for tok in current.split():
-        low = tok.lower()
-        if low in keep_lower:
-            final_tokens.append(tok)
-            continue
-        if low in custom_map:
-            final_tokens.append(custom_map[low])
-            candidates.add(custom_map[low])
-            continue
-        # domain nearest neighbor
-        nd = _nearest_domain_word(tok)
-        if nd is not None and nd != low:
-            final_tokens.append(nd)
-            candidates.add(nd)
-        else:
-            final_tokens.append(tok)
-    current = " ".join(final_tokens)
 
-    # aggregate token-level variant
-    candidates.add(current)
-    return current, list(candidates)
+def _mlm_scores(sentences: List[str]) -> List[float]:
+    from mlm_scoring import pll_scores
+    if mlm_batcher is not None:
+        return list(mlm_batcher.submit(sentences))
+    return pll_scores(mlm_fill_mask.model, mlm_fill_mask.tokenizer, sentences)
 
 
-def _context_aware(text: str, candidates: List[str]) -> List[Tuple[str, float, str]]:
+def _context_aware(text: str, candidates: List[str], doc=None) -> List[Tuple[str, float, str]]:
     """Layer 2: Contextual scoring via BERT MLM and ContextualSpellCheck.
     Returns list of (candidate, score, source).
     """
+    return _context_aware_batch([text], [candidates], [doc])[0]
+
+
+def _context_aware_batch(texts: List[str], candidate_lists: List[List[str]], docs: Optional[List[Any]] = None,
+                         skip: Tuple[str, ...] = ()) -> List[List[Tuple[str, float, str]]]:
+    """Layer 2 over several texts: ContextualSpellCheck per (pre-parsed) doc, then
+    one pseudo-log-likelihood pass over the union of all candidates.
+    `skip` names layers turned off under load ("contextual", "mlm")."""
     _lazy_imports()
-    scored: List[Tuple[str, float, str]] = []
+    docs = docs or [None] * len(texts)
+    scored_lists: List[List[Tuple[str, float, str]]] = [[] for _ in texts]
 
     # ContextualSpellCheck suggestion
-    if contextual_spellcheck is not None and nlp is not None:
-        try:
-            doc = nlp(text)
-            if hasattr(doc._, "has_spellCheck") and doc._.has_spellCheck:
-                ctx = doc._.outcome_spellCheck
-                if ctx and ctx != text:
-                    scored.append((ctx, 0.6, "ContextualSpellCheck"))
-                    candidates.append(ctx)
-        except Exception:
-            pass
+    if contextual_spellcheck is not None and nlp is not None and "contextual" not in skip:
+        for text, candidates, doc, scored in zip(texts, candidate_lists, docs, scored_lists):
+            try:
+                if doc is None:
+                    doc = nlp(text)
+                if hasattr(doc._, "has_spellCheck") and doc._.has_spellCheck:
+                    ctx = doc._.outcome_spellCheck
+                    if ctx and ctx != text:
+                        scored.append((ctx, 0.6, "ContextualSpellCheck"))
+                        candidates.append(ctx)
+            except Exception:
+                pass
 
     # MLM-based rescoring: prefer candidates closer to masked-lm likelihood
-    if mlm_fill_mask is not None:
+    if mlm_fill_mask is not None and "mlm" not in skip:
         try:
             # Clear GPU memory before processing
             _clear_gpu_memory()
-            
-            # Use a simple heuristic: score = average logit of tokens being unmasked reconstruction
-            # Approximate by replacing rare tokens with [MASK] one by one (lightweight surrogate)
-            base_score = 0.0
-            def mlm_score(sent: str) -> float:
-                toks = sent.split()
-                if not toks:
-                    return 0.0
-                sampled = toks[: min(3, len(toks))]
-                s = 0.0
-                for i in range(len(sampled)):
-                    masked = toks.copy()
-                    masked[i] = mlm_fill_mask.tokenizer.mask_token
-                    masked_sent = " ".join(masked)
-                    try:
-                        with torch.no_grad() if torch is not None else torch.no_grad():
-                            res = mlm_fill_mask(masked_sent, top_k=5)
-                        # reward if original token is among top predictions
-                        orig = toks[i]
-                        rank_score = 0.0
-                        for rank, r in enumerate(res, start=1):
-                            if r.get("token_str", "").strip().lower() == orig.lower():
-                                rank_score = 1.0 / rank
-                                break
-                        s += rank_score
-                    except Exception as e:
-                        print(f"MLM scoring error: {e}")
-                        continue
-                return s / max(1, len(sampled))
-
-            base_score = mlm_score(text)
-            for cand in set(candidates):
-                if cand == text:
-                    scored.append((cand, base_score, "MLM"))
-                else:
-                    scored.append((cand, mlm_score(cand), "MLM"))
-            
+
+            # Pseudo-log-likelihood of each candidate: all masked variants scored in one batched pass
+            unique = list(dict.fromkeys(c for candidates in candidate_lists for c in candidates))
+            score_of = dict(zip(unique, _mlm_scores(unique)))
+            for candidates, scored in zip(candidate_lists, scored_lists):
+                for cand in dict.fromkeys(candidates):
+                    scored.append((cand, score_of[cand], "MLM"))
+
             # Clear GPU memory after processing
             _clear_gpu_memory()
         except Exception as e:
             print(f"MLM processing error: {e}")
             # fallback: equal scores
-            for cand in set(candidates):
-                scored.append((cand, 0.3, "MLM"))
+            for candidates, scored in zip(candidate_lists, scored_lists):
+                for cand in set(candidates):
+                    scored.append((cand, 0.3, "MLM"))
     else:
-        for cand in set(candidates):
-            scored.append((cand, 0.3, "heuristic"))
+        # layer-1 hypotheses come best first; keep that order
+        for candidates, scored in zip(candidate_lists, scored_lists):
+            for rank, cand in enumerate(dict.fromkeys(candidates)):
+                scored.append((cand, 0.3 + 0.2 / (rank + 1), "heuristic"))
 
-    return scored
+    return scored_lists
 
 
-def _expand_and_rerank(original: str, scored: List[Tuple[str, float, str]], top_k: int, user_id: Optional[str]) -> List[Tuple[str, float, str]]:
-    """Layer 3: Domain-aware reranking with WordNet expansion and embedding similarity.
-    Applies feedback boosts.
-    """
-    _lazy_imports()
-
+def _wordnet_expansions(original: str) -> set[str]:
     # Expand query terms with WordNet synonyms (light influence)
     expanded_terms: set[str] = set()
     if wordnet is not None:
@@ -442,37 +883,72 @@ def _expand_and_rerank(original: str, scored: List[Tuple[str, float, str]], top_
                         expanded_terms.add(lemma.name().replace('_', ' '))
             except Exception:
                 continue
+    return expanded_terms
+
+
+def _embed(texts: List[str]):
+    """Unit-length sentence embeddings, through the micro-batcher / cache when available."""
+    if embed_batcher is not None:
+        return embed_batcher.submit(texts)
+    if embedding_cache is not None:
+        # cached/precomputed rows are unit length; misses are encoded in one batch
+        return embedding_cache.encode(texts)
+    with torch.no_grad() if torch is not None else torch.no_grad():
+        return sentence_model.encode(texts, normalize_embeddings=True)
+
+
+def _expand_and_rerank(original: str, scored: List[Tuple[str, float, str]], top_k: int, user_id: Optional[str]) -> List[Tuple[str, float, str]]:
+    """Layer 3: Domain-aware reranking with WordNet expansion and embedding similarity.
+    Applies feedback boosts.
+    """
+    return _expand_and_rerank_batch([original], [scored], top_k, user_id)[0]
+
 
+def _expand_and_rerank_batch(originals: List[str], scored_lists: List[List[Tuple[str, float, str]]], top_k: int, user_id: Optional[str],
+                             skip: Tuple[str, ...] = ()) -> List[List[Tuple[str, float, str]]]:
+    """Layer 3 over several texts, embedding every query, expansion and candidate in one call.
+    With "embeddings" in `skip` only the feedback boosts are applied."""
+    _lazy_imports()
     # Embedding-based similarity to the original and expansions
-    emb_scores: Dict[str, float] = {}
-    if sentence_model is not None:
+    emb_scores_list: List[Dict[str, float]] = [{} for _ in originals]
+    if sentence_model is not None and "embeddings" not in skip:
+        expansions = [_wordnet_expansions(o) for o in originals]
         try:
             # Clear GPU memory before processing
             _clear_gpu_memory()
-            
-            queries = [original] + list(expanded_terms)
-            with torch.no_grad() if torch is not None else torch.no_grad():
-                q_emb = sentence_model.encode(queries)
-            # average expansion vectors
-            base_vec = q_emb[0]
-            if len(q_emb) > 1:
-                exp_vec = np.mean(q_emb[1:], axis=0)
-                base_vec = (base_vec + exp_vec) / 2.0
-            cand_texts = [c for c, _, _ in scored]
-            with torch.no_grad() if torch is not None else torch.no_grad():
-                c_emb = sentence_model.encode(cand_texts)
-            sims = cosine_similarity([base_vec], c_emb)[0]
-            for t, s in zip(cand_texts, sims):
-                emb_scores[t] = float(s)
-            
+
+            queries = [[o] + list(e) for o, e in zip(originals, expansions)]
+            cand_texts = [[c for c, _, _ in scored] for scored in scored_lists]
+            flat = list(dict.fromkeys(t for q, c in zip(queries, cand_texts) for t in q + c))
+            emb = _embed(flat)
+            row = {t: i for i, t in enumerate(flat)}
+            for q, cands, emb_scores in zip(queries, cand_texts, emb_scores_list):
+                q_emb = emb[[row[t] for t in q]]
+                # average expansion vectors
+                base_vec = q_emb[0]
+                if len(q_emb) > 1:
+                    exp_vec = np.mean(q_emb[1:], axis=0)
+                    base_vec = (base_vec + exp_vec) / 2.0
+                if not cands:
+                    continue
+                c_emb = emb[[row[t] for t in cands]]
+                sims = c_emb @ (base_vec / max(float(np.linalg.norm(base_vec)), 1e-12))
+                for t, s in zip(cands, sims):
+                    emb_scores[t] = float(s)
+
             # Clear GPU memory after processing
             _clear_gpu_memory()
         except Exception as e:
             print(f"Embedding similarity error: {e}")
-            pass
+            emb_scores_list = [{} for _ in originals]
+
+    return [_combine_scores(o, scored, emb_scores, top_k, user_id)
+            for o, scored, emb_scores in zip(originals, scored_lists, emb_scores_list)]
 
+
+def _combine_scores(original: str, scored: List[Tuple[str, float, str]], emb_scores: Dict[str, float], top_k: int, user_id: Optional[str]) -> List[Tuple[str, float, str]]:
     # Feedback boosts
-    user_boost = USER_BOOSTS.get(user_id or "", {})
+    user_boost = _user_boosts(user_id)
 
     reranked: List[Tuple[str, float, str]] = []
     for cand, score, source in scored:
@@ -490,6 +966,99 @@ def _expand_and_rerank(original: str, scored: List[Tuple[str, float, str]], top_
     return reranked[:top_k]
 
 
+def _tokenize(texts: List[str]) -> List[Any]:
+    """Layer 1 docs: tokenizer only, no statistical components."""
+    if nlp is None:
+        return [None] * len(texts)
+    return list(nlp.tokenizer.pipe(texts, batch_size=NLP_PIPE_BATCH_SIZE))
+
+
+def _contextual_docs(texts: List[str], token_docs: List[Any]) -> Optional[List[Any]]:
+    """Layer 2 docs: NER + ContextualSpellCheck, or None if the pipeline failed. A layer-1
+    doc whose text layer 1 left unchanged is reused, so it is not tokenized again."""
+    inputs = [doc if doc is not None and doc.text == text else text for text, doc in zip(texts, token_docs)]
+    try:
+        return list(nlp.pipe(inputs, batch_size=NLP_PIPE_BATCH_SIZE))
+    except Exception as e:
+        print(f"ContextualSpellCheck processing error: {e}")
+        return None
+
+
+def _check_many(texts: List[str], top_k: int, user_id: Optional[str]) -> Dict[str, Tuple[List[Tuple[str, float, str]], str, str]]:
+    """Tiered pipeline over the unique texts; returns text -> (ranked candidates, tier, load mode)."""
+    unique = list(dict.fromkeys(texts))
+    with degrader.track(len(unique)) as mode:
+        results = _check_unique(unique, top_k, user_id, disabled_layers(mode))
+    return {text: (ranked, tier, mode) for text, (ranked, tier) in results.items()}
+
+
+def _check_unique(texts: List[str], top_k: int, user_id: Optional[str], skip: Tuple[str, ...]) -> Dict[str, Tuple[List[Tuple[str, float, str]], str]]:
+    _lazy_imports()
+    _reload_domain_vocab_if_changed()
+    tiered = SPELL_PIPELINE_MODE == "tiered"
+    results: Dict[str, Tuple[List[Tuple[str, float, str]], str]] = {}
+
+    pending = []
+    for text in texts:
+        if tiered and all(_is_known_word(w.lower()) for w in _WORD_RE.findall(text)):
+            results[text] = (_apply_user_boosts([(text, 1.0, "vocabulary")], user_id, top_k), "clean")
+        else:
+            pending.append(text)
+    if not pending:
+        return results
+
+    full = []
+    token_docs = _tokenize(pending)
+    doc_of = dict(zip(pending, token_docs))
+    for text, doc in zip(pending, token_docs):
+        l1_text, l1_cands = _token_level_preprocess(text, doc)
+        if tiered and _domain_only_fixes(text, l1_text):
+            results[text] = (_apply_user_boosts(
+                [(l1_text, 0.9, "domain"), (text, 0.1, "original")], user_id, top_k
+            ), "token")
+        else:
+            full.append((text, l1_text, l1_cands))
+    if not full:
+        return results
+
+    l1_texts = [l1 for _, l1, _ in full]
+    docs = None
+    if contextual_spellcheck is not None and nlp is not None and "contextual" not in skip:
+        docs = _contextual_docs(l1_texts, [doc_of[t] for t, _, _ in full])
+        if docs is None:
+            skip = skip + ("contextual",)
+    scored_lists = _context_aware_batch(l1_texts, [cands for _, _, cands in full], docs, skip)
+    reranked = _expand_and_rerank_batch([t for t, _, _ in full], scored_lists, top_k, user_id, skip)
+    for (text, _, _), ranked in zip(full, reranked):
+        results[text] = (ranked, "full")
+    return results
+
+
+def _to_response(text: str, reranked: List[Tuple[str, float, str]], tier: str, mode: str = "normal") -> SpellCheckResponse:
+    # pick best candidate; ensure original appears among candidates
+    best = reranked[0][0] if reranked else text
+    changed = best.strip().lower() != text.strip().lower()
+    cands = [SpellCandidate(text=c, score=float(s), source=src) for c, s, src in reranked]
+    notes = TIER_NOTES[tier]
+    if mode != "normal":
+        notes += f"; load mode {mode}: {MODE_NOTES[mode]}"
+    return SpellCheckResponse(
+        original=text,
+        corrected=best,
+        changed=changed,
+        candidates=cands,
+        notes=notes,
+        tier=tier
+    )
+
+
+@app.get("/ready")
+def ready():
+    """Per-model load progress; 503 until every model has loaded (or been skipped)."""
+    report = model_loader.report()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
+
 @app.get("/health")
 def health():
     """Health check with GPU status"""
@@ -514,50 +1083,84 @@ def health():
     return {
         "status": "ok",
         "gpu": gpu_status,
+        "inference_backend": {"configured": INFERENCE_BACKEND, "int8_models": sorted(int8_models)},
         "models_loaded": {
             "mlm": mlm_fill_mask is not None,
             "sentence_transformer": sentence_model is not None,
             "contextual_spellcheck": contextual_spellcheck is not None,
             "autocorrect": autocorrect_speller is not None,
-            "symspell": symspell is not None
-        }
+            "symspell": symspell is not None,
+            "domain_index": domain_index is not None
+        },
+        "embedding_cache": embedding_cache.stats() if embedding_cache is not None else None,
+        "user_boosts": feedback_store.boost_stats() if feedback_store is not None else None
     }
 
 
 @app.post("/check", response_model=SpellCheckResponse)
 def check(req: SpellCheckRequest):
     try:
-        l1_text, l1_cands = _token_level_preprocess(req.text)
-        scored = _context_aware(l1_text, l1_cands)
-        reranked = _expand_and_rerank(req.text, scored, req.top_k, req.user_id)
-
-        # pick best candidate; ensure original appears among candidates
-        best = reranked[0][0] if reranked else req.text
-        changed = best.strip().lower() != req.text.strip().lower()
-        cands = [SpellCandidate(text=c, score=float(s), source=src) for c, s, src in reranked]
-
-        return SpellCheckResponse(
-            original=req.text,
-            corrected=best,
-            changed=changed,
-            candidates=cands,
-            notes="layered spell correction (preprocess, context, domain rerank)"
+        start = time.perf_counter()
+        reranked, tier, mode = _check_many([req.text], req.top_k, req.user_id)[req.text]
+        tier_metrics.record(tier, time.perf_counter() - start)
+        return _to_response(req.text, reranked, tier, mode)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _stream_batch(req: SpellCheckBatchRequest):
+    """NDJSON lines {"index": i, ...SpellCheckResponse} in input order, one chunk of unique texts at a time."""
+    unique = list(dict.fromkeys(req.texts))
+    done: Dict[str, Any] = {}
+    next_index = 0
+    for start in range(0, len(unique), BATCH_STREAM_CHUNK):
+        chunk = unique[start:start + BATCH_STREAM_CHUNK]
+        try:
+            for text, result in _check_many(chunk, req.top_k, req.user_id).items():
+                done[text] = _to_response(text, *result).model_dump()
+        except Exception as e:
+            done.update({text: {"error": str(e)} for text in chunk})
+        while next_index < len(req.texts) and req.texts[next_index] in done:
+            yield json.dumps({"index": next_index, **done[req.texts[next_index]]}) + "\n"
+            next_index += 1
+
+
+@app.post("/check_batch")
+def check_batch(req: SpellCheckBatchRequest):
+    """Bulk /check for offline jobs: duplicates are checked once and every layer runs batched."""
+    stream = req.stream if req.stream is not None else len(req.texts) > BATCH_STREAM_THRESHOLD
+    if stream:
+        return StreamingResponse(_stream_batch(req), media_type="application/x-ndjson")
+    try:
+        results = _check_many(req.texts, req.top_k, req.user_id)
+        return SpellCheckBatchResponse(
+            results=[_to_response(t, *results[t]) for t in req.texts],
+            unique=len(results)
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/metrics")
+def metrics():
+    return {
+        "pipeline_mode": SPELL_PIPELINE_MODE,
+        **tier_metrics.snapshot(),
+        "micro_batching": {
+            "mlm": mlm_batcher.stats() if mlm_batcher is not None else None,
+            "embeddings": embed_batcher.stats() if embed_batcher is not None else None,
+        },
+        "feedback": feedback_store.stats() if feedback_store is not None else None,
+        "token_cache": token_cache.stats(),
+        "degradation": degrader.stats(),
+    }
+
+
 @app.post("/feedback")
 def feedback(req: FeedbackRequest):
     try:
-        os.makedirs(os.path.dirname(FEEDBACK_LOG), exist_ok=True)
-        with open(FEEDBACK_LOG, "a", encoding="utf-8") as f:
-            f.write(f"{req.user_id or ''}\t{req.original}\t{req.suggested}\t{int(req.accepted)}\n")
-        # boost accepted suggestions for this user
-        if req.accepted:
-            key = (req.user_id or "")
-            USER_BOOSTS.setdefault(key, {})
-            USER_BOOSTS[key][req.suggested.lower()] = USER_BOOSTS[key].get(req.suggested.lower(), 0) + 1
+        # queued for the next group commit; accepted suggestions boost this user's candidates
+        _feedback_store().record(FeedbackEvent(req.user_id or "", req.original, req.suggested, req.accepted))
         return {"status": "ok"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Accuracy / latency benchmark of the spell corrector's layer configurations,
+for tuning and regression tracking. Runs offline on CPU.
+
+    python spell_benchmark.py --synthetic 300 --output spell_benchmark.json
+    python spell_benchmark.py --configs token full --save-corpus corpus.json
+    python spell_benchmark.py --corpus corpus.json
+
+Labeled corpus (query, expected, kind):
+  feedback  accepted suggestions from feedback.log (the most accepted one per query)
+  food      synthetic edits of domain_vocab words in query templates
+  location  synthetic edits of place names in query templates
+  clean     correct queries, which must come back unchanged (over-correction)
+
+domain_vocab is raw recipe text and holds its typos too ("cookis", "reciption"),
+so only vocab words the dictionaries know (spell_api._is_known_word) are used as
+targets, and edits that land on another known word are dropped. The corpus is
+random, so regression runs read the fixed one committed next to this file
+(regenerated with --synthetic 300 --seed 0 --save-corpus):
+
+    python spell_benchmark.py --corpus spell_benchmark_corpus.json --configs token
+
+Configurations follow the degradation modes (see degradation.py): "token" is
+layer 1 alone (_token_level_preprocess), "no_embeddings" / "no_mlm" /
+"no_contextual" / "full" run _context_aware and _expand_and_rerank with those
+layers skipped, and "tiered" is the production /check path. Every query is
+checked on its own with a cold token cache, so per-layer latencies are
+per-request numbers. peak_rss_mb is the process peak after the configuration
+ran (models are shared by all configurations; see rss_after_load_mb).
+"""
+import os
+
+# offline, CPU only: set before spell_api reads them
+os.environ.setdefault("SPELL_OFFLINE", "1")
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+os.environ.setdefault("SPELL_DEGRADE_ENABLED", "0")
+os.environ.setdefault("SPELL_VOCAB_RELOAD_CHECK_S", "0")
+
+import argparse
+import json
+import pickle
+import random
+import resource
+import time
+from collections import Counter
+
+import numpy as np
+
+import spell_api
+from feedback_store import FEEDBACK_LOG, read_log
+from fuzzy_benchmark import misspell
+
+VOCAB_PATH = os.path.join(os.path.dirname(__file__), "domain_vocab.pkl")
+FOOD_TEMPLATES = ["{} recipe", "best {} near me", "how to make {} at home", "spicy {} for dinner", "order {} online"]
+LOCATION_TEMPLATES = ["restaurants in {}", "best {} in {}", "{} delivery in {}", "cheap eats near {}"]
+LOCATIONS = ["colombo", "kandy", "galle", "negombo", "jaffna", "london", "paris", "tokyo", "mumbai", "delhi",
+             "bangalore", "new york", "san francisco"]
+FOODS = ["burger", "biryani", "kottu", "hoppers", "carbonara", "ramen", "tacos", "pizza", "curry", "noodles"]
+# skipped layers per configuration; None is layer 1 alone
+CONFIGS = {
+    "token": None,
+    "no_embeddings": ("contextual", "mlm", "embeddings"),
+    "no_mlm": ("contextual", "mlm"),
+    "no_contextual": ("contextual",),
+    "full": (),
+    "tiered": (),
+}
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def feedback_pairs(path: str):
+    events, _ = read_log(path) if os.path.exists(path) else ([], 0)
+    votes = {}
+    for e in events:
+        if e.accepted and normalize(e.original) != normalize(e.suggested):
+            votes.setdefault(e.original, Counter())[e.suggested] += 1
+    # ties go to the suggestion accepted first
+    return [(original, c.most_common(1)[0][0], "feedback") for original, c in votes.items()]
+
+
+def known_word(word: str) -> bool:
+    """Dictionary gate for corpus targets: seen at least SPELL_CLEAN_MIN_COUNT times and not
+    dominated by a word one edit away."""
+    if spell_api.autocorrect_speller is None:
+        spell_api._load_autocorrect()
+    if spell_api.symspell is None:
+        spell_api._load_symspell()
+    return all(spell_api._is_known_word(w) for w in word.lower().split())
+
+
+def build_corpus(n: int, clean_share: float, seed: int, feedback_log: str):
+    rng = random.Random(seed)
+    foods = FOODS
+    if os.path.exists(VOCAB_PATH):
+        with open(VOCAB_PATH, "rb") as f:
+            foods = sorted(w for w in pickle.load(f) if 4 <= len(w) <= 12 and w.isalpha() and known_word(w))
+    corpus = feedback_pairs(feedback_log)
+    seen = {q for q, _, _ in corpus}
+    target = len(corpus) + n
+    while len(corpus) < target:
+        if rng.random() < 0.5:
+            template = rng.choice(FOOD_TEMPLATES)
+            right = [rng.choice(foods)]
+            kind = "food"
+        else:
+            template = rng.choice(LOCATION_TEMPLATES)
+            place = rng.choice(LOCATIONS)
+            right = [rng.choice(FOODS), place] if template.count("{}") == 2 else [place]
+            kind = "location"
+        wrong = list(right)
+        if rng.random() < clean_share:
+            kind = "clean"
+        else:
+            i = len(wrong) - 1 if kind == "location" else 0
+            words = wrong[i].split()
+            j = rng.randrange(len(words))
+            words[j] = misspell(words[j], rng)
+            wrong[i] = " ".join(words)
+            if wrong == right or known_word(words[j]):
+                continue  # a real-word edit ("slice" -> "spice") is not a typo the corrector should fix
+        query = template.format(*wrong)
+        if query in seen:
+            continue
+        seen.add(query)
+        corpus.append((query, template.format(*right), kind))
+    return corpus
+
+
+def ms(values, q: float):
+    return round(float(np.percentile(values, q)) * 1000, 2) if values else None
+
+
+def check_one(text: str, top_k: int, skip):
+    """Ranked candidates and per-layer seconds for one query."""
+    timings = {}
+    start = time.perf_counter()
+    doc = spell_api._tokenize([text])[0]
+    l1_text, l1_cands = spell_api._token_level_preprocess(text, doc)
+    timings["layer1"] = time.perf_counter() - start
+    if skip is None:
+        return [(l1_text, 1.0, "token")], timings
+
+    start = time.perf_counter()
+    docs = None
+    if spell_api.contextual_spellcheck is not None and spell_api.nlp is not None and "contextual" not in skip:
+        docs = spell_api._contextual_docs([l1_text], [doc])
+    scored = spell_api._context_aware_batch([l1_text], [l1_cands], docs, skip)
+    timings["layer2"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ranked = spell_api._expand_and_rerank_batch([text], scored, top_k, None, skip)[0]
+    timings["layer3"] = time.perf_counter() - start
+    return ranked, timings
+
+
+def run_config(name: str, skip, corpus, top_k: int):
+    spell_api.token_cache.clear()
+    latencies = {"total": []}
+    correct, in_top_k, changed_clean = Counter(), Counter(), 0
+    by_kind = Counter(kind for _, _, kind in corpus)
+    tiers = Counter()
+    for query, expected, kind in corpus:
+        start = time.perf_counter()
+        if name == "tiered":
+            ranked, tier, _ = spell_api._check_many([query], top_k, None)[query]
+            tiers[tier] += 1
+            timings = {}
+        else:
+            ranked, timings = check_one(query, top_k, skip)
+        latencies["total"].append(time.perf_counter() - start)
+        for layer, secs in timings.items():
+            latencies.setdefault(layer, []).append(secs)
+
+        best = ranked[0][0] if ranked else query
+        correct[kind] += normalize(best) == normalize(expected)
+        in_top_k[kind] += any(normalize(c) == normalize(expected) for c, _, _ in ranked)
+        if kind == "clean":
+            changed_clean += normalize(best) != normalize(query)
+
+    total_s = sum(latencies["total"])
+    report = {
+        "accuracy": round(sum(correct.values()) / len(corpus), 4),
+        "top_k_recall": round(sum(in_top_k.values()) / len(corpus), 4),
+        "accuracy_by_kind": {k: round(correct[k] / n, 4) for k, n in sorted(by_kind.items())},
+        "over_correction": round(changed_clean / by_kind["clean"], 4) if by_kind["clean"] else None,
+        "latency_ms": {layer: {"p50": ms(v, 50), "p99": ms(v, 99)} for layer, v in latencies.items()},
+        "throughput_qps": round(len(corpus) / total_s, 2) if total_s else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    if tiers:
+        report["tiers"] = dict(tiers)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy and latency of each spell corrector layer configuration")
+    parser.add_argument("--synthetic", type=int, default=300, help="Synthetic queries added to the feedback pairs")
+    parser.add_argument("--clean-share", type=float, default=0.2, help="Share of synthetic queries left correct")
+    parser.add_argument("--feedback-log", default=FEEDBACK_LOG)
+    parser.add_argument("--corpus", help="Read the labeled corpus from this JSON file instead of building it")
+    parser.add_argument("--save-corpus", help="Write the labeled corpus to this JSON file")
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            corpus = [tuple(row) for row in json.load(f)]
+    else:
+        corpus = build_corpus(args.synthetic, args.clean_share, args.seed, args.feedback_log)
+    if args.save_corpus:
+        with open(args.save_corpus, "w", encoding="utf-8") as f:
+            json.dump(corpus, f, indent=1)
+
+    start = time.perf_counter()
+    spell_api._lazy_imports()
+    load_s = time.perf_counter() - start
+    models = {name: status["state"] for name, status in spell_api.model_loader.report()["models"].items()}
+
+    report = {
+        "corpus": {"queries": len(corpus), "by_kind": dict(Counter(kind for _, _, kind in corpus)), "seed": args.seed},
+        "models": models,
+        "model_load_s": round(load_s, 1),
+        "rss_after_load_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "configs": {},
+    }
+    for name in args.configs:
+        report["configs"][name] = run_config(name, CONFIGS[name], corpus, args.top_k)
+        print(f"{name}: accuracy {report['configs'][name]['accuracy']}, "
+              f"{report['configs'][name]['throughput_qps']} queries/s")
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
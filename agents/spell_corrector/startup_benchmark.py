@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the spell agent: loads every model in a fresh process,
+sequentially and in parallel, and prints total and per-model timings.
+
+    python startup_benchmark.py --repeat 2
+    python startup_benchmark.py --offline      # SPELL_OFFLINE=1, cached models only
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = """
+import json, time
+start = time.perf_counter()
+import spell_api
+imported = time.perf_counter() - start
+spell_api._lazy_imports()
+report = spell_api.model_loader.report()
+print("STARTUP_REPORT " + json.dumps({
+    "import_s": round(imported, 3),
+    "total_s": round(time.perf_counter() - start, 3),
+    "models": {name: {k: v for k, v in status.items() if k in ("state", "seconds")}
+               for name, status in report["models"].items()},
+}))
+"""
+
+
+def run_once(parallel: bool, offline: bool) -> dict:
+    env = dict(os.environ, SPELL_PARALLEL_LOAD="1" if parallel else "0")
+    if offline:
+        env["SPELL_OFFLINE"] = "1"
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=HERE, env=env, capture_output=True, text=True, check=True)
+    for line in out.stdout.splitlines():
+        if line.startswith("STARTUP_REPORT "):
+            return json.loads(line[len("STARTUP_REPORT "):])
+    raise RuntimeError(f"no report in output:\n{out.stdout}\n{out.stderr}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure spell agent cold-start time, sequential vs parallel")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--offline", action="store_true", help="Run with SPELL_OFFLINE=1")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {}
+    for mode, parallel in (("sequential", False), ("parallel", True)):
+        runs = [run_once(parallel, args.offline) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["total_s"])
+        report[mode] = {"total_s": [r["total_s"] for r in runs], "best": best}
+    report["speedup"] = round(report["sequential"]["best"]["total_s"] / report["parallel"]["best"]["total_s"], 2)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+from boost_table import BoostTable
+
+
+def test_empty_users_are_not_stored():
+    table = BoostTable(max_entries=2)
+    table.set_user("alice", [])
+    assert "alice" not in table and len(table) == 0
+
+
+def test_setting_no_items_removes_the_user():
+    table = BoostTable()
+    table.add("alice", "biryani", now=0)
+    table.set_user("alice", [], now=0)
+    assert "alice" not in table
+    assert table.entries == 0
+
+
+def test_eviction_bounds_entries():
+    table = BoostTable(max_entries=3, half_life_days=0)
+    for i in range(10):
+        table.add(f"user{i}", "kottu", now=0)
+    assert table.entries <= 3
+    # the most recent user survives
+    assert table.get("user9", now=0) == {"kottu": 1.0}
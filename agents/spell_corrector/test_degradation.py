@@ -0,0 +1,126 @@
+import time
+
+from degradation import DegradationController, disabled_layers
+from micro_batch import MicroBatcher
+
+
+def controller(**kwargs) -> DegradationController:
+    kwargs.setdefault("inflight_target", 4)
+    kwargs.setdefault("queue_target_ms", 100)
+    kwargs.setdefault("window_s", 5)
+    kwargs.setdefault("cooldown_s", 10)
+    kwargs.setdefault("hysteresis", 0.5)
+    return DegradationController(enabled=True, **kwargs)
+
+
+def test_level_goes_up_at_once():
+    c = controller()
+    c.inflight = 9  # pressure 2.25
+    c._update(0.0)
+    assert c.mode == "no_mlm"
+    assert disabled_layers(c.mode) == ("contextual", "mlm")
+    c.inflight = 100
+    c._update(0.1)
+    assert c.mode == "no_embeddings"
+
+
+def test_level_comes_down_one_step_per_cooldown():
+    c = controller()
+    c.inflight = 12  # pressure 3
+    c._update(0.0)
+    assert c.level == 3
+    c.inflight = 0
+    c._update(1.0)  # calm from here
+    c._update(10.9)
+    assert c.level == 3
+    c._update(11.0)
+    assert c.level == 2
+    # the next step needs another full cooldown
+    c._update(15.0)
+    assert c.level == 2
+    c._update(21.0)
+    assert c.level == 1
+    c._update(31.0)
+    assert c.level == 0
+    assert c.transitions == 4
+
+
+def test_hysteresis_holds_the_level():
+    c = controller()
+    c.inflight = 8  # pressure 2
+    c._update(0.0)
+    assert c.level == 2
+    # below 2 but not below 2 - hysteresis: stays, and the cooldown never starts
+    c.inflight = 7  # pressure 1.75
+    for t in range(1, 60):
+        c._update(float(t))
+    assert c.level == 2
+    c.inflight = 5  # pressure 1.25 < 1.5
+    c._update(60.0)
+    c._update(70.0)
+    assert c.level == 1
+
+
+def test_pressure_spike_resets_the_cooldown():
+    c = controller()
+    c.inflight = 4
+    c._update(0.0)
+    c.inflight = 0
+    c._update(1.0)
+    c.inflight = 3  # pressure 0.75, back inside the band
+    c._update(6.0)
+    c.inflight = 0
+    c._update(8.0)
+    c._update(17.0)
+    assert c.level == 1
+    c._update(18.0)
+    assert c.level == 0
+
+
+def test_slow_requests_alone_do_not_degrade():
+    c = controller()
+    # one request at a time, each slow: the per-text latency is not a load signal
+    for _ in range(5):
+        c.enter(1)
+        c.exit(1, 2.0)
+    assert c.mode == "normal"
+    assert c.stats()["latency_ms"] == 2000.0
+
+
+def test_queue_wait_raises_pressure():
+    c = controller()
+    c.record_wait(0.002)
+    assert c.mode == "normal"
+    for _ in range(3):
+        c.record_wait(0.4)
+    # mean wait (0.002 + 3 * 0.4) / 4 ~ 300 ms against a 100 ms target
+    assert c.mode == "no_embeddings"
+    assert c.stats()["queue_wait_ms"] > 250
+
+
+def test_old_waits_leave_the_window():
+    c = controller(window_s=5)
+    c._waits.append((0.0, 1.0))
+    c._wait_sum = 1.0
+    assert c._pressure(1.0) == 10.0
+    assert c._pressure(6.0) == 0.0
+
+
+def test_disabled_controller_stays_normal():
+    c = controller()
+    c.enabled = False
+    c.inflight = 100
+    c.record_wait(10.0)
+    assert c.mode == "normal"
+
+
+def test_batcher_reports_queue_wait():
+    waits = []
+
+    def slow_double(items):
+        time.sleep(0.05)
+        return [2 * x for x in items]
+
+    batcher = MicroBatcher(slow_double, "test", max_wait_ms=1, on_wait=waits.append)
+    assert batcher.submit([1, 2]) == [2, 4]
+    assert len(waits) == 1 and waits[0] < 0.05
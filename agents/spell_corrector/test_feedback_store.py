@@ -0,0 +1,106 @@
+import pytest
+
+import feedback_store
+from boost_table import BoostTable
+from feedback_store import FeedbackEvent, LogFeedbackStore, SqliteFeedbackStore
+
+
+def accepted(user_id, word):
+    return FeedbackEvent(user_id, word, word, True)
+
+
+def test_two_log_writers_keep_each_others_boosts(tmp_path, monkeypatch):
+    monkeypatch.setattr(feedback_store, "SNAPSHOT_EVERY", 2)
+    path = str(tmp_path / "feedback.log")
+    # two uvicorn workers appending to the same log and snapshot
+    a = LogFeedbackStore(path)
+    b = LogFeedbackStore(path)
+    # the second writer is told its boosts are per worker
+    assert not a.shared and b.shared
+    assert b.stats()["shared_log"]
+    a.record(accepted("alice", "biryani"))
+    b.record(accepted("bob", "kottu"))
+    a.record(accepted("alice", "biryani"))  # alice's snapshot: covers bob's line too
+    b.record(accepted("bob", "hoppers"))  # bob's snapshot: written last, must not drop alice
+    a.record(accepted("alice", "dosa"))
+    b.close()
+    a.close()
+
+    restarted = LogFeedbackStore(path)
+    try:
+        assert restarted.boosts("alice") == pytest.approx({"biryani": 2.0, "dosa": 1.0})
+        assert restarted.boosts("bob") == pytest.approx({"kottu": 1.0, "hoppers": 1.0})
+        # everything was already in the snapshot
+        assert restarted.replayed == 0
+    finally:
+        restarted.close()
+
+
+def test_replay_applies_lines_written_after_the_snapshot(tmp_path):
+    path = str(tmp_path / "feedback.log")
+    store = LogFeedbackStore(path)
+    store.record(accepted("alice", "biryani"))
+    store.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(accepted("alice", "biryani").to_line())
+        f.write("alice\tbiry")  # torn line, left for the next replay
+
+    restarted = LogFeedbackStore(path)
+    try:
+        assert restarted.replayed == 1
+        assert restarted.boosts("alice") == pytest.approx({"biryani": 2.0})
+    finally:
+        restarted.close()
+
+
+def test_evicted_users_are_read_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(feedback_store, "SNAPSHOT_EVERY", 3)
+    path = str(tmp_path / "feedback.log")
+    store = LogFeedbackStore(path, table=BoostTable(max_entries=2))
+    users = [f"user{i}" for i in range(8)]
+    for user in users:
+        store.record(accepted(user, "kottu"))
+        assert store.boosts(user) == pytest.approx({"kottu": 1.0})
+    assert store.table.evicted_users > 0
+    assert "user0" not in store.table
+    # read back from the snapshot (user0..5) or the log lines after it (user6, user7), without a restart
+    for user in users:
+        assert store.boosts(user) == pytest.approx({"kottu": 1.0})
+    store.record(accepted("user0", "hoppers"))
+    assert store.boosts("user0") == pytest.approx({"kottu": 1.0, "hoppers": 1.0})
+    store.close()
+
+    restarted = LogFeedbackStore(path)
+    try:
+        assert len(restarted.table) == 0  # startup folds the log into the snapshot, not into memory
+        assert restarted.boosts("user0") == pytest.approx({"kottu": 1.0, "hoppers": 1.0})
+        for user in users[1:]:
+            assert restarted.boosts(user) == pytest.approx({"kottu": 1.0})
+    finally:
+        restarted.close()
+
+
+def test_log_is_read_in_chunks(tmp_path):
+    path = str(tmp_path / "feedback.log")
+    events = [accepted(f"user{i}", "biryani") for i in range(20)]
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(e.to_line() for e in events)
+        f.write("user20\tbiry")  # torn line
+    chunks = list(feedback_store.iter_log(path, 0, chunk_bytes=16))
+    assert len(chunks) > 1
+    assert [e for chunk, _ in chunks for e in chunk] == events
+    assert chunks[-1][1] == feedback_store.read_log(path)[1]
+
+
+def test_sqlite_users_without_boosts_take_no_table_rows(tmp_path):
+    store = SqliteFeedbackStore(str(tmp_path / "feedback.db"), legacy_log=None, table=BoostTable(max_entries=4))
+    try:
+        for i in range(50):
+            assert store.boosts(f"anonymous{i}") == {}
+        assert len(store.table) == 0
+
+        store.record(accepted("alice", "biryani"))
+        assert store.boosts("alice") == pytest.approx({"biryani": 1.0})
+        assert len(store.table) == 1
+    finally:
+        store.close()
@@ -0,0 +1,87 @@
+import pickle
+import random
+
+import pytest
+
+import fuzzy_index
+import spell_api
+from fuzzy_index import DeleteIndex, bounded_levenshtein
+
+VOCAB = ["biryani", "burger", "burgers", "chicken", "colombo", "curry", "kebab", "kottu", "hoppers",
+         "new york", "pasta", "pizza", "ramen", "restaurant", "spaghetti", "sushi", "tacos", "tomatoes"]
+TOKENS = ["chiken", "biryni", "colmobo", "berger", "restaurnt", "spagheti", "tomatos", "kottu", "new yrok",
+          "piza", "pzza", "curyy", "xqzv", "", "b", "burgerss", "sushiii", "ramne", "takos", "kebabs"]
+
+
+def misspellings(words, n, seed=0):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        chars = list(rng.choice(words))
+        for _ in range(rng.randint(1, 3)):
+            i = rng.randrange(len(chars) + 1)
+            op = rng.random()
+            if op < 0.33 and i < len(chars):
+                chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+            elif op < 0.66:
+                chars.insert(i, rng.choice("abcdefghijklmnopqrstuvwxyz"))
+            elif i < len(chars) and len(chars) > 1:
+                del chars[i]
+        out.append("".join(chars))
+    return out
+
+
+@pytest.fixture
+def scan_vocab(monkeypatch):
+    monkeypatch.setattr(spell_api, "domain_vocab", set(VOCAB))
+    monkeypatch.setattr(spell_api, "domain_index", None)
+
+
+@pytest.mark.parametrize("mapped", [False, True])
+def test_index_matches_the_scan(scan_vocab, tmp_path, mapped):
+    index = DeleteIndex.build(VOCAB)
+    if mapped:
+        index.save(str(tmp_path / "vocab.idx"))
+        index = DeleteIndex.load(str(tmp_path / "vocab.idx"))
+    for token in TOKENS + misspellings(VOCAB, 300):
+        assert index.nearest(token) == spell_api._nearest_domain_word_scan(token), token
+
+
+def test_lookup_matches_brute_force():
+    index = DeleteIndex.build({w: i + 1 for i, w in enumerate(VOCAB)})
+    for token in TOKENS + misspellings(VOCAB, 100, seed=1):
+        expected = sorted(((w, spell_api._levenshtein(token, w)) for w in VOCAB), key=lambda m: (m[1], m[0]))
+        assert index.lookup(token) == [m for m in expected if m[1] <= 2], token
+    assert index.frequency("curry") == VOCAB.index("curry") + 1
+    assert index.frequency("cury") == 0
+
+
+def test_distance_keeps_the_bounded_contract():
+    for a, b in [("chiken", "chicken"), ("abc", "xyzw"), ("ab", "ba"), ("", "ab"), ("kottu", "kottu"),
+                 ("new yrok", "new york"), ("café", "cafe")]:
+        for k in (0, 1, 2, 3):
+            assert fuzzy_index.distance(a, b, k) == bounded_levenshtein(a, b, k), (a, b, k)
+            assert bounded_levenshtein(a, b, k) == min(spell_api._levenshtein(a, b), k + 1)
+
+
+def test_missing_artifact_is_built_once_and_mapped(tmp_path, monkeypatch):
+    pkl = tmp_path / "domain_vocab.pkl"
+    with open(pkl, "wb") as f:
+        pickle.dump({w: 1 for w in VOCAB}, f)
+    monkeypatch.setattr(spell_api, "DOMAIN_VOCAB_PICKLE", str(pkl))
+    monkeypatch.setattr(spell_api, "DOMAIN_VOCAB_INDEX", str(tmp_path / "domain_vocab.idx"))
+    for name in ("domain_vocab", "domain_index", "_vocab_fingerprint"):
+        monkeypatch.setattr(spell_api, name, getattr(spell_api, name))
+    builds = []
+    real_build = DeleteIndex.build.__func__
+    monkeypatch.setattr(DeleteIndex, "build", classmethod(lambda cls, vocab: builds.append(1) or real_build(cls, vocab)))
+
+    spell_api._load_domain_vocab()
+    assert builds == [1]
+    assert (tmp_path / "domain_vocab.idx").exists()
+    assert isinstance(spell_api.domain_index.words, fuzzy_index.WordTable)
+    assert spell_api._nearest_domain_word("chiken") == "chicken"
+    # the next worker maps the saved artifact instead of building its own
+    spell_api._load_domain_vocab()
+    assert builds == [1]
+    assert spell_api._vocab_fingerprint == spell_api.artifact_fingerprint([str(tmp_path / "domain_vocab.idx"), str(pkl)])
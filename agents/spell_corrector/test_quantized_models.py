@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from quantized_models import _model_file, load_mlm_pipeline, load_quantized, quantize, save_quantized  # noqa: E402
+
+VOCAB = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "chicken", "biryani", "for", "dinner", "rice"]
+
+
+def tiny_mlm():
+    config = transformers.BertConfig(vocab_size=len(VOCAB), hidden_size=32, num_hidden_layers=2,
+                                     num_attention_heads=2, intermediate_size=64)
+    torch.manual_seed(0)
+    return transformers.AutoModelForMaskedLM.from_config(config)
+
+
+def export_tiny_mlm(out_dir):
+    """What export_mlm writes, for a tiny randomly initialized BERT."""
+    target = os.path.join(out_dir, "mlm")
+    os.makedirs(target)
+    vocab_file = os.path.join(target, "vocab.txt")
+    with open(vocab_file, "w") as f:
+        f.write("\n".join(VOCAB) + "\n")
+    transformers.BertTokenizer(vocab_file).save_pretrained(target)
+    model = tiny_mlm()
+    model.config.save_pretrained(target)
+    quantized = quantize(model)
+    save_quantized(quantized, _model_file(out_dir, "mlm"))
+    return quantized
+
+
+def test_state_dict_round_trip(tmp_path):
+    quantized = quantize(tiny_mlm())
+    path = str(tmp_path / "int8_state.pt")
+    save_quantized(quantized, path)
+    loaded = load_quantized(transformers.AutoModelForMaskedLM.from_config(quantized.config), path)
+    ids = torch.tensor([[2, 5, 4, 7, 8, 3]])
+    with torch.no_grad():
+        assert torch.equal(quantized(ids).logits, loaded(ids).logits)
+    assert isinstance(loaded.cls.predictions.decoder, torch.ao.nn.quantized.dynamic.Linear)
+
+
+def test_mlm_pipeline_loads_the_exported_weights(tmp_path):
+    quantized = export_tiny_mlm(str(tmp_path))
+    fill_mask = load_mlm_pipeline(str(tmp_path))
+    ids = torch.tensor([[2, 5, 4, 3]])
+    with torch.no_grad():
+        assert torch.equal(fill_mask.model(ids).logits, quantized(ids).logits)
+    assert len(fill_mask("chicken [MASK]", top_k=3)) == 3
+
+
+def test_pickled_modules_are_refused(tmp_path):
+    quantized = export_tiny_mlm(str(tmp_path))
+    # an artifact holding a whole module needs unpickling arbitrary classes
+    torch.save(quantized, _model_file(str(tmp_path), "mlm"))
+    with pytest.raises(Exception, match="weights_only"):
+        load_mlm_pipeline(str(tmp_path))
+
+
+def test_missing_artifact_returns_none(tmp_path):
+    assert load_mlm_pipeline(str(tmp_path)) is None
@@ -0,0 +1,74 @@
+import pytest
+from fastapi.testclient import TestClient
+
+spacy = pytest.importorskip("spacy")
+from spacy.language import Language  # noqa: E402
+from spacy.tokens import Doc  # noqa: E402
+
+import spell_api  # noqa: E402
+from feedback_store import LogFeedbackStore  # noqa: E402
+from model_loader import ParallelLoader  # noqa: E402
+
+KNOWN = {"chicken", "biryani", "recipe", "for", "dinner", "."}
+
+
+@Language.component("sentence_reading_spellcheck")
+def sentence_reading_spellcheck(doc):
+    """Stands in for ContextualSpellCheck: reads token.sent (E030 without sentence boundaries)."""
+    misspelled = [t for t in doc if t.text.lower() not in KNOWN]
+    for token in misspelled:
+        context = [t.text for t in token.sent if t.i != token.i]
+        assert context
+    doc._.has_spellCheck = bool(misspelled)
+    doc._.outcome_spellCheck = doc.text.replace("chiken", "chicken") if misspelled else ""
+    return doc
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # a spaCy pipeline shaped like en_core_web_sm: ner plus the components layer 2 excludes
+    nlp = spacy.blank("en")
+    for name, label in (("tagger", "NN"), ("parser", "dobj"), ("ner", "GPE")):
+        nlp.add_pipe(name).add_label(label)
+    nlp.add_pipe("attribute_ruler")
+    nlp.initialize()
+    model_dir = tmp_path / "model"
+    nlp.to_disk(model_dir)
+
+    for name in ("has_spellCheck", "outcome_spellCheck"):
+        Doc.set_extension(name, default=None, force=True)
+
+    def load_contextual():
+        spell_api.nlp.add_pipe("sentence_reading_spellcheck")
+        spell_api.contextual_spellcheck = True
+
+    store = LogFeedbackStore(str(tmp_path / "feedback.log"))
+    monkeypatch.setattr(spell_api, "SPACY_MODEL", str(model_dir))
+    monkeypatch.setattr(spell_api, "nlp", None)
+    monkeypatch.setattr(spell_api, "contextual_spellcheck", None)
+    monkeypatch.setattr(spell_api, "feedback_store", store)
+    monkeypatch.setattr(spell_api, "model_loader", ParallelLoader({
+        "spacy": (spell_api._load_spacy, ()),
+        "contextual_spellcheck": (load_contextual, ("spacy",)),
+    }, parallel=False))
+    yield TestClient(spell_api.app)
+    store.close()
+
+
+def test_check_misspelled_sentence_runs_contextual_layer(client):
+    r = client.post("/check", json={"text": "chiken biryani recipe for dinner", "top_k": 3})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["tier"] == "full"
+    assert "chicken biryani recipe for dinner" in [c["text"] for c in body["candidates"]]
+
+
+def test_check_survives_a_failing_contextual_pipeline(client, monkeypatch):
+    client.post("/check", json={"text": "warm up"})  # loads the pipeline
+
+    def broken(*args, **kwargs):
+        raise ValueError("[E030] Sentence boundaries unset")
+
+    monkeypatch.setattr(spell_api.nlp, "pipe", broken)
+    r = client.post("/check", json={"text": "chiken biryani recipe", "top_k": 3})
+    assert r.status_code == 200, r.text
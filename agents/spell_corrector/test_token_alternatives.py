@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+pytest.importorskip("autocorrect")
+
+import spell_api  # noqa: E402
+from token_cache import TokenCache  # noqa: E402
+
+# (typed, expected layer-1 correction): the domain vocab is built from raw recipe text and
+# contains the typed typo too, which must not outvote the correction
+CORPUS_TYPOS = [
+    ("chiken", "chicken"),
+    ("tomatos", "tomato"),
+    ("restaurnt", "restaurant"),
+]
+
+
+@pytest.fixture(scope="module")
+def layer1():
+    if not os.path.exists(spell_api.DOMAIN_VOCAB_PICKLE):
+        pytest.skip("domain_vocab.pkl not built")
+    with pytest.MonkeyPatch.context() as mp:
+        for name in ("autocorrect_speller", "symspell", "english_words", "domain_vocab", "domain_index", "domain_has_freqs"):
+            mp.setattr(spell_api, name, getattr(spell_api, name))
+        mp.setattr(spell_api, "token_cache", TokenCache())
+        spell_api._load_autocorrect()
+        spell_api._load_symspell()
+        spell_api._load_domain_vocab()
+        yield spell_api
+
+
+def best(layer1, tok):
+    return max(layer1._token_alternatives(tok), key=lambda a: a.score).text
+
+
+@pytest.mark.parametrize("typed, expected", CORPUS_TYPOS)
+def test_corpus_typo_does_not_beat_correction(layer1, typed, expected):
+    assert typed in layer1.domain_vocab
+    assert best(layer1, typed) == expected
+
+
+@pytest.mark.parametrize("typed, expected", CORPUS_TYPOS)
+def test_domain_self_match_is_not_a_vote(layer1, typed, expected):
+    original = next(a for a in layer1._token_alternatives(typed) if a.text == typed)
+    assert original.sources == ("original",)
+
+
+def test_sentence_with_corpus_typo(layer1, monkeypatch):
+    monkeypatch.setattr(layer1, "_lazy_imports", lambda: None)
+    monkeypatch.setattr(layer1, "nlp", None)
+    corrected, _ = layer1._token_level_preprocess("chiken biryni recipe")
+    assert corrected == "chicken biryani recipe"
+
+
+@pytest.mark.parametrize("word", ["recipe", "chicken", "kandy", "hoppers", "carbonara", "tikka", "libre"])
+def test_domain_and_known_words_are_kept(layer1, word):
+    assert best(layer1, word) == word
+
+
+# dictionary words one edit from a more frequent domain word
+@pytest.mark.parametrize("word", ["sluice", "trice", "sailer", "experimenter"])
+def test_dictionary_word_keeps_identity(layer1, word):
+    assert layer1._is_known_word(word)
+    alternatives = layer1._token_alternatives(word)
+    assert max(alternatives, key=lambda a: a.score).text == word
+    assert len(alternatives) > 1  # neighbours stay as hypotheses for the model layers
+
+
+def test_dictionary_word_in_sentence(layer1, monkeypatch):
+    monkeypatch.setattr(layer1, "_lazy_imports", lambda: None)
+    monkeypatch.setattr(layer1, "nlp", None)
+    corrected, _ = layer1._token_level_preprocess("open the sluice gate")
+    assert corrected == "open the sluice gate"
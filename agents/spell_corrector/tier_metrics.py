@@ -0,0 +1,47 @@
+"""
+Per-tier counters and latency percentiles for /check (exposed on /metrics).
+"""
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+TIER_METRICS_WINDOW = int(os.getenv("SPELL_TIER_METRICS_WINDOW", "2000"))
+TIERS = ("clean", "token", "full")
+
+
+def _percentile(ordered, q: float) -> float:
+    idx = min(len(ordered) - 1, max(0, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+class TierMetrics:
+    def __init__(self, window: int = TIER_METRICS_WINDOW):
+        self.started_at = time.time()
+        self.counts: Dict[str, int] = {t: 0 for t in TIERS}
+        self._latencies: Dict[str, Deque[float]] = {t: deque(maxlen=window) for t in TIERS}
+        self._lock = threading.Lock()
+
+    def record(self, tier: str, seconds: float) -> None:
+        with self._lock:
+            self.counts[tier] = self.counts.get(tier, 0) + 1
+            self._latencies.setdefault(tier, deque(maxlen=TIER_METRICS_WINDOW)).append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+            windows: Dict[str, Tuple[float, ...]] = {t: tuple(d) for t, d in self._latencies.items()}
+        total = sum(counts.values())
+        tiers = {}
+        for tier, count in counts.items():
+            ordered = sorted(windows.get(tier, ()))
+            tiers[tier] = {
+                "count": count,
+                "share": round(count / total, 4) if total else 0.0,
+                "p50_ms": round(_percentile(ordered, 50) * 1000, 2) if ordered else None,
+                "p95_ms": round(_percentile(ordered, 95) * 1000, 2) if ordered else None,
+                "p99_ms": round(_percentile(ordered, 99) * 1000, 2) if ordered else None,
+            }
+        return {"requests": total, "uptime_s": round(time.time() - self.started_at, 1), "tiers": tiers}
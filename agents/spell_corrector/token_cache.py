@@ -0,0 +1,89 @@
+"""
+Token -> correction memo shared by all requests for layer 1.
+
+Food queries repeat the same tokens ("chiken", "biryani", "colombo"), and
+each token used to go through Autocorrect, SymSpell and the domain-vocab
+lookup again on every request. TokenCache is a bounded, thread-safe LRU keyed
+by (corrector, token), with hit/miss counters per corrector for /metrics.
+spell_api clears it when the domain vocab artifact on disk changes and is
+reloaded.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Sequence, Tuple
+
+TOKEN_CACHE_SIZE = int(os.getenv("SPELL_TOKEN_CACHE_SIZE", "50000"))
+
+_MISSING = object()
+
+
+def artifact_fingerprint(paths: Sequence[str]) -> Tuple[Tuple[str, int, int], ...]:
+    """(path, mtime_ns, size) of each existing file; changes whenever one is rewritten."""
+    out = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        out.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(out)
+
+
+class TokenCache:
+    def __init__(self, capacity: int = TOKEN_CACHE_SIZE):
+        self.capacity = capacity
+        self._entries: "OrderedDict[Tuple[str, Hashable], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.invalidations = 0
+        self._generation = 0
+
+    def lookup(self, kind: str, token: Hashable, compute: Callable[[], Any]) -> Any:
+        """Cached result of compute() for (kind, token). compute runs outside the lock,
+        so two threads missing on the same token may both compute it."""
+        key = (kind, token)
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is not _MISSING:
+                self._entries.move_to_end(key)
+                self.hits[kind] = self.hits.get(kind, 0) + 1
+                return value
+            self.misses[kind] = self.misses.get(kind, 0) + 1
+            generation = self._generation
+        value = compute()
+        with self._lock:
+            if generation != self._generation:
+                return value  # computed against data that has been replaced since
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            kinds = sorted(set(self.hits) | set(self.misses))
+            per_kind = {}
+            for kind in kinds:
+                hits, misses = self.hits.get(kind, 0), self.misses.get(kind, 0)
+                per_kind[kind] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                }
+            hits, misses = sum(self.hits.values()), sum(self.misses.values())
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                "invalidations": self.invalidations,
+                "correctors": per_kind,
+            }
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Startup cost of the domain vocabulary, each mode measured in a fresh process:
+
+  pickle     unpickle domain_vocab.pkl (no fuzzy index, full-scan lookups)
+  build      unpickle domain_vocab.pkl and build the DeleteIndex in memory
+  artifact   memory-map domain_vocab.idx (built if missing)
+
+    python vocab_startup_benchmark.py
+
+RSS is split into private (anonymous) memory and file-backed pages; file-backed
+pages of the mapped artifact live in the page cache and are shared by all workers.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+VOCAB_PATH = os.path.join(HERE, "domain_vocab.pkl")
+INDEX_PATH = os.path.join(HERE, "domain_vocab.idx")
+PROBES = ["chiken", "biryni", "colmobo", "berger", "restaurnt", "spagheti", "tomatos", "kottu", "hoppers"]
+
+
+def _memory_kb() -> dict:
+    out = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "RssAnon", "RssFile"):
+                    out[key] = int(value.split()[0])
+    except OSError:
+        import resource
+        out["VmRSS"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return out
+
+
+def _child(mode: str) -> None:
+    import pickle
+
+    import numpy  # noqa: F401  (imported before the baseline so it is not counted)
+    from fuzzy_index import DeleteIndex
+
+    before = _memory_kb()
+    start = time.perf_counter()
+    if mode == "artifact":
+        index = DeleteIndex.load(INDEX_PATH)
+    else:
+        with open(VOCAB_PATH, "rb") as f:
+            vocab = pickle.load(f)
+        index = DeleteIndex.build(vocab) if mode == "build" else None
+    load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if index is not None:
+        for tok in PROBES:
+            index.nearest(tok)
+    first_lookups_ms = (time.perf_counter() - start) * 1000 / len(PROBES)
+    after = _memory_kb()
+    print(json.dumps({
+        "mode": mode,
+        "load_s": round(load_s, 4),
+        "first_lookup_ms": round(first_lookups_ms, 3) if index is not None else None,
+        **{f"{k}_delta_mb": round((after[k] - before.get(k, 0)) / 1024, 1) for k in after},
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure domain vocab startup time and memory per loading mode")
+    parser.add_argument("--modes", default="pickle,build,artifact")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child)
+        return
+
+    if "artifact" in args.modes and not os.path.exists(INDEX_PATH):
+        subprocess.run([sys.executable, os.path.join(HERE, "fuzzy_index.py"), VOCAB_PATH, INDEX_PATH], check=True)
+    for mode in args.modes.split(","):
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode], check=True, cwd=HERE)
+
+
+if __name__ == "__main__":
+    main()
@@ -101,6 +101,7 @@ router.post("/:chatId/messages", auth, async (req, res) => {
       const payload = {
         query: text,
         user_id: req.userId,
+        chat_id: chatId,
         location: chat.location || "Colombo",
         top_k: 5,
         summary: chat.summary || "",
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Coordinator load test: starts stub agents + stub LLM, launches the coordinator against
+them and drives /query at a fixed (open-loop) arrival rate.
+
+Run from the coordinator/ directory:
+
+    python -m bench.load_test --rate 20 --duration 30 --config bench/stubs.example.json
+    python -m bench.load_test --rate 20 --duration 30 --save-baseline bench/baseline.json
+    python -m bench.load_test --rate 20 --duration 30 --baseline bench/baseline.json
+
+Results are printed (and optionally written) as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .stub_agents import coordinator_env, load_config, serve_stubs, stop_stubs, stub_ports
+
+COORDINATOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_QUERIES = [
+    "Find Italian restaurants near Colombo",
+    "give me a chicken curry recipe",
+    "how to make pasta carbonara",
+    "analyze nutrition for Mediterranean salad",
+    "cheap sri lankan restaurant in Kandy",
+    "spicy thai noodles",
+]
+
+# Metrics compared against the baseline; lower is better for all but throughput
+COMPARED = {"p50_ms": -1, "p95_ms": -1, "p99_ms": -1, "throughput_rps": 1, "error_rate": -1}
+RELATIVE_TOLERANCE = 0.10
+# Rates are compared on absolute change: a relative change from a 0 baseline is undefined
+ABSOLUTE_TOLERANCE = {"error_rate": 0.01}
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(q / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def summarize(samples: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    latencies = [s["latency"] * 1000.0 for s in samples if s["ok"]]
+    errors = Counter(s["error"] for s in samples if not s["ok"])
+    agent_errors = Counter(k for s in samples for k in s.get("agent_errors", []))
+    return {
+        "requests": len(samples),
+        "succeeded": len(latencies),
+        "failed": len(samples) - len(latencies),
+        "error_rate": (len(samples) - len(latencies)) / len(samples) if samples else 0.0,
+        "duration_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies) if latencies else 0.0,
+        "errors": dict(errors),
+        # agent failures the coordinator absorbed into results (e.g. "recipes_error")
+        "agent_errors": dict(agent_errors),
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Change per metric; "regressed" flags moves in the wrong direction beyond the tolerance.
+
+    Latency and throughput use RELATIVE_TOLERANCE ("change" is None for a 0 baseline, where any
+    move in the wrong direction regresses); rates use ABSOLUTE_TOLERANCE.
+    """
+    out = {}
+    for metric, better in COMPARED.items():
+        base, cur = baseline.get(metric), report.get(metric)
+        if base is None or cur is None:
+            continue
+        delta = (cur - base) / base if base else None
+        if metric in ABSOLUTE_TOLERANCE:
+            regressed = (cur - base) * better < -ABSOLUTE_TOLERANCE[metric]
+        elif delta is None:
+            regressed = (cur - base) * better < 0
+        else:
+            regressed = delta * better < -RELATIVE_TOLERANCE
+        out[metric] = {"baseline": base, "current": cur, "change": delta, "regressed": regressed}
+    return out
+
+
+async def send_query(client: httpx.AsyncClient, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        r = await client.post(f"{url}/query", json=payload)
+        latency = time.perf_counter() - start
+        if r.status_code >= 400:
+            return {"ok": False, "latency": latency, "error": f"http_{r.status_code}"}
+        body = r.json()
+        results = body.get("results", {})
+        intent = "+".join((body.get("plan") or {}).get("intents") or []) or "unknown"
+        return {"ok": True, "latency": latency, "intent": intent,
+                "agent_errors": [k for k in results if k.endswith("_error")]}
+    except Exception as e:
+        return {"ok": False, "latency": time.perf_counter() - start, "error": type(e).__name__}
+
+
+async def drive(url: str, rate: float, duration: float, queries: List[str], top_k: int = 5,
+                timeout: float = 120.0) -> Dict[str, Any]:
+    """Open-loop load: request i is sent at t0 + i/rate regardless of earlier responses."""
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        total = int(rate * duration)
+        t0 = time.perf_counter()
+        tasks = []
+        for i in range(total):
+            delay = t0 + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            payload = {"query": random.choice(queries), "top_k": top_k, "user_id": f"load-{i}"}
+            tasks.append(asyncio.create_task(send_query(client, url, payload)))
+        samples = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - t0
+    report = summarize(samples, elapsed)
+    report.update({"target_rate_rps": rate, "target_duration_s": duration})
+    return report
+
+
+async def wait_ready(url: str, timeout: float = 60.0):
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient(timeout=2.0) as client:
+        while time.time() < deadline:
+            try:
+                # /ready turns 200 once the coordinator has warmed its agents
+                if (await client.get(f"{url}/ready")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Coordinator at {url} did not become ready")
+
+
+def start_coordinator(port: int, env_overrides: Dict[str, str], workers: int = 1) -> subprocess.Popen:
+    env = {**os.environ, **env_overrides}
+    cmd = [sys.executable, "-m", "uvicorn", "src.coordinator_api:app", "--host", "127.0.0.1",
+           "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=COORDINATOR_DIR, env=env, stdout=subprocess.DEVNULL)
+
+
+async def _main(args) -> Dict[str, Any]:
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    proc: Optional[subprocess.Popen] = None
+    servers = []
+    url = args.url
+    if not url:
+        config = load_config(args.config)
+        servers = await serve_stubs(config)
+        proc = start_coordinator(args.port, coordinator_env(stub_ports(config)), args.workers)
+        url = f"http://127.0.0.1:{args.port}"
+    try:
+        await wait_ready(url)
+        if args.warmup:
+            await drive(url, args.rate, args.warmup, queries, args.top_k)
+        report = await drive(url, args.rate, args.duration, queries, args.top_k)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+        await stop_stubs(servers)
+
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["baseline_comparison"] = compare(report, json.load(f))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coordinator /query load test against stub agents")
+    parser.add_argument("--url", help="Existing coordinator to target (skips stubs and coordinator launch)")
+    parser.add_argument("--config", help="Stub profile JSON (see bench/stubs.example.json)")
+    parser.add_argument("--rate", type=float, default=10.0, help="Arrival rate, requests/second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured warmup seconds")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8100, help="Port for the launched coordinator")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--queries", help="Text file with one query per line")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="Write this run's report as the new baseline")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(_main(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    if any(v["regressed"] for v in report.get("baseline_comparison", {}).values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
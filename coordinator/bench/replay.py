@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Replay a traffic capture (TRAFFIC_CAPTURE_PATH, JSONL: {"ts": ..., "request": QueryRequest})
+against a coordinator, preserving the recorded inter-arrival times.
+
+Run from the coordinator/ directory:
+
+    python -m bench.replay capture.jsonl --url http://127.0.0.1:8000 --speed 1
+    python -m bench.replay capture.jsonl --stubs --config bench/stubs.example.json --speed 5
+    python -m bench.replay capture.jsonl --stubs --speed max
+
+Reports overall and per-intent latency percentiles as JSON.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import subprocess
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .load_test import send_query, percentile, start_coordinator, summarize, wait_ready
+from .stub_agents import coordinator_env, load_config, serve_stubs, stop_stubs, stub_ports
+
+
+def capture_files(path: str) -> List[str]:
+    """The live file plus its rotated backups (path.1 is newer than path.2), oldest first."""
+    backups = [p for p in glob.glob(f"{path}.*") if p.rsplit(".", 1)[-1].isdigit()]
+    backups.sort(key=lambda p: int(p.rsplit(".", 1)[-1]), reverse=True)
+    return backups + ([path] if os.path.exists(path) else [])
+
+
+def load_capture(path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    records = []
+    for name in capture_files(path):
+        with open(name, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "request" in rec and "ts" in rec:
+                    records.append(rec)
+    records.sort(key=lambda r: r["ts"])
+    return records[:limit] if limit else records
+
+
+async def replay(url: str, records: List[Dict[str, Any]], speed: Optional[float],
+                 concurrency: int = 64, timeout: float = 120.0) -> Dict[str, Any]:
+    """speed=None sends as fast as `concurrency` allows; otherwise the recorded gaps are divided by speed."""
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    sem = asyncio.Semaphore(concurrency) if speed is None else None
+
+    async def send(client, payload):
+        if sem is None:
+            return await send_query(client, url, payload)
+        async with sem:
+            return await send_query(client, url, payload)
+
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        t0 = time.perf_counter()
+        first_ts = records[0]["ts"] if records else 0.0
+        tasks = []
+        for rec in records:
+            if speed is not None:
+                delay = t0 + (rec["ts"] - first_ts) / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(client, rec["request"])))
+        samples = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - t0
+
+    report = summarize(samples, elapsed)
+    by_intent: Dict[str, List[float]] = defaultdict(list)
+    for s in samples:
+        if s["ok"]:
+            by_intent[s.get("intent", "unknown")].append(s["latency"] * 1000.0)
+    report["per_intent"] = {
+        intent: {"count": len(lat), "p50_ms": percentile(lat, 50), "p95_ms": percentile(lat, 95),
+                 "p99_ms": percentile(lat, 99)}
+        for intent, lat in sorted(by_intent.items())
+    }
+    recorded = (records[-1]["ts"] - first_ts) if records else 0.0
+    report.update({"speed": "max" if speed is None else speed, "recorded_span_s": recorded})
+    return report
+
+
+async def _main(args) -> Dict[str, Any]:
+    records = load_capture(args.capture, args.limit)
+    if not records:
+        raise SystemExit(f"No records found in {args.capture}")
+    speed = None if args.speed == "max" else float(args.speed.rstrip("x"))
+
+    proc: Optional[subprocess.Popen] = None
+    servers = []
+    url = args.url
+    if args.stubs:
+        config = load_config(args.config)
+        servers = await serve_stubs(config)
+        proc = start_coordinator(args.port, coordinator_env(stub_ports(config)), args.workers)
+        url = f"http://127.0.0.1:{args.port}"
+    try:
+        await wait_ready(url)
+        return await replay(url, records, speed, args.concurrency)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+        await stop_stubs(servers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured /query traffic against a coordinator")
+    parser.add_argument("capture", help="Capture JSONL (rotated backups capture.jsonl.N are included)")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Coordinator to target")
+    parser.add_argument("--stubs", action="store_true", help="Launch stub agents and a local coordinator instead")
+    parser.add_argument("--config", help="Stub profile JSON (with --stubs)")
+    parser.add_argument("--speed", default="1", help="Replay speed: 1, N (e.g. 5 or 5x) or max")
+    parser.add_argument("--concurrency", type=int, default=64, help="In-flight cap for --speed max")
+    parser.add_argument("--limit", type=int, help="Replay only the first N records")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(_main(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Lightweight stand-ins for every agent and for the OpenAI-compatible LLM endpoint,
+so the coordinator can be load-tested without models, networks or a paid API.
+
+Each stub has a latency distribution, an error rate and a payload size, e.g.
+
+    python -m bench.stub_agents --config bench/stubs.example.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import Body, FastAPI, HTTPException
+
+# Same ports the real agents use (see start_up.ps1 / coordinator .env)
+DEFAULT_PORTS = {
+    "cuisine": 8001,
+    "menu": 8002,
+    "restaurant": 8003,
+    "recipe": 8004,
+    "spell": 8005,
+    "youtube": 8006,
+    "llm": 8010,
+}
+
+# Env vars the coordinator reads to find each service
+BASE_URL_ENV = {
+    "cuisine": "CUISINE_BASE_URL",
+    "menu": "MENU_BASE_URL",
+    "restaurant": "RESTAURANT_BASE_URL",
+    "recipe": "RECIPE_BASE_URL",
+    "spell": "SPELL_BASE_URL",
+    "youtube": "YOUTUBE_BASE_URL",
+}
+
+DEFAULT_PROFILE = {"latency": "lognormal:50:0.5", "error_rate": 0.0, "items": 5, "text_bytes": 200}
+
+
+def sample_latency(spec: str) -> float:
+    """Sample a delay in seconds from a spec given in milliseconds.
+
+    fixed:<ms> | uniform:<lo>:<hi> | exp:<mean> | normal:<mean>:<sd> | lognormal:<median>:<sigma>
+    """
+    kind, *args = spec.split(":")
+    vals = [float(a) for a in args]
+    if kind == "fixed":
+        ms = vals[0]
+    elif kind == "uniform":
+        ms = random.uniform(vals[0], vals[1])
+    elif kind == "exp":
+        ms = random.expovariate(1.0 / vals[0]) if vals[0] > 0 else 0.0
+    elif kind == "normal":
+        ms = random.gauss(vals[0], vals[1])
+    elif kind == "lognormal":
+        # median m → mu = ln(m)
+        ms = vals[0] * random.lognormvariate(0.0, vals[1])
+    else:
+        raise ValueError(f"Unknown latency distribution: {spec}")
+    return max(0.0, ms) / 1000.0
+
+
+def _filler(n: int) -> str:
+    return ("lorem ipsum " * (n // 12 + 1))[:n]
+
+
+class Stub:
+    def __init__(self, name: str, profile: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.profile = {**DEFAULT_PROFILE, **(profile or {})}
+        self.requests = 0
+        self.errors = 0
+
+    async def delay_or_fail(self):
+        self.requests += 1
+        await asyncio.sleep(sample_latency(self.profile["latency"]))
+        if random.random() < float(self.profile["error_rate"]):
+            self.errors += 1
+            raise HTTPException(status_code=500, detail=f"stub {self.name} injected error")
+
+    def items(self, top_k: Optional[int] = None) -> int:
+        n = int(self.profile["items"])
+        return min(n, top_k) if top_k else n
+
+    def text(self) -> str:
+        return _filler(int(self.profile["text_bytes"]))
+
+
+def _stats_route(app: FastAPI, stub: Stub):
+    @app.get("/health")
+    def health():
+        return {"status": "ok", "stub": stub.name, "requests": stub.requests, "errors": stub.errors}
+
+
+def build_app(name: str, profile: Optional[Dict[str, Any]] = None) -> FastAPI:
+    stub = Stub(name, profile)
+    app = FastAPI(title=f"Stub {name}")
+    _stats_route(app, stub)
+
+    if name == "cuisine":
+        @app.post("/predict")
+        async def predict(body: Dict[str, Any] = Body(...)):
+            await stub.delay_or_fail()
+            return {"cuisine": random.choice(["italian", "indian", "sri_lankan", "thai"])}
+
+    elif name == "menu":
+        @app.post("/analyze")
+        async def analyze(body: Dict[str, Any] = Body(...)):
+            await stub.delay_or_fail()
+            return {"query": body.get("text"), "items": [{"name": f"dish {i}", "summary": stub.text()} for i in range(stub.items())]}
+
+    elif name == "restaurant":
+        @app.post("/search")
+        async def search(body: Dict[str, Any] = Body(...)):
+            await stub.delay_or_fail()
+            results = [
+                {"id": i, "name": f"Stub Restaurant {i}", "cuisine": body.get("cuisine") or "any",
+                 "location": body.get("location") or "Colombo", "price": "$$", "rating": 4.5, "match_score": 1.0}
+                for i in range(stub.items(body.get("top_k")))
+            ]
+            return {"success": True, "query": body.get("query") or "", "understood": body,
+                    "results": results, "total_found": len(results), "message": stub.text()}
+
+    elif name == "recipe":
+        @app.post("/recommend")
+        async def recommend(body: Dict[str, Any] = Body(...)):
+            await stub.delay_or_fail()
+            return [
+                {"id": i, "name": f"Stub Recipe {i}", "description": stub.text(), "ingredients": "rice, salt",
+                 "steps": stub.text(), "tags": "stub", "serving_size": "1", "servings": "2",
+                 "search_terms": body.get("query", ""), "score": 1.0 / (i + 1)}
+                for i in range(stub.items(body.get("top_k")))
+            ]
+
+    elif name == "spell":
+        @app.post("/check")
+        async def check(body: Dict[str, Any] = Body(...)):
+            await stub.delay_or_fail()
+            text = body.get("text", "")
+            return {"original": text, "corrected": text, "changed": False,
+                    "candidates": [{"text": text, "score": 1.0, "source": "stub"}], "notes": "stub"}
+
+        @app.post("/feedback")
+        async def feedback(body: Dict[str, Any] = Body(...)):
+            return {"status": "ok"}
+
+    elif name == "youtube":
+        @app.post("/search_videos")
+        async def search_videos(body: Dict[str, Any] = Body(...)):
+            await stub.delay_or_fail()
+            return {"videos": [
+                {"title": f"Stub video {i}", "url": f"https://www.youtube.com/watch?v=stub{i}",
+                 "duration": 300, "view_count": 1000, "uploader": "stub"}
+                for i in range(stub.items(body.get("top_k")))
+            ]}
+
+    elif name == "llm":
+        @app.post("/v1/chat/completions")
+        async def chat_completions(body: Dict[str, Any] = Body(...)):
+            await stub.delay_or_fail()
+            prompt_chars = sum(len(m.get("content") or "") for m in body.get("messages", []))
+            return {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": stub.text()}}],
+                "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": int(stub.profile["text_bytes"]) // 4,
+                          "total_tokens": prompt_chars // 4 + int(stub.profile["text_bytes"]) // 4},
+            }
+    else:
+        raise ValueError(f"Unknown stub: {name}")
+
+    return app
+
+
+def coordinator_env(ports: Dict[str, int], host: str = "127.0.0.1") -> Dict[str, str]:
+    """Environment that points a coordinator process at the stubs."""
+    env = {var: f"http://{host}:{ports[name]}" for name, var in BASE_URL_ENV.items()}
+    env["OPENAI_BASE_URL"] = f"http://{host}:{ports['llm']}/v1"
+    env["OPENAI_API_KEY"] = "stub"
+    return env
+
+
+async def serve_stubs(config: Dict[str, Any], host: str = "127.0.0.1") -> List[uvicorn.Server]:
+    """Start every stub in this event loop; returns the servers once they are accepting requests."""
+    servers = []
+    for name, port in DEFAULT_PORTS.items():
+        profile = config.get(name, {})
+        port = int(profile.get("port", port))
+        server = uvicorn.Server(uvicorn.Config(build_app(name, profile), host=host, port=port, log_level="warning"))
+        server.serve_task = asyncio.create_task(server.serve())
+        servers.append(server)
+    while not all(s.started for s in servers):
+        await asyncio.sleep(0.05)
+    return servers
+
+
+async def stop_stubs(servers: List[uvicorn.Server]) -> None:
+    for server in servers:
+        server.should_exit = True
+    await asyncio.gather(*(s.serve_task for s in servers), return_exceptions=True)
+
+
+def stub_ports(config: Dict[str, Any]) -> Dict[str, int]:
+    return {name: int(config.get(name, {}).get("port", port)) for name, port in DEFAULT_PORTS.items()}
+
+
+def load_config(path: Optional[str]) -> Dict[str, Any]:
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def _main(args):
+    config = load_config(args.config)
+    await serve_stubs(config, args.host)
+    print("Stub agents running:")
+    for var, url in coordinator_env(stub_ports(config), args.host).items():
+        print(f"  {var}={url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run stub agents and a stub LLM for coordinator load tests")
+    parser.add_argument("--config", help="JSON file with per-stub latency/error_rate/items/text_bytes/port")
+    parser.add_argument("--host", default="127.0.0.1")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,160 @@
+# agents/coordinator/adaptive_timeouts.py
+import contextvars
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import httpx
+
+# Timeouts follow each agent's recent latency: quantile * safety factor, clamped to [floor, ceiling].
+TIMEOUT_QUANTILE = float(os.getenv("ADAPTIVE_TIMEOUT_QUANTILE", "99.9"))
+TIMEOUT_FACTOR = float(os.getenv("ADAPTIVE_TIMEOUT_FACTOR", "2.0"))
+MIN_SAMPLES = int(os.getenv("ADAPTIVE_TIMEOUT_MIN_SAMPLES", "50"))
+WINDOW_SIZE = int(os.getenv("ADAPTIVE_TIMEOUT_WINDOW", "1000"))
+WINDOW_SECONDS = float(os.getenv("ADAPTIVE_TIMEOUT_WINDOW_SECONDS", "300"))
+# Wall-clock budget for one /query; a retry's timeout is clipped to what is left of it
+QUERY_BUDGET = float(os.getenv("QUERY_BUDGET_SECONDS", "120"))
+
+
+class AgentPolicy:
+    """Static bounds for one agent. `default` is used until enough samples exist."""
+
+    def __init__(self, default: float, floor: float, ceiling: float, connect: float = 5.0,
+                 write: float = 10.0, max_retries: int = 0, budget: Optional[float] = None):
+        self.default = default
+        self.floor = floor
+        self.ceiling = ceiling
+        self.connect = connect
+        self.write = write
+        self.max_retries = max_retries
+        # time this agent may spend across all attempts
+        self.budget = budget if budget is not None else ceiling * (max_retries + 1)
+
+
+# Defaults keep the previous hard-coded values as the cold-start timeouts and ceilings
+POLICIES: Dict[str, AgentPolicy] = {
+    "cuisine": AgentPolicy(default=20.0, floor=1.0, ceiling=20.0),
+    "restaurant": AgentPolicy(default=20.0, floor=2.0, ceiling=20.0),
+    "menu": AgentPolicy(default=20.0, floor=2.0, ceiling=20.0),
+    "recipe": AgentPolicy(default=20.0, floor=2.0, ceiling=20.0),
+    "spell": AgentPolicy(default=20.0, floor=1.0, ceiling=20.0),
+    "spell_feedback": AgentPolicy(default=10.0, floor=1.0, ceiling=10.0),
+    "youtube": AgentPolicy(default=90.0, floor=5.0, ceiling=90.0, connect=15.0, write=20.0, max_retries=2),
+}
+
+def backoff(attempt: int) -> float:
+    """Sleep before retrying after failed attempt number `attempt` (1-based)."""
+    return 1.5 ** attempt
+
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("query_deadline", default=None)
+
+
+def start_request_budget(seconds: float = QUERY_BUDGET) -> None:
+    """Mark the start of a /query; agent calls in this context share its deadline."""
+    _deadline.set(time.monotonic() + seconds)
+
+
+def remaining_budget() -> Optional[float]:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class LatencyWindow:
+    """Sliding window (count and age bounded) of observed call latencies in seconds."""
+
+    def __init__(self, size: int = WINDOW_SIZE, max_age: float = WINDOW_SECONDS):
+        self.max_age = max_age
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append((time.monotonic(), seconds))
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self.max_age
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+
+    def __len__(self) -> int:
+        self._prune()
+        return len(self._samples)
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._prune()
+        if not self._samples:
+            return None
+        ordered = sorted(s for _, s in self._samples)
+        idx = min(len(ordered) - 1, max(0, math.ceil(q / 100.0 * len(ordered)) - 1))
+        return ordered[idx]
+
+
+class AdaptiveTimeouts:
+    def __init__(self, policies: Dict[str, AgentPolicy] = POLICIES):
+        self.policies = policies
+        self.windows: Dict[str, LatencyWindow] = {name: LatencyWindow() for name in policies}
+
+    def record(self, agent: str, seconds: float) -> None:
+        self.windows[agent].add(seconds)
+
+    def reset(self, agent: Optional[str] = None) -> None:
+        """Forget the samples of one agent, or of all (e.g. cold-start warmup latencies)."""
+        if agent is not None:
+            self.windows[agent] = LatencyWindow()
+        else:
+            self.windows = {name: LatencyWindow() for name in self.policies}
+
+    def read_timeout(self, agent: str) -> float:
+        policy = self.policies[agent]
+        window = self.windows[agent]
+        if len(window) < MIN_SAMPLES:
+            return policy.default
+        observed = window.quantile(TIMEOUT_QUANTILE) or policy.default
+        return min(policy.ceiling, max(policy.floor, observed * TIMEOUT_FACTOR))
+
+    def retry_fits(self, agent: str, attempt: int, remaining: Optional[float]) -> bool:
+        """Whether a retry after failed attempt `attempt` still gets at least the agent's floor timeout."""
+        return remaining is None or remaining - backoff(attempt) >= self.policies[agent].floor
+
+    def retries(self, agent: str, remaining: Optional[float] = QUERY_BUDGET) -> int:
+        """Retries that can happen within the agent's budget and `remaining` query budget (None: no deadline).
+
+        Every attempt times out at the current read timeout, clipped to the budget left; a retry is
+        only made when at least the floor timeout is left after its backoff. Never above max_retries.
+        """
+        policy = self.policies[agent]
+        read = self.read_timeout(agent)
+        left = policy.budget if remaining is None else min(policy.budget, remaining)
+        left -= min(read, left)
+        retries = 0
+        while retries < policy.max_retries and self.retry_fits(agent, retries + 1, left):
+            left -= backoff(retries + 1)
+            left -= min(read, left)
+            retries += 1
+        return retries
+
+    def timeout(self, agent: str, remaining: Optional[float] = None) -> httpx.Timeout:
+        policy = self.policies[agent]
+        read = self.read_timeout(agent)
+        if remaining is not None:
+            read = max(0.1, min(read, remaining))
+        return httpx.Timeout(max(read, policy.write), read=read, write=policy.write, connect=policy.connect)
+
+    def snapshot(self) -> Dict[str, Any]:
+        out = {}
+        for name, policy in self.policies.items():
+            window = self.windows[name]
+            p50 = window.quantile(50)
+            p999 = window.quantile(TIMEOUT_QUANTILE)
+            out[name] = {
+                "read_timeout_s": round(self.read_timeout(name), 3),
+                "connect_timeout_s": policy.connect,
+                "retries": self.retries(name),
+                "samples": len(window),
+                "p50_s": round(p50, 3) if p50 is not None else None,
+                f"p{TIMEOUT_QUANTILE:g}_s": round(p999, 3) if p999 is not None else None,
+                "floor_s": policy.floor,
+                "ceiling_s": policy.ceiling,
+            }
+        return out
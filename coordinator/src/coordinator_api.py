@@ -1,11 +1,12 @@
 # agents/coordinator/coordinator_api.py
 from openai import OpenAI
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
 import os
 from dotenv import load_dotenv
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 
 load_dotenv()
@@ -21,15 +22,28 @@ client = OpenAI(
 
 from .models import QueryRequest, CoordinatorResponse, HistoryMessage
 from .router import plan_from_query
+from .followup import FollowupCache, AgentCall, Turn, content_terms, is_followup, inherit_plan, refine_query
+from .traffic_capture import TrafficCapture
 from .service_clients import (
     call_cuisine_predict, call_restaurant_search,
     call_menu_analyze, call_recipe_recommend,
     call_spell_check, send_spell_feedback,
-    call_youtube_search
+    call_youtube_search, adaptive, close_pool
 )
+from .adaptive_timeouts import start_request_budget
+from .warmup import Readiness
 
 app = FastAPI(title="Food Explorer Coordinator")
 
+# Previous turn per conversation, so follow-ups only re-ask agents whose inputs changed
+followup_cache = FollowupCache()
+
+# Sampled /query capture for replay (enabled via TRAFFIC_CAPTURE_PATH)
+traffic_capture = TrafficCapture()
+
+# Agent readiness + warmup; /ready stays 503 until the required agents are warm
+readiness = Readiness()
+
 # (optional) allow your web UI to call this service
 app.add_middleware(
     CORSMiddleware,
@@ -39,9 +53,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def startup_event():
+    # run in the background so /health answers while agents are still loading
+    app.state.warmup_task = asyncio.create_task(readiness.run())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await close_pool()
+
+@app.get("/ready")
+def ready():
+    return JSONResponse(status_code=200 if readiness.ready else 503, content=readiness.report())
+
 @app.get("/health")
 def health():
-    return {"status":"ok"}
+    return {"status":"ok", "timeouts": adaptive.snapshot()}
+
+@app.get("/metrics")
+def metrics():
+    return {"followup": followup_cache.stats(), "traffic_capture": traffic_capture.stats()}
 
 class TitleRequest(BaseModel):
     query: str
@@ -85,8 +116,16 @@ async def generate_title(req: TitleRequest):
 
 @app.post("/query", response_model=CoordinatorResponse)
 async def handle_query(req: QueryRequest):
+    traffic_capture.record(req)
+    start_request_budget()
     print(f"[Coordinator] Received query: {req.query}")
     print(f"[Coordinator] Context length: {len(req.history)}")
+    conversation_id = req.chat_id or req.user_id
+    previous = followup_cache.previous(conversation_id)
+    followup = previous is not None and is_followup(req.query, previous.plan)
+    # "more recipes with chicken" refers back but also adds terms: re-plan and spell-check them
+    refinement = followup and bool(content_terms(req.query))
+
     # 0) Spell check pre-processing
     spell_meta = {
         "spell_checked": False,
@@ -96,70 +135,102 @@ async def handle_query(req: QueryRequest):
         "correction_candidates": None,
     }
     spell_error = None
-    try:
-        spell = await call_spell_check(req.query, req.user_id, top_k=3)
-        spell_meta["spell_checked"] = True
-        spell_meta["corrected_query"] = spell.get("corrected")
-        spell_meta["correction_candidates"] = spell.get("candidates")
-        # crude confidence: top candidate score if present
-        cands = spell.get("candidates") or []
-        if cands:
-            spell_meta["correction_confidence"] = float(cands[0].get("score", 0.0))
-        # Always auto-apply corrections when changed; otherwise proceed as-is
-        if spell.get("changed"):
+    if followup and not refinement:
+        # A follow-up only refers back to the previous answer: keep the earlier query and plan
+        agent_query = previous.query
+        plan = inherit_plan(previous.plan, req.query, req.top_k)
+    else:
+        try:
+            spell = await call_spell_check(req.query, req.user_id, top_k=3)
+            spell_meta["spell_checked"] = True
+            spell_meta["corrected_query"] = spell.get("corrected")
+            spell_meta["correction_candidates"] = spell.get("candidates")
+            # crude confidence: top candidate score if present
+            cands = spell.get("candidates") or []
+            if cands:
+                spell_meta["correction_confidence"] = float(cands[0].get("score", 0.0))
+            # Always auto-apply corrections when changed; otherwise proceed as-is
+            if spell.get("changed"):
+                try:
+                    await send_spell_feedback(req.query, spell.get("corrected"), True, req.user_id)
+                except Exception:
+                    pass
+                req.query = spell.get("corrected")
+        except Exception as e:
+            # proceed without spell correction on failure; log for diagnosis
+            spell_error = str(e)
             try:
-                await send_spell_feedback(req.query, spell.get("corrected"), True, req.user_id)
+                print(f"[WARN] Spell check failed: {spell_error}")
             except Exception:
                 pass
-            req.query = spell.get("corrected")
-    except Exception as e:
-        # proceed without spell correction on failure; log for diagnosis
-        spell_error = str(e)
-        try:
-            print(f"[WARN] Spell check failed: {spell_error}")
-        except Exception:
-            pass
 
-    # 1) Parse query → plan using possibly corrected query
-    plan = plan_from_query(req.query, req.location, req.top_k)
+        # 1) Parse query → plan using possibly corrected query
+        if refinement:
+            agent_query = refine_query(previous.query, req.query)
+            plan = inherit_plan(previous.plan, req.query, req.top_k)
+            plan.top_k = req.top_k  # new terms ask for a new result set, not another page
+        else:
+            agent_query = req.query
+            plan = plan_from_query(req.query, req.location, req.top_k)
 
     results = {}
+    calls: Dict[str, AgentCall] = {}
+    reused: List[str] = []
+    # Agent results are reused on follow-ups only; a fresh query repeating the last one asks the agents again
+    reusable = previous if followup else None
 
     # 2) Possibly classify cuisine first if needed
     cuisine = plan.cuisine
     if "classify_cuisine" in plan.intents and not cuisine:
-        try:
-            cuisine = await call_cuisine_predict(req.query)
+        inputs = {"text": agent_query}
+        cuisine = followup_cache.lookup(reusable, "cuisine", inputs, None)
+        if cuisine is not None:
+            reused.append("cuisine")
             plan.cuisine = cuisine
-        except Exception as e:
-            # non-fatal; continue with other intents
-            results["classifier_error"] = str(e)
+        else:
+            try:
+                cuisine = await call_cuisine_predict(agent_query)
+                plan.cuisine = cuisine
+                calls["cuisine"] = AgentCall(inputs, None, cuisine)
+            except Exception as e:
+                # non-fatal; continue with other intents
+                results["classifier_error"] = str(e)
 
-    # 3) Build tasks based on intents
-    tasks = []
+    # 3) Build agent calls based on intents: (key, inputs without top_k, top_k, call)
+    specs = []
 
     if "find_restaurant" in plan.intents:
-        tasks.append(_wrap("restaurants", call_restaurant_search(
-            cuisine=plan.cuisine,
-            location=plan.location,
-            price=plan.price,
-            min_rating=plan.min_rating or 0,
-            top_k=plan.top_k
-        )))
+        inputs = {
+            "cuisine": plan.cuisine,
+            "location": plan.location,
+            "price": plan.price,
+            "min_rating": plan.min_rating or 0,
+        }
+        specs.append(("restaurants", inputs, plan.top_k,
+                      lambda inputs=inputs: call_restaurant_search(top_k=plan.top_k, **inputs)))
 
     if "analyze_menu" in plan.intents:
-        tasks.append(_wrap("menu_analysis", call_menu_analyze(req.query)))
+        specs.append(("menu_analysis", {"text": agent_query}, None,
+                      lambda: call_menu_analyze(agent_query)))
 
     if "recommend_recipe" in plan.intents:
-        tasks.append(_wrap("recipes", call_recipe_recommend(
-            query=req.query,
-            top_k=plan.top_k
-        )))
+        specs.append(("recipes", {"query": agent_query}, plan.top_k,
+                      lambda: call_recipe_recommend(query=agent_query, top_k=plan.top_k)))
         # Also fetch related YouTube videos for the recipe query
-        tasks.append(_wrap("youtube_videos", call_youtube_search(
-            recipe_name=req.query,
-            top_k=plan.top_k
-        )))
+        specs.append(("youtube_videos", {"recipe_name": agent_query}, plan.top_k,
+                      lambda: call_youtube_search(recipe_name=agent_query, top_k=plan.top_k)))
+
+    # Only agents whose inputs changed since the previous turn are called again
+    tasks = []
+    pending = {}
+    for key, inputs, top_k, call in specs:
+        cached = followup_cache.lookup(reusable, key, inputs, top_k)
+        if cached is not None:
+            results[key] = cached
+            reused.append(key)
+            continue
+        pending[key] = (inputs, top_k)
+        tasks.append(_wrap(key, call()))
 
     # 4) Execute in parallel
     if tasks:
@@ -173,6 +244,10 @@ async def handle_query(req: QueryRequest):
                 results[f"{key}_error"] = msg
             else:
                 results[key] = payload
+                inputs, top_k = pending[key]
+                calls[key] = AgentCall(inputs, top_k, payload)
+
+    followup_cache.store(conversation_id, previous, Turn(plan, agent_query, calls), followup)
 
     try:
         formatted_summary = await format_results_with_llm(req.query, plan, results, req.history or [])
@@ -182,7 +257,7 @@ async def handle_query(req: QueryRequest):
 
     if spell_error:
         results["spell_error"] = spell_error
-    return CoordinatorResponse(plan=plan, results=results, **spell_meta)
+    return CoordinatorResponse(plan=plan, results=results, reused_results=reused or None, **spell_meta)
 
 async def _wrap(key: str, coro):
     try:
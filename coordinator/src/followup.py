@@ -0,0 +1,188 @@
+# agents/coordinator/followup.py
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .models import Plan
+from .router import PRICE_WORDS, detect_intents, extract_cuisine, extract_location, plan_from_query
+
+# Conversation-level memo of the previous turn's plan and agent payloads
+FOLLOWUP_CACHE_SIZE = int(os.getenv("FOLLOWUP_CACHE_SIZE", "1000"))
+FOLLOWUP_TTL = float(os.getenv("FOLLOWUP_TTL", "900"))  # 15 minutes
+MAX_TOP_K = 20  # mirrors QueryRequest.top_k upper bound
+# Plan fields a follow-up may change ("show me cheaper ones" sets price)
+CONSTRAINT_FIELDS = ("cuisine", "location", "price")
+
+MORE_WORDS = re.compile(r"\b(more|another|additional|extra|others)\b", re.IGNORECASE)
+REFERENCE_WORDS = re.compile(r"\b(those|these|them|they|ones|above|same|which of)\b", re.IGNORECASE)
+# Words of a follow-up that add nothing to search for ("show me some more recipes like those")
+FILLER_WORDS = {
+    "a", "an", "the", "of", "with", "and", "or", "to", "for", "like", "but", "also", "too", "just", "please",
+    "show", "give", "get", "find", "want", "need", "can", "could", "you", "me", "i", "we", "us", "is", "are",
+    "any", "some", "one", "what", "about", "how", "which", "that", "it", "cheaper", "pricier", "similar", "other",
+    "recipe", "recipes", "restaurant", "restaurants", "place", "places", "dish", "dishes", "option", "options",
+    "result", "results", "video", "videos",
+}
+WORD_RE = re.compile(r"[a-z][a-z'-]*")
+
+
+def content_terms(text: str) -> List[str]:
+    """Words of a follow-up that add to the request ("more recipes with chicken" adds "chicken")."""
+    return [w for w in WORD_RE.findall((text or "").lower())
+            if w not in FILLER_WORDS and not MORE_WORDS.fullmatch(w) and not REFERENCE_WORDS.fullmatch(w)
+            and not any(p in w for p in PRICE_WORDS)]
+
+
+def refine_query(previous_query: str, text: str) -> str:
+    """Previous query extended with the follow-up's content terms; the agents are asked again."""
+    return " ".join([previous_query, *content_terms(text)])
+
+
+def is_followup(text: str, previous: Plan) -> bool:
+    """Follow-ups point back at the previous answer ("more of those", "which of these ...").
+
+    One that also adds content terms (see content_terms) is re-planned from refine_query,
+    not answered from the previous turn alone.
+    """
+    if not (REFERENCE_WORDS.search(text or "") or MORE_WORDS.search(text or "")):
+        return False
+    # naming a cuisine, a place or a different kind of request starts a fresh plan
+    if extract_cuisine(text) or extract_location(text):
+        return False
+    intents = detect_intents(text)
+    return intents == ["classify_cuisine"] or set(intents) <= set(previous.intents)
+
+
+def wants_more(text: str) -> bool:
+    return bool(MORE_WORDS.search(text or ""))
+
+
+def inherit_plan(previous: Plan, text: str, top_k: int) -> Plan:
+    """Previous plan updated with the constraints named in the follow-up; "more" asks for another page.
+
+    Only the agents whose inputs end up different are called again (see AgentCall.serve).
+    """
+    update = plan_from_query(text, None, top_k)
+    plan = previous.model_copy(deep=True)
+    for field in CONSTRAINT_FIELDS:
+        value = getattr(update, field)
+        if value is not None:
+            setattr(plan, field, value)
+    if wants_more(text):
+        plan.top_k = min(MAX_TOP_K, previous.top_k + top_k)
+    return plan
+
+
+def _items(payload: Any) -> Optional[List[Any]]:
+    # recipe agent returns a bare list; restaurants use "results"; YouTube uses "videos"
+    if isinstance(payload, list):
+        return payload
+    if isinstance(payload, dict):
+        for field in ("results", "videos"):
+            if isinstance(payload.get(field), list):
+                return payload[field]
+    return None
+
+
+def _slice(payload: Any, top_k: int) -> Any:
+    if isinstance(payload, list):
+        return payload[:top_k]
+    if isinstance(payload, dict):
+        sliced = dict(payload)
+        for field in ("results", "videos"):
+            if isinstance(payload.get(field), list):
+                sliced[field] = payload[field][:top_k]
+                if "total_found" in sliced:
+                    sliced["total_found"] = len(sliced[field])
+        return sliced
+    return payload
+
+
+class AgentCall:
+    """One agent invocation: its inputs (without top_k), the top_k asked for and the payload."""
+
+    def __init__(self, inputs: Dict[str, Any], top_k: Optional[int], payload: Any):
+        self.inputs = inputs
+        self.top_k = top_k
+        self.payload = payload
+
+    def serve(self, inputs: Dict[str, Any], top_k: Optional[int]) -> Any:
+        """Return a payload satisfying the request from this call, or None if the agent must be asked."""
+        if inputs != self.inputs:
+            return None
+        if top_k is None or self.top_k is None:
+            return self.payload
+        items = _items(self.payload)
+        if items is None:
+            return None
+        # a smaller page is a prefix; a short previous page means the agent has nothing more to give
+        if top_k <= self.top_k or len(items) < self.top_k:
+            return _slice(self.payload, top_k)
+        return None
+
+
+class Turn:
+    def __init__(self, plan: Plan, query: str, calls: Dict[str, AgentCall]):
+        self.plan = plan
+        self.query = query
+        self.calls = calls
+        self.timestamp = time.time()
+
+
+class FollowupCache:
+    def __init__(self, max_size: int = FOLLOWUP_CACHE_SIZE, ttl: float = FOLLOWUP_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._turns: "OrderedDict[str, Turn]" = OrderedDict()
+        self.turns = 0
+        self.followup_turns = 0
+        self.reused = 0
+        self.fetched = 0
+
+    def previous(self, conversation_id: Optional[str]) -> Optional[Turn]:
+        if not conversation_id:
+            return None
+        turn = self._turns.get(conversation_id)
+        if turn is None:
+            return None
+        if time.time() - turn.timestamp >= self.ttl:
+            self._turns.pop(conversation_id, None)
+            return None
+        self._turns.move_to_end(conversation_id)
+        return turn
+
+    def lookup(self, previous: Optional[Turn], key: str, inputs: Dict[str, Any], top_k: Optional[int]) -> Any:
+        call = previous.calls.get(key) if previous else None
+        payload = call.serve(inputs, top_k) if call else None
+        if payload is None:
+            self.fetched += 1
+        else:
+            self.reused += 1
+        return payload
+
+    def store(self, conversation_id: Optional[str], previous: Optional[Turn], turn: Turn, followup: bool) -> None:
+        self.turns += 1
+        if followup:
+            self.followup_turns += 1
+        if not conversation_id:
+            return
+        # keep older agent payloads around so a later follow-up can still reuse them
+        if previous is not None:
+            turn.calls = {**previous.calls, **turn.calls}
+        self._turns[conversation_id] = turn
+        self._turns.move_to_end(conversation_id)
+        while len(self._turns) > self.max_size:
+            self._turns.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.reused + self.fetched
+        return {
+            "conversations": len(self._turns),
+            "turns": self.turns,
+            "followup_turns": self.followup_turns,
+            "agent_calls_reused": self.reused,
+            "agent_calls_fetched": self.fetched,
+            "reuse_rate": (self.reused / calls) if calls else 0.0,
+        }
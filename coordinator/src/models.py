@@ -13,6 +13,7 @@ class QueryRequest(BaseModel):
     location: Optional[str] = Field(default=None, description="Optional location (city/area). Omit to use defaults.")
     top_k: int = Field(default=5, ge=1, le=20, description="Max results to return.")
     user_id: Optional[str] = Field(default=None, description="Optional user id for personalization/feedback.")
+    chat_id: Optional[str] = Field(default=None, description="Optional conversation id; follow-up turns reuse the previous turn's agent results.")
     auto_accept_spell: bool = Field(default=True, description="If true, auto-accept top spell correction and proceed.")
     history: Optional[List[HistoryMessage]] = Field(default=[], description="Conversation history for context.")
     summary: Optional[str] = Field(default="", description="Previous conversation summary for context.")
@@ -42,3 +43,5 @@ class CoordinatorResponse(BaseModel):
     corrected_query: Optional[str] = None
     correction_confidence: Optional[float] = None
     correction_candidates: Optional[List[Dict[str, Any]]] = None
+    # Agents whose results were served from the previous turn instead of being called again
+    reused_results: Optional[List[str]] = None
@@ -1,10 +1,13 @@
 # agents/coordinator/service_clients.py
 import os
 import asyncio
+import time
 from typing import Any, Dict, Optional
 import httpx
 from dotenv import load_dotenv
 
+from .adaptive_timeouts import AdaptiveTimeouts, backoff, remaining_budget
+
 load_dotenv()
 
 CUISINE_BASE = os.getenv("CUISINE_BASE_URL", "http://127.0.0.1:8001")
@@ -25,13 +28,75 @@ print(f"[DEBUG] YOUTUBE_BASE: {YOUTUBE_BASE}")
 
 HEADERS = {"X-Internal-Token": TOKEN} if TOKEN else {}
 
-timeout = httpx.Timeout(10.0, read=20.0, write=10.0, connect=5.0)
+AGENT_BASES = {
+    "cuisine": CUISINE_BASE,
+    "restaurant": RESTAURANT_BASE,
+    "menu": MENU_BASE,
+    "recipe": RECIPE_BASE,
+    "spell": SPELL_BASE,
+    "youtube": YOUTUBE_BASE,
+}
+
+# Shared keep-alive pool, opened at startup; calls fall back to a one-off client before that
+POOL_MAX_CONNECTIONS = int(os.getenv("AGENT_POOL_MAX_CONNECTIONS", "100"))
+POOL_MAX_KEEPALIVE = int(os.getenv("AGENT_POOL_MAX_KEEPALIVE", "20"))
+_pool: Optional[httpx.AsyncClient] = None
+
+async def open_pool() -> httpx.AsyncClient:
+    global _pool
+    if _pool is None:
+        _pool = httpx.AsyncClient(
+            headers=HEADERS,
+            limits=httpx.Limits(max_connections=POOL_MAX_CONNECTIONS, max_keepalive_connections=POOL_MAX_KEEPALIVE),
+        )
+    return _pool
+
+async def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.aclose()
+        _pool = None
+
+async def probe(agent: str, path: str, timeout: float = 2.0) -> int:
+    """GET an agent endpoint through the pool; returns the HTTP status (raises if unreachable)."""
+    client = _pool or await open_pool()
+    r = await client.get(f"{AGENT_BASES[agent]}{path}", timeout=timeout)
+    return r.status_code
+
+# Per-agent timeouts and retry counts derived from recent latency (see adaptive_timeouts.py)
+adaptive = AdaptiveTimeouts()
+
+async def _post(agent: str, url: str, payload: Dict[str, Any]) -> httpx.Response:
+    """POST with the agent's adaptive timeout; timeouts are retried while the query budget allows,
+    each retry's timeout clipped to the budget left."""
+    attempts = adaptive.retries(agent, remaining_budget()) + 1
+    for attempt in range(1, attempts + 1):
+        start = time.monotonic()
+        try:
+            timeout = adaptive.timeout(agent, remaining_budget())
+            if _pool is not None:
+                r = await _pool.post(url, json=payload, headers=HEADERS, timeout=timeout)
+            else:
+                async with httpx.AsyncClient(timeout=timeout) as client:
+                    r = await client.post(url, json=payload, headers=HEADERS)
+            adaptive.record(agent, time.monotonic() - start)
+            return r
+        except (httpx.ReadTimeout, httpx.ConnectTimeout) as e:
+            # a timed-out call still tells us the agent is at least this slow
+            adaptive.record(agent, time.monotonic() - start)
+            backoff_seconds = backoff(attempt)
+            if attempt < attempts and adaptive.retry_fits(agent, attempt, remaining_budget()):
+                print(f"[WARN] {agent} request timeout (attempt {attempt}/{attempts}). Retrying in {backoff_seconds:.1f}s...")
+                await asyncio.sleep(backoff_seconds)
+                continue
+            if attempt > 1:
+                raise Exception(f"ReadTimeout after {attempt} attempts: {e}")
+            raise
 
 async def call_cuisine_predict(text: str) -> Optional[str]:
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        r = await client.post(f"{CUISINE_BASE}/predict", json={"text": text}, headers=HEADERS)
-        r.raise_for_status()
-        return r.json().get("cuisine")
+    r = await _post("cuisine", f"{CUISINE_BASE}/predict", {"text": text})
+    r.raise_for_status()
+    return r.json().get("cuisine")
 
 async def call_restaurant_search(cuisine: Optional[str], location: Optional[str], price: Optional[str], min_rating: float, top_k: int, query: Optional[str] = None) -> Dict[str, Any]:
     payload = {
@@ -44,81 +109,59 @@ async def call_restaurant_search(cuisine: Optional[str], location: Optional[str]
     }
     print(f"[DEBUG] Calling restaurant service at: {RESTAURANT_BASE}/search")
     print(f"[DEBUG] Payload: {payload}")
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        r = await client.post(f"{RESTAURANT_BASE}/search", json=payload, headers=HEADERS)
-        body_text = r.text
-        print(f"[DEBUG] Restaurant response status: {r.status_code}")
-        print(f"[DEBUG] Restaurant response body: {body_text[:200]}...")
-        r.raise_for_status()
-        return r.json()
+    r = await _post("restaurant", f"{RESTAURANT_BASE}/search", payload)
+    body_text = r.text
+    print(f"[DEBUG] Restaurant response status: {r.status_code}")
+    print(f"[DEBUG] Restaurant response body: {body_text[:200]}...")
+    r.raise_for_status()
+    return r.json()
 
 async def call_menu_analyze(text: str) -> Dict[str, Any]:
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        r = await client.post(f"{MENU_BASE}/analyze", json={"text": text}, headers=HEADERS)
-        r.raise_for_status()
-        return r.json()
+    r = await _post("menu", f"{MENU_BASE}/analyze", {"text": text})
+    r.raise_for_status()
+    return r.json()
 
 async def call_recipe_recommend(query: str, top_k: int) -> Dict[str, Any]:
     payload = {"query": query, "top_k": top_k}
     print(f"[DEBUG] Calling recipe service at: {RECIPE_BASE}/recommend")
     print(f"[DEBUG] Payload: {payload}")
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        r = await client.post(f"{RECIPE_BASE}/recommend", json=payload, headers=HEADERS)
-        body_text = r.text
-        print(f"[DEBUG] Response status: {r.status_code}")
-        print(f"[DEBUG] Response body: {body_text[:200]}...")
-        if r.status_code >= 400:
-            raise Exception(f"Recipe service error {r.status_code}: {body_text}")
-        return r.json()
+    r = await _post("recipe", f"{RECIPE_BASE}/recommend", payload)
+    body_text = r.text
+    print(f"[DEBUG] Response status: {r.status_code}")
+    print(f"[DEBUG] Response body: {body_text[:200]}...")
+    if r.status_code >= 400:
+        raise Exception(f"Recipe service error {r.status_code}: {body_text}")
+    return r.json()
 
 async def call_youtube_search(recipe_name: str, top_k: int) -> Dict[str, Any]:
     payload = {"recipe_name": recipe_name, "top_k": top_k}
     print(f"[DEBUG] Calling YouTube service at: {YOUTUBE_BASE}/search_videos")
     print(f"[DEBUG] Payload: {payload}")
-    # YouTube searches can be slower; give a more generous timeout
-    yt_timeout = httpx.Timeout(20.0, read=90.0, write=20.0, connect=15.0)
-    attempts = 3
-    last_error: Exception | None = None
-    for attempt in range(1, attempts + 1):
-        try:
-            async with httpx.AsyncClient(timeout=yt_timeout) as client:
-                r = await client.post(f"{YOUTUBE_BASE}/search_videos", json=payload, headers=HEADERS)
-                body_text = r.text
-                print(f"[DEBUG] YouTube response status: {r.status_code}")
-                print(f"[DEBUG] YouTube response body: {body_text[:200]}...")
-                if r.status_code >= 400:
-                    raise Exception(f"YouTube service error {r.status_code}: {body_text}")
-                # Decode JSON with helpful error message
-                try:
-                    data = r.json()
-                except Exception as json_err:
-                    snippet = body_text[:200] if body_text else "<empty body>"
-                    raise Exception(f"YouTube JSON parse error: {type(json_err).__name__}: {json_err}. Body snippet: {snippet}")
-                # Basic schema validation
-                if not isinstance(data, dict) or "videos" not in data or not isinstance(data.get("videos"), list):
-                    raise Exception(f"YouTube response missing 'videos' list. Body snippet: {body_text[:200]}...")
-                return data
-        except (httpx.ReadTimeout, httpx.ConnectTimeout) as e:
-            last_error = e
-            if attempt < attempts:
-                backoff_seconds = 1.5 ** attempt
-                print(f"[WARN] YouTube request timeout (attempt {attempt}/{attempts}). Retrying in {backoff_seconds:.1f}s...")
-                await asyncio.sleep(backoff_seconds)
-                continue
-            raise Exception(f"ReadTimeout after {attempts} attempts: {e}")
-        except Exception as e:
-            # Non-timeout errors: do not retry, just bubble up
-            raise
+    # YouTube searches are slower; its policy allows a longer timeout and timeout retries
+    r = await _post("youtube", f"{YOUTUBE_BASE}/search_videos", payload)
+    body_text = r.text
+    print(f"[DEBUG] YouTube response status: {r.status_code}")
+    print(f"[DEBUG] YouTube response body: {body_text[:200]}...")
+    if r.status_code >= 400:
+        raise Exception(f"YouTube service error {r.status_code}: {body_text}")
+    # Decode JSON with helpful error message
+    try:
+        data = r.json()
+    except Exception as json_err:
+        snippet = body_text[:200] if body_text else "<empty body>"
+        raise Exception(f"YouTube JSON parse error: {type(json_err).__name__}: {json_err}. Body snippet: {snippet}")
+    # Basic schema validation
+    if not isinstance(data, dict) or "videos" not in data or not isinstance(data.get("videos"), list):
+        raise Exception(f"YouTube response missing 'videos' list. Body snippet: {body_text[:200]}...")
+    return data
 
 async def call_spell_check(text: str, user_id: str | None = None, top_k: int = 3) -> Dict[str, Any]:
     payload = {"text": text, "top_k": top_k, "user_id": user_id}
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        r = await client.post(f"{SPELL_BASE}/check", json=payload, headers=HEADERS)
-        r.raise_for_status()
-        return r.json()
+    r = await _post("spell", f"{SPELL_BASE}/check", payload)
+    r.raise_for_status()
+    return r.json()
 
 async def send_spell_feedback(original: str, suggested: str, accepted: bool, user_id: str | None = None) -> None:
     payload = {"original": original, "suggested": suggested, "accepted": accepted, "user_id": user_id}
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        r = await client.post(f"{SPELL_BASE}/feedback", json=payload, headers=HEADERS)
-        r.raise_for_status()
+    r = await _post("spell_feedback", f"{SPELL_BASE}/feedback", payload)
+    r.raise_for_status()
@@ -0,0 +1,83 @@
+# agents/coordinator/traffic_capture.py
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Optional
+
+from .models import QueryRequest
+
+# Sampled, anonymized capture of incoming /query payloads (one JSON object per line).
+# Disabled unless TRAFFIC_CAPTURE_PATH is set; replay with `python -m bench.replay`.
+CAPTURE_PATH = os.getenv("TRAFFIC_CAPTURE_PATH", "")
+CAPTURE_SAMPLE_RATE = float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", "0.1"))
+CAPTURE_MAX_BYTES = int(os.getenv("TRAFFIC_CAPTURE_MAX_BYTES", str(50 * 1024 * 1024)))
+CAPTURE_BACKUPS = int(os.getenv("TRAFFIC_CAPTURE_BACKUPS", "5"))
+CAPTURE_SALT = os.getenv("TRAFFIC_CAPTURE_SALT", "cuisinise")
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE_RE = re.compile(r"\+?\d[\d\s-]{7,}\d")
+
+
+def _pseudonym(value: Optional[str]) -> Optional[str]:
+    # stable per id so conversations still group together on replay
+    if not value:
+        return value
+    return hashlib.sha256(f"{CAPTURE_SALT}:{value}".encode()).hexdigest()[:16]
+
+
+def _scrub(text: Optional[str]) -> Optional[str]:
+    if not text:
+        return text
+    return PHONE_RE.sub("<phone>", EMAIL_RE.sub("<email>", text))
+
+
+def _mask(text: Optional[str]) -> str:
+    # history/summary only matter for prompt size on replay, so keep the length and drop the words
+    return "x" * len(text or "")
+
+
+def anonymize(req: QueryRequest) -> Dict[str, Any]:
+    payload = req.model_dump()
+    payload["query"] = _scrub(payload["query"])
+    payload["user_id"] = _pseudonym(payload.get("user_id"))
+    payload["chat_id"] = _pseudonym(payload.get("chat_id"))
+    payload["summary"] = _mask(payload.get("summary"))
+    payload["history"] = [{"role": m["role"], "text": _mask(m["text"])} for m in payload.get("history") or []]
+    return payload
+
+
+class TrafficCapture:
+    def __init__(self, path: str = CAPTURE_PATH, sample_rate: float = CAPTURE_SAMPLE_RATE,
+                 max_bytes: int = CAPTURE_MAX_BYTES, backups: int = CAPTURE_BACKUPS):
+        self.sample_rate = sample_rate
+        self.recorded = 0
+        self.logger: Optional[logging.Logger] = None
+        if path and sample_rate > 0:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger = logging.getLogger("coordinator.traffic_capture")
+            self.logger.setLevel(logging.INFO)
+            self.logger.propagate = False
+            self.logger.addHandler(handler)
+
+    @property
+    def enabled(self) -> bool:
+        return self.logger is not None
+
+    def record(self, req: QueryRequest) -> None:
+        if self.logger is None or random.random() >= self.sample_rate:
+            return
+        try:
+            self.logger.info(json.dumps({"ts": time.time(), "request": anonymize(req)}, ensure_ascii=False))
+            self.recorded += 1
+        except Exception as e:
+            print(f"[WARN] Traffic capture failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "sample_rate": self.sample_rate, "recorded": self.recorded}
@@ -0,0 +1,122 @@
+# agents/coordinator/warmup.py
+import asyncio
+import os
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from .service_clients import (
+    AGENT_BASES, adaptive, open_pool, probe,
+    call_cuisine_predict, call_menu_analyze, call_recipe_recommend,
+    call_restaurant_search, call_spell_check, call_youtube_search,
+)
+
+# Startup orchestration: wait for agents, open pooled connections, prime models/caches, then report ready.
+READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", "180"))
+# Agents primed with warmup queries; restaurant/menu/youtube reach external APIs, so they are opt-in
+WARMUP_AGENTS = [a.strip() for a in os.getenv("WARMUP_AGENTS", "spell,cuisine,recipe").split(",") if a.strip()]
+# /ready stays 503 until every required agent is warm; agents that miss READINESS_TIMEOUT are
+# reported "unavailable" and polled until they come up. By default only the warmed agents are
+# required: an outage of an external API must not pull the coordinator out of rotation.
+READINESS_REQUIRED_AGENTS = [a.strip() for a in os.getenv(
+    "READINESS_REQUIRED_AGENTS", ",".join(WARMUP_AGENTS)).split(",") if a.strip()]
+# Opt-in: report ready once every required agent is warm or has missed READINESS_TIMEOUT
+READINESS_READY_ON_TIMEOUT = os.getenv("READINESS_READY_ON_TIMEOUT", "0") == "1"
+READINESS_POLL_INTERVAL = float(os.getenv("READINESS_POLL_INTERVAL", "1.0"))
+WARMUP_QUERIES = [q.strip() for q in os.getenv(
+    "WARMUP_QUERIES", "chicken curry recipe;find italian restaurants in colombo;spicy thai noodles"
+).split(";") if q.strip()]
+
+# Cheapest endpoint per agent that answers once the app is serving
+HEALTH_PATHS = {
+    "cuisine": "/openapi.json",
+    "menu": "/openapi.json",
+    "restaurant": "/health",
+    "recipe": "/status",
+    "spell": "/ready",  # 503 while its models are still loading
+    "youtube": "/status",
+}
+
+WARMUP_CALLS = {
+    "spell": lambda q: call_spell_check(q, None, top_k=3),
+    "cuisine": lambda q: call_cuisine_predict(q),
+    "recipe": lambda q: call_recipe_recommend(query=q, top_k=3),
+    "restaurant": lambda q: call_restaurant_search(None, None, None, 0, 3, query=q),
+    "menu": lambda q: call_menu_analyze(q),
+    "youtube": lambda q: call_youtube_search(recipe_name=q, top_k=3),
+}
+
+
+class Readiness:
+    def __init__(self, required: List[str] = READINESS_REQUIRED_AGENTS,
+                 ready_on_timeout: bool = READINESS_READY_ON_TIMEOUT):
+        self.required = [a for a in required if a in AGENT_BASES]
+        self.ready_on_timeout = ready_on_timeout
+        self.ready = False
+        self.started_at = time.time()
+        self.finished_at = None
+        self.agents: Dict[str, Dict[str, Any]] = {name: {"state": "pending"} for name in AGENT_BASES}
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return {"ready": self.ready, "elapsed_s": round(elapsed, 2), "required": self.required,
+                "agents": self.agents}
+
+    def _update(self) -> None:
+        if self.ready:
+            return
+        states = [self.agents[a]["state"] for a in self.required]
+        done = ("ready", "unavailable") if self.ready_on_timeout else ("ready",)
+        if not all(s in done for s in states):
+            return
+        self.finished_at = time.time()
+        self.ready = True
+        print(f"[Coordinator] Ready after {self.finished_at - self.started_at:.1f}s: "
+              f"{ {a: s['state'] for a, s in self.agents.items()} }")
+
+    async def _wait_for(self, agent: str) -> None:
+        deadline = time.monotonic() + READINESS_TIMEOUT
+        status = self.agents[agent]
+        status["state"] = "waiting"
+        while True:
+            try:
+                # any HTTP answer means the app finished importing/loading and is serving,
+                # except 503 from agents that load their models in the background
+                if await probe(agent, HEALTH_PATHS.get(agent, "/openapi.json")) != 503:
+                    status["state"] = "up"
+                    return
+                status["last_error"] = "503 loading"
+            except httpx.HTTPError as e:
+                status["last_error"] = type(e).__name__
+            if status["state"] == "waiting" and time.monotonic() >= deadline:
+                # keep polling: a late agent is still warmed and can make the coordinator ready
+                status["state"] = "unavailable"
+                self._update()
+            await asyncio.sleep(READINESS_POLL_INTERVAL)
+
+    async def _warm(self, agent: str) -> None:
+        status = self.agents[agent]
+        await self._wait_for(agent)
+        call = WARMUP_CALLS.get(agent)
+        if agent in WARMUP_AGENTS and call is not None:
+            status["state"] = "warming"
+            timings: List[float] = []
+            for query in WARMUP_QUERIES:
+                start = time.monotonic()
+                try:
+                    await call(query)
+                except Exception as e:
+                    # e.g. 404 "no results" still primed the models
+                    status["last_error"] = str(e)[:200]
+                timings.append(round(time.monotonic() - start, 3))
+            status["warmup_s"] = timings
+            # cold-start latencies would inflate the adaptive timeouts for the next few minutes
+            adaptive.reset(agent)
+        status["state"] = "ready"
+        self._update()
+
+    async def run(self) -> None:
+        await open_pool()
+        self._update()  # nothing required
+        await asyncio.gather(*(self._warm(agent) for agent in AGENT_BASES))
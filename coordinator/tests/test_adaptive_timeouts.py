@@ -0,0 +1,74 @@
+import asyncio
+
+import httpx
+
+from coordinator.src import adaptive_timeouts, service_clients
+from coordinator.src.adaptive_timeouts import AdaptiveTimeouts
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class TimingOutPool:
+    """Stands in for the shared httpx pool: every call runs into its read timeout."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.read_timeouts = []
+
+    async def post(self, url, json=None, headers=None, timeout=None):
+        self.read_timeouts.append(round(timeout.read, 3))
+        self.clock.now += timeout.read
+        raise httpx.ReadTimeout("timed out")
+
+
+def run_youtube_call(monkeypatch, budget):
+    clock = FakeClock()
+    pool = TimingOutPool(clock)
+
+    async def sleep(seconds):
+        clock.now += seconds
+
+    monkeypatch.setattr(adaptive_timeouts.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(service_clients.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(service_clients.asyncio, "sleep", sleep)
+    monkeypatch.setattr(service_clients, "_pool", pool)
+    monkeypatch.setattr(service_clients, "adaptive", AdaptiveTimeouts())
+
+    async def query():
+        adaptive_timeouts.start_request_budget(budget)
+        try:
+            await service_clients._post("youtube", "http://youtube/search_videos", {})
+        except Exception:
+            pass
+
+    asyncio.run(query())
+    return pool.read_timeouts
+
+
+def test_youtube_retry_is_clipped_to_the_query_budget(monkeypatch):
+    timeouts = run_youtube_call(monkeypatch, 120.0)
+    # 90s cold-start attempt, then a retry with what is left after the 1.5s backoff
+    assert timeouts == [90.0, 28.5]
+    assert AdaptiveTimeouts().retries("youtube") == 1
+
+
+def test_youtube_keeps_every_retry_when_the_budget_allows(monkeypatch):
+    assert run_youtube_call(monkeypatch, 300.0) == [90.0, 90.0, 90.0]
+    assert AdaptiveTimeouts().retries("youtube", 300.0) == 2
+
+
+def test_reported_retries_match_attempts(monkeypatch):
+    for budget in (60.0, 92.0, 100.0, 185.0, 200.0):
+        timeouts = run_youtube_call(monkeypatch, budget)
+        assert len(timeouts) - 1 == AdaptiveTimeouts().retries("youtube", budget)
+
+
+def test_agents_without_retries():
+    assert AdaptiveTimeouts().retries("recipe") == 0
+    assert AdaptiveTimeouts().snapshot()["youtube"]["retries"] == 1
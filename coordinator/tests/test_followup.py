@@ -0,0 +1,142 @@
+import asyncio
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from coordinator.src import coordinator_api
+from coordinator.src.followup import AgentCall, content_terms, inherit_plan, is_followup, refine_query
+from coordinator.src.models import Plan, QueryRequest
+from coordinator.src.router import plan_from_query
+
+
+def test_followup_keeps_previous_plan_and_applies_new_constraint():
+    previous = plan_from_query("italian restaurants in Colombo", None, 5)
+    assert is_followup("show me cheaper ones", previous)
+
+    plan = inherit_plan(previous, "show me cheaper ones", 5)
+
+    assert plan.price == "low"
+    assert (plan.intents, plan.cuisine, plan.location, plan.top_k) == (
+        previous.intents, previous.cuisine, previous.location, previous.top_k)
+
+
+def test_followup_without_constraints_only_grows_top_k():
+    previous = Plan(intents=["recommend_recipe"], cuisine="thai", price="high", top_k=5)
+    plan = inherit_plan(previous, "show me more of those", 5)
+    assert plan.price == "high" and plan.cuisine == "thai"
+    assert plan.top_k == 10
+
+
+def test_content_terms_of_a_followup():
+    assert content_terms("show me cheaper ones") == []
+    assert content_terms("show me more of those") == []
+    assert content_terms("more recipes with chicken") == ["chicken"]
+    assert content_terms("another one with rice") == ["rice"]
+    assert refine_query("thai curry recipe", "more recipes with chicken") == "thai curry recipe chicken"
+
+
+def test_agent_call_is_reused_only_for_unchanged_inputs():
+    call = AgentCall({"cuisine": "italian", "price": None}, 5, {"results": [1, 2, 3, 4, 5]})
+    assert call.serve({"cuisine": "italian", "price": None}, 5) == {"results": [1, 2, 3, 4, 5]}
+    assert call.serve({"cuisine": "italian", "price": "low"}, 5) is None
+
+
+def fake_agents(monkeypatch, calls, spell_checked=None, corrections=None):
+    async def restaurant_search(top_k, **inputs):
+        calls.append(("restaurants", inputs["price"]))
+        return {"results": [{"name": f"{inputs['price']}-{i}"} for i in range(top_k)]}
+
+    async def recipe_recommend(query, top_k):
+        calls.append(("recipes", query))
+        return [{"name": f"recipe-{i}"} for i in range(top_k)]
+
+    async def youtube_search(recipe_name, top_k):
+        calls.append(("youtube_videos", recipe_name))
+        return {"videos": [{"title": f"video-{i}"} for i in range(top_k)]}
+
+    async def spell_check(text, user_id=None, top_k=3):
+        if spell_checked is not None:
+            spell_checked.append(text)
+        corrected = (corrections or {}).get(text, text)
+        return {"corrected": corrected, "changed": corrected != text, "candidates": []}
+
+    async def spell_feedback(original, suggested, accepted, user_id=None):
+        return None
+
+    async def summary(query, plan, results, history):
+        return ""
+
+    monkeypatch.setattr(coordinator_api, "call_restaurant_search", restaurant_search)
+    monkeypatch.setattr(coordinator_api, "call_recipe_recommend", recipe_recommend)
+    monkeypatch.setattr(coordinator_api, "call_youtube_search", youtube_search)
+    monkeypatch.setattr(coordinator_api, "call_spell_check", spell_check)
+    monkeypatch.setattr(coordinator_api, "send_spell_feedback", spell_feedback)
+    monkeypatch.setattr(coordinator_api, "format_results_with_llm", summary)
+    monkeypatch.setattr(coordinator_api, "followup_cache", coordinator_api.FollowupCache())
+
+
+def ask(query, chat_id="c1"):
+    return asyncio.run(coordinator_api.handle_query(QueryRequest(query=query, chat_id=chat_id)))
+
+
+def test_changed_constraint_recalls_only_the_affected_agent(monkeypatch):
+    calls = []
+    fake_agents(monkeypatch, calls)
+
+    first = asyncio.run(coordinator_api.handle_query(
+        QueryRequest(query="italian restaurants and recipes in Colombo", chat_id="c1")))
+    assert first.plan.price is None
+    calls.clear()
+
+    second = asyncio.run(coordinator_api.handle_query(QueryRequest(query="show me cheaper ones", chat_id="c1")))
+
+    assert second.plan.price == "low"
+    assert calls == [("restaurants", "low")]
+    assert sorted(second.reused_results) == ["recipes", "youtube_videos"]
+    assert second.results["restaurants"]["results"][0]["name"] == "low-0"
+
+
+def test_followup_with_new_terms_is_spell_checked_and_replanned(monkeypatch):
+    calls, spell_checked = [], []
+    fake_agents(monkeypatch, calls, spell_checked, {"more recipes with chiken": "more recipes with chicken"})
+
+    ask("thai curry recipe")
+    calls.clear()
+    spell_checked.clear()
+
+    second = ask("more recipes with chiken")
+
+    assert spell_checked == ["more recipes with chiken"]
+    assert second.spell_checked
+    assert ("recipes", "thai curry recipe chicken") in calls
+    assert ("youtube_videos", "thai curry recipe chicken") in calls
+    assert not second.reused_results
+    assert second.plan.top_k == 5
+
+
+def test_pure_followup_is_not_spell_checked(monkeypatch):
+    calls, spell_checked = [], []
+    fake_agents(monkeypatch, calls, spell_checked)
+
+    ask("thai curry recipe")
+    calls.clear()
+    spell_checked.clear()
+
+    second = ask("show me more of those")
+
+    assert spell_checked == []
+    assert ("recipes", "thai curry recipe") in calls  # a larger page than the first turn fetched
+    assert second.plan.top_k == 10
+
+
+def test_fresh_query_repeating_the_previous_one_calls_the_agents(monkeypatch):
+    calls = []
+    fake_agents(monkeypatch, calls)
+
+    ask("thai curry recipe")
+    calls.clear()
+
+    again = ask("thai curry recipe")
+
+    assert not again.reused_results
+    assert sorted(key for key, _ in calls) == ["recipes", "youtube_videos"]
@@ -0,0 +1,22 @@
+from coordinator.bench.load_test import compare
+
+
+def test_error_rate_increase_from_zero_baseline_regresses():
+    out = compare({"error_rate": 0.2}, {"error_rate": 0.0})
+    assert out["error_rate"]["regressed"]
+    assert out["error_rate"]["change"] is None
+
+
+def test_error_rate_within_absolute_tolerance_does_not_regress():
+    assert not compare({"error_rate": 0.005}, {"error_rate": 0.0})["error_rate"]["regressed"]
+
+
+def test_latency_compared_relatively():
+    out = compare({"p95_ms": 120.0, "p50_ms": 105.0}, {"p95_ms": 100.0, "p50_ms": 100.0})
+    assert out["p95_ms"]["regressed"] and not out["p50_ms"]["regressed"]
+    assert compare({"p99_ms": 5.0}, {"p99_ms": 0.0})["p99_ms"]["regressed"]
+
+
+def test_throughput_drop_regresses():
+    assert compare({"throughput_rps": 8.0}, {"throughput_rps": 10.0})["throughput_rps"]["regressed"]
+    assert not compare({"throughput_rps": 12.0}, {"throughput_rps": 10.0})["throughput_rps"]["regressed"]
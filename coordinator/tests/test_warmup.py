@@ -0,0 +1,75 @@
+import asyncio
+
+import httpx
+
+from coordinator.src import warmup
+from coordinator.src.warmup import Readiness
+
+
+def patch_agents(monkeypatch, up):
+    """Agents in `up` answer their health probe; the others refuse connections."""
+
+    async def probe(agent, path, timeout=2.0):
+        if agent in up:
+            return 200
+        raise httpx.ConnectError("refused")
+
+    monkeypatch.setattr(warmup, "probe", probe)
+    monkeypatch.setattr(warmup, "WARMUP_AGENTS", [])
+    monkeypatch.setattr(warmup, "READINESS_TIMEOUT", 0.05)
+    monkeypatch.setattr(warmup, "READINESS_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(warmup, "open_pool", lambda: asyncio.sleep(0))
+
+
+def run_for(readiness, seconds, while_running=None):
+    async def main():
+        task = asyncio.create_task(readiness.run())
+        await asyncio.sleep(seconds)
+        if while_running:
+            await while_running()
+        task.cancel()
+
+    asyncio.run(main())
+
+
+def test_stays_not_ready_while_a_required_agent_is_unavailable(monkeypatch):
+    up = set(warmup.AGENT_BASES) - {"youtube"}
+    patch_agents(monkeypatch, up)
+    readiness = Readiness(required=list(warmup.AGENT_BASES))
+    seen = {}
+
+    async def agent_comes_up():
+        seen["before"] = (readiness.ready, readiness.agents["youtube"]["state"])
+        up.add("youtube")
+        await asyncio.sleep(0.1)
+
+    run_for(readiness, 0.2, agent_comes_up)
+
+    assert seen["before"] == (False, "unavailable")
+    assert readiness.ready
+    assert readiness.agents["youtube"]["state"] == "ready"
+
+
+def test_timeout_fallback_is_opt_in(monkeypatch):
+    patch_agents(monkeypatch, set(warmup.AGENT_BASES) - {"youtube"})
+    readiness = Readiness(required=list(warmup.AGENT_BASES), ready_on_timeout=True)
+    run_for(readiness, 0.2)
+    assert readiness.ready
+    assert readiness.agents["youtube"]["state"] == "unavailable"
+
+
+def test_only_required_agents_gate_readiness(monkeypatch):
+    patch_agents(monkeypatch, {"spell", "recipe"})
+    readiness = Readiness(required=["spell", "recipe"])
+    run_for(readiness, 0.2)
+    assert readiness.ready
+
+
+def test_external_api_agents_do_not_gate_readiness_by_default(monkeypatch):
+    assert warmup.READINESS_REQUIRED_AGENTS == warmup.WARMUP_AGENTS == ["spell", "cuisine", "recipe"]
+    patch_agents(monkeypatch, {"spell", "cuisine", "recipe"})
+    readiness = Readiness()
+    assert readiness.required == ["spell", "cuisine", "recipe"]
+    run_for(readiness, 0.2)
+    assert readiness.ready
+    assert readiness.agents["youtube"]["state"] == "unavailable"